@@ -44,8 +44,10 @@ Notes
     and the datapoint that follows the requested end time.
 """
 import calendar
-from collections import OrderedDict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from numbers import Number
 import os
 import warnings
@@ -64,6 +66,9 @@ from bokeh.plotting import figure, output_file, show, save
 import numpy as np
 
 from jwst.lib.engdb_tools import ENGDB_Service
+from jwql.edb.inventory_cache import InventoryCache
+from jwql.edb.telemetry_cache import METADATA_TTL, TelemetryCache, ThreadLocalService, TTLCache, split_by_day, \
+    to_unix, unix_to_datetime, unix_to_time
 from jwql.utils.constants import MIRI_POS_RATIO_VALUES
 from jwql.utils.constants import ON_GITHUB_ACTIONS
 from jwql.utils.credentials import get_mast_base_url, get_mast_token
@@ -72,6 +77,14 @@ from jwql.utils.utils import get_config
 MAST_EDB_MNEMONIC_SERVICE = 'Mast.JwstEdb.Mnemonics'
 MAST_EDB_DICTIONARY_SERVICE = 'Mast.JwstEdb.Dictionary'
 
+# Mnemonic descriptions returned by get_mnemonic_info
+MNEMONIC_INFO_CACHE = TTLCache(METADATA_TTL)
+
+# Maximum number of EDB queries that are made at the same time
+EDB_MAX_WORKERS = 8
+
+MICROSECONDS_PER_DAY = 86400 * 10**6
+
 if not ON_GITHUB_ACTIONS:
     Mast._portal_api_connection.MAST_REQUEST_URL = get_config()['mast_request_url']
 
@@ -367,8 +380,8 @@ class EdbMnemonic:
                         block = self.data["euvalues"].data[index:self.blocks[i + 1]]
 
                         empty_block = False
-                        uvals = np.unique(block)
-                        if np.array_equal(np.array(sorted(ignore_vals)), uvals):
+                        ignored = np.isin(block, ignore_vals)
+                        if ignored.all() and np.array_equal(np.array(sorted(ignore_vals)), np.unique(block)):
                             empty_block = True
                             meanval, medianval, stdevval, maxval, minval = np.nan, np.nan, np.nan, np.nan, np.nan
 
@@ -384,13 +397,14 @@ class EdbMnemonic:
                             # of elements. Keep track of whether the first and last are ignored.
                             ignore_first = False
                             ignore_last = False
-                            for ignore_val in ignore_vals:
-                                ignore_idx = np.where(block == ignore_val)
-                                block = np.delete(block, ignore_idx)
-                                if 0 in ignore_idx[0]:
-                                    ignore_first = True
-                                if len(block) - 1 in ignore_idx[0]:
-                                    ignore_last = True
+                            if ignored.any():
+                                for ignore_val in ignore_vals:
+                                    ignore_idx = np.where(block == ignore_val)
+                                    block = np.delete(block, ignore_idx)
+                                    if 0 in ignore_idx[0]:
+                                        ignore_first = True
+                                    if len(block) - 1 in ignore_idx[0]:
+                                        ignore_last = True
 
                             # If we want to ignore the first and last elements, do that here
                             if ignore_edges:
@@ -817,16 +831,19 @@ class EdbMnemonic:
         This will help with filtering data based on conditions later, and will create a
         plot that looks more realistic, with only horizontal and vertical lines.
         """
-        new_dates = [self.data["dates"][0]]
-        new_vals = [self.data["euvalues"][0]]
-        delta_t = timedelta(microseconds=1)
-        for i, row in enumerate(self.data["dates"][1:]):
-            new_dates.append(self.data["dates"][i + 1] - delta_t)
-            new_vals.append(self.data["euvalues"][i])
-            new_dates.append(self.data["dates"][i + 1])
-            new_vals.append(self.data["euvalues"][i + 1])
+        dates = datetimes_to_microseconds(self.data["dates"])
+        values = np.asarray(self.data["euvalues"])
+
+        # The new points are 1 microsecond before each original point after the first
+        new_dates = np.empty(2 * len(dates) - 1, dtype=np.int64)
+        new_dates[0::2] = dates
+        new_dates[1::2] = dates[1:] - 1
+        new_vals = np.empty(2 * len(values) - 1, dtype=values.dtype)
+        new_vals[0::2] = values
+        new_vals[1::2] = values[:-1]
+
         new_table = Table()
-        new_table["dates"] = new_dates
+        new_table["dates"] = microseconds_to_datetimes(new_dates)
         new_table["euvalues"] = new_vals
         self.data = new_table
 
@@ -852,36 +869,41 @@ class EdbMnemonic:
             self.min = []
         else:
             if type(self.data["euvalues"].data[0]) not in [np.str_, str]:
-                min_date = np.min(self.data["dates"])
-                date_range = np.max(self.data["dates"]) - min_date
-                num_days = date_range.days
-                num_seconds = date_range.seconds
-                range_days = num_days + 1
+                dates = datetimes_to_microseconds(self.data["dates"])
+                min_date = np.min(dates)
+                max_date = np.max(dates)
+                range_days = (max_date - min_date) // MICROSECONDS_PER_DAY + 1
 
                 # Generate a list of times to use as boundaries for calculating means
-                limits = np.array([min_date + timedelta(days=x) for x in range(range_days)])
-                limits = np.append(limits, np.max(self.data["dates"]))
+                limits = min_date + np.arange(range_days, dtype=np.int64) * MICROSECONDS_PER_DAY
+                limits = np.append(limits, max_date)
+
+                # Find the data within each day with a binary search of the sorted dates
+                firsts, lasts = find_segments(dates, limits[:-1], limits[1:])
 
-                means, meds, devs, maxs, mins, times = [], [], [], [], [], []
+                means, meds, devs, maxs, mins = [], [], [], [], []
                 for i in range(len(limits) - 1):
-                    good = np.where((self.data["dates"] >= limits[i]) & (self.data["dates"] < limits[i + 1]))
+                    good = slice(firsts[i], lasts[i])
 
                     if self.meta['TlmMnemonics'][0]['AllPoints'] != 0:
                         avg, med, dev = sigma_clipped_stats(self.data["euvalues"][good], sigma=sigma)
                         maxval = np.max(self.data["euvalues"][good])
                         minval = np.min(self.data["euvalues"][good])
                     else:
-                        avg, med, dev, maxval, minval = change_only_stats(self.data["dates"][good], self.data["euvalues"][good], sigma=sigma)
+                        avg, med, dev, maxval, minval = change_only_stats(dates[good].astype('datetime64[us]'),
+                                                                          self.data["euvalues"][good], sigma=sigma)
                     means.append(avg)
                     meds.append(med)
                     maxs.append(maxval)
                     mins.append(minval)
                     devs.append(dev)
-                    times.append(limits[i] + (limits[i + 1] - limits[i]) / 2.)
+
+                # Each time is the middle of its day, rounded to the microsecond
+                times = limits[:-1] + np.round(np.diff(limits) / 2.).astype(np.int64)
                 self.mean = means
                 self.median = meds
                 self.stdev = devs
-                self.median_times = times
+                self.median_times = list(microseconds_to_datetimes(times))
                 self.max = maxs
                 self.min = mins
             else:
@@ -949,26 +971,23 @@ class EdbMnemonic:
             List of datetime objects describing the times to interpolate to
         """
         new_tab = Table()
+        dates = datetimes_to_microseconds(self.data["dates"])
+        interp_dates = datetimes_to_microseconds(times)
 
         # Change-only data is unique and needs its own way to be interpolated
         if self.meta['TlmMnemonics'][0]['AllPoints'] == 0:
-            new_values = []
-            new_dates = []
-            for time in times:
-                latest = np.where(self.data["dates"] <= time)[0]
-                if len(latest) > 0:
-                    new_values.append(self.data["euvalues"][latest[-1]])
-                    new_dates.append(time)
-            if len(new_values) > 0:
-                new_tab["euvalues"] = np.array(new_values)
-                new_tab["dates"] = np.array(new_dates)
+            # Each time takes the value of the latest data point at or before it
+            latest = np.searchsorted(dates, interp_dates, side='right') - 1
+            good_times = latest >= 0
+            new_tab["euvalues"] = np.asarray(self.data["euvalues"])[latest[good_times]]
+            new_dates = interp_dates[good_times]
 
         # This is for non change-only data
         else:
             # We can only linearly interpolate if we have more than one entry
             if len(self.data["dates"]) >= 2:
-                interp_times = np.array([create_time_offset(ele, self.data["dates"][0]) for ele in times])
-                mnem_times = np.array([create_time_offset(ele, self.data["dates"][0]) for ele in self.data["dates"]])
+                interp_times = (interp_dates - dates[0]) / 1e6
+                mnem_times = (dates - dates[0]) / 1e6
 
                 # Do not extrapolate. Any requested interoplation times that are outside the range
                 # or the original data will be ignored.
@@ -976,19 +995,20 @@ class EdbMnemonic:
                 interp_times = interp_times[good_times]
 
                 new_tab["euvalues"] = np.interp(interp_times, mnem_times, self.data["euvalues"])
-                new_tab["dates"] = np.array([add_time_offset(ele, self.data["dates"][0]) for ele in interp_times])
+                new_dates = interp_dates[good_times]
 
             else:
                 # If there are not enough data and we are unable to interpolate,
                 # then set the data table to be empty
                 new_tab["euvalues"] = np.array([])
-                new_tab["dates"] = np.array([])
+                new_dates = np.array([], dtype=np.int64)
+        new_tab["dates"] = microseconds_to_datetimes(new_dates)
 
         # Adjust any block values to account for the interpolated data
         new_blocks = []
         if self.blocks is not None:
             for index in self.blocks[0:-1]:
-                good = np.where(new_tab["dates"] >= self.data["dates"][index])[0]
+                good = np.where(new_dates >= dates[index])[0]
 
                 if len(good) > 0:
                     new_blocks.append(good[0])
@@ -1247,8 +1267,8 @@ class EdbMnemonic:
         """
         if type(self.data["euvalues"].data[0]) not in [np.str_, str]:
             duration_secs = self.mean_time_block.to('second').value
-            date_arr = np.array(self.data["dates"])
-            num_bins = (np.max(self.data["dates"]) - np.min(self.data["dates"])).total_seconds() / duration_secs
+            date_arr = datetimes_to_microseconds(self.data["dates"])
+            num_bins = (np.max(date_arr) - np.min(date_arr)) / 1e6 / duration_secs
 
             # Round up to the next integer if there is a fractional number of bins
             num_bins = np.ceil(num_bins)
@@ -1259,16 +1279,20 @@ class EdbMnemonic:
             self.min = []
             self.stdev = []
             self.median_times = []
+            # Find the data within each chunk with a binary search of the sorted dates
+            min_dates = date_arr[0] + np.round(np.arange(int(num_bins)) * duration_secs * 1e6).astype(np.int64)
+            max_dates = min_dates + np.round(duration_secs * 1e6).astype(np.int64)
+            firsts, lasts = find_segments(date_arr, min_dates, max_dates)
+
             for i in range(int(num_bins)):
-                min_date = self.data["dates"][0] + timedelta(seconds=i * duration_secs)
-                max_date = min_date + timedelta(seconds=duration_secs)
-                good = ((date_arr >= min_date) & (date_arr < max_date))
+                good = slice(firsts[i], lasts[i])
                 if self.meta['TlmMnemonics'][0]['AllPoints'] != 0:
                     avg, med, dev = sigma_clipped_stats(self.data["euvalues"][good], sigma=sigma)
                     maxval = np.max(self.data["euvalues"][good])
                     minval = np.min(self.data["euvalues"][good])
                 else:
-                    avg, med, dev, maxval, minval = change_only_stats(self.data["dates"][good], self.data["euvalues"][good], sigma=sigma)
+                    avg, med, dev, maxval, minval = change_only_stats(date_arr[good].astype('datetime64[us]'),
+                                                                      self.data["euvalues"][good], sigma=sigma)
                 if np.isfinite(avg):
                     self.mean.append(avg)
                     self.median.append(med)
@@ -1407,7 +1431,7 @@ def change_only_bounding_points(date_list, value_list, starttime, endtime):
     value_list : list
         List of corresponding mnemonic values
     """
-    date_list_arr = np.array(date_list)
+    date_list_arr = datetimes_to_microseconds(date_list)
 
     if isinstance(starttime, Time):
         starttime = starttime.datetime
@@ -1415,9 +1439,11 @@ def change_only_bounding_points(date_list, value_list, starttime, endtime):
     if isinstance(endtime, Time):
         endtime = endtime.datetime
 
-    valid_idx = np.where((date_list_arr <= endtime) & (date_list_arr >= starttime))[0]
-    before_startime = np.where(date_list_arr < starttime)[0]
-    before_endtime = np.where(date_list_arr < endtime)[0]
+    start_microsecs = datetimes_to_microseconds(starttime)
+    end_microsecs = datetimes_to_microseconds(endtime)
+    valid_idx = np.where((date_list_arr <= end_microsecs) & (date_list_arr >= start_microsecs))[0]
+    before_startime = np.where(date_list_arr < start_microsecs)[0]
+    before_endtime = np.where(date_list_arr < end_microsecs)[0]
 
     # The value at starttime is either the value of the last point before starttime,
     # or NaN if there are no points prior to starttime
@@ -1465,7 +1491,7 @@ def change_only_stats(times, values, sigma=3):
     Parameters
     ----------
     times : list
-        List of datetime objects
+        List of datetime objects, or ``numpy.datetime64`` array
 
     values : list
         List of values corresponding to times
@@ -1491,10 +1517,8 @@ def change_only_stats(times, values, sigma=3):
     if len(times) == 1:
         return values, values, 0., values, values
     else:
-        times = np.array(times)
         values = np.array(values)
-        delta_time = times[1:] - times[0:-1]
-        delta_time_weight = np.array([e.total_seconds() for e in delta_time])
+        delta_time_weight = np.diff(datetimes_to_microseconds(times)) / 1e6
 
         # Add weight for the final point. Set it to 1 microsecond
         delta_time_weight = np.append(delta_time_weight, 1e-6)
@@ -1523,18 +1547,12 @@ def change_only_stats(times, values, sigma=3):
         sorted_idx = np.argsort(values)
         values = values[sorted_idx]
         delta_time_weight = delta_time_weight[sorted_idx]
-        total_idx = 0
-        for i, (val, weight) in enumerate(zip(values, delta_time_weight)):
-            total_idx += weight
-            if total_idx >= midpt:
-                if odd:
-                    medianval = val
-                else:
-                    if total_idx > midpt:
-                        medianval = val
-                    else:
-                        medianval = (val + values[i + 1]) / 2.
-                break
+        total_idx = np.cumsum(delta_time_weight)
+        i = np.searchsorted(total_idx, midpt, side='left')
+        if odd or total_idx[i] > midpt:
+            medianval = values[i]
+        else:
+            medianval = (values[i] + values[i + 1]) / 2.
 
     return meanval, medianval, stdevval, maxval, minval
 
@@ -1562,7 +1580,89 @@ def create_time_offset(dt_obj, epoch):
         return (dt_obj - epoch).total_seconds()
 
 
-def get_mnemonic(mnemonic_identifier, start_time, end_time):
+def datetimes_to_microseconds(dates):
+    """Convert datetimes to integer numbers of microseconds since the
+    Unix epoch, so that time arithmetic can be done on whole arrays.
+
+    Parameters
+    ----------
+    dates : list or numpy.ndarray or datetime.datetime or astropy.time.Time
+        Datetime objects, ``numpy.datetime64`` values, or ``Time``
+        instance. Datetimes without a time zone are taken to be in UTC.
+
+    Returns
+    -------
+    microseconds : numpy.ndarray or numpy.int64
+        Microseconds since the Unix epoch, with the shape of ``dates``
+    """
+    if isinstance(dates, Time):
+        dates = dates.datetime
+    dates = np.asarray(dates)
+    if dates.size == 0:
+        return np.array([], dtype=np.int64)
+    microseconds = dates.astype('datetime64[us]').astype(np.int64)
+    if microseconds.ndim == 0:
+        return microseconds[()]
+    return microseconds
+
+
+def find_segments(dates, starts, ends):
+    """Find the data within each of a set of time ranges. All ranges are
+    found at once, with a binary search of the dates.
+
+    Parameters
+    ----------
+    dates : numpy.ndarray
+        Times of the data, in increasing order
+
+    starts : numpy.ndarray
+        Start time of each range. Data at the start time are in the range.
+
+    ends : numpy.ndarray
+        End time of each range. Data at the end time are not in the range.
+
+    Returns
+    -------
+    firsts : numpy.ndarray
+        Index of the first element of ``dates`` in each range
+
+    lasts : numpy.ndarray
+        Index following the last element of ``dates`` in each range, so
+        that the data in range ``i`` are ``dates[firsts[i]:lasts[i]]``
+    """
+    firsts = np.searchsorted(dates, starts, side='left')
+    lasts = np.maximum(np.searchsorted(dates, ends, side='left'), firsts)
+    return firsts, lasts
+
+
+@lru_cache(maxsize=1)
+def get_engdb_service():
+    """Return a new EDB service. The service keeps the state of each
+    request on itself, so it must not be shared between threads.
+
+    Returns
+    -------
+    service : jwst.lib.engdb_tools.ENGDB_Service
+        Service used to query the EDB
+    """
+    return ENGDB_Service(get_mast_base_url())  # By default, will use the public MAST service.
+
+
+@lru_cache(maxsize=1)
+def get_telemetry_cache():
+    """Return the telemetry cache used by this process, creating it on
+    the first call. The cache is kept in the ``outputs`` directory.
+
+    Returns
+    -------
+    cache : jwql.edb.telemetry_cache.TelemetryCache
+        Telemetry cache
+    """
+    cache_dir = os.path.join(get_config()['outputs'], 'edb_telemetry_cache')
+    return TelemetryCache(cache_dir, ThreadLocalService(get_engdb_service))
+
+
+def get_mnemonic(mnemonic_identifier, start_time, end_time, use_cache=True):
     """Execute query and return an ``EdbMnemonic`` instance.
 
     The underlying MAST service returns data that include the
@@ -1580,15 +1680,19 @@ def get_mnemonic(mnemonic_identifier, start_time, end_time):
     end_time : astropy.time.Time or datetime.datetime
         End time
 
+    use_cache : bool
+        If ``True``, values are taken from the local telemetry cache,
+        and only the parts of the time range that are not cached are
+        queried from the EDB. If ``False``, the whole time range is
+        queried from the EDB.
+
     Returns
     -------
     mnemonic : instance of EdbMnemonic
         EdbMnemonic object containing query results
     """
-    base_url = get_mast_base_url()
-    service = ENGDB_Service(base_url)  # By default, will use the public MAST service.
-
-    meta = service.get_meta(mnemonic_identifier)
+    cache = get_telemetry_cache()
+    meta = cache.get_meta(mnemonic_identifier)
 
     # If the mnemonic is stored as change-only data, then include bracketing values
     # outside of the requested start and stop times. These may be needed later to
@@ -1598,11 +1702,14 @@ def get_mnemonic(mnemonic_identifier, start_time, end_time):
     else:
         bracket = False
 
-    data = service.get_values(mnemonic_identifier, start_time, end_time, include_obstime=True,
-                              include_bracket_values=bracket)
+    if use_cache:
+        times, values = cache.get_values(mnemonic_identifier, start_time, end_time, include_bracket_values=bracket)
+    else:
+        times, values = cache.query(mnemonic_identifier, to_unix(start_time), to_unix(end_time),
+                                    include_bracket_values=bracket)
 
-    dates = [datetime.strptime(row.obstime.iso, "%Y-%m-%d %H:%M:%S.%f") for row in data]
-    values = [row.value for row in data]
+    dates = unix_to_datetime(times).tolist()
+    values = values.tolist()
 
     if bracket:
         # For change-only data, check to see how many additional data points there are before
@@ -1630,8 +1737,24 @@ def get_mnemonic(mnemonic_identifier, start_time, end_time):
     return mnemonic
 
 
-def get_mnemonics(mnemonics, start_time, end_time):
-    """Query DMS EDB with a list of mnemonics and a time interval.
+@lru_cache(maxsize=1)
+def get_inventory_cache():
+    """Return the mnemonic inventory cache used by this process,
+    creating it on the first call. The cache is kept in the
+    ``outputs`` directory.
+
+    Returns
+    -------
+    cache : jwql.edb.inventory_cache.InventoryCache
+        Mnemonic inventory cache
+    """
+    cache_file = os.path.join(get_config()['outputs'], 'edb_mnemonic_inventory.ecsv')
+    return InventoryCache(cache_file, query_mnemonic_inventory)
+
+
+def get_mnemonics(mnemonics, start_time, end_time, max_workers=EDB_MAX_WORKERS):
+    """Query DMS EDB with a list of mnemonics and a time interval. Up
+    to ``max_workers`` mnemonics are queried at the same time.
 
     Parameters
     ----------
@@ -1642,6 +1765,8 @@ def get_mnemonics(mnemonics, start_time, end_time):
         Start time
     end_time : astropy.time.Time instance
         End time
+    max_workers : int
+        Maximum number of queries made at the same time
 
     Returns
     -------
@@ -1653,15 +1778,20 @@ def get_mnemonics(mnemonics, start_time, end_time):
         raise RuntimeError('Please provide a list/array of mnemonic_identifiers')
 
     mnemonic_dict = OrderedDict()
-    for mnemonic_identifier in mnemonics:
-        # fill in dictionary
-        mnemonic_dict[mnemonic_identifier] = get_mnemonic(mnemonic_identifier, start_time, end_time)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(get_mnemonic, mnemonic_identifier, start_time, end_time)
+                   for mnemonic_identifier in mnemonics]
+
+        # fill in dictionary, in the order of the list
+        for mnemonic_identifier, future in zip(mnemonics, futures):
+            mnemonic_dict[mnemonic_identifier] = future.result()
 
     return mnemonic_dict
 
 
 def get_mnemonic_info(mnemonic_identifier):
-    """Return the mnemonic description.
+    """Return the mnemonic description. Descriptions are kept in memory
+    for ``METADATA_TTL`` seconds.
 
     Parameters
     ----------
@@ -1673,8 +1803,8 @@ def get_mnemonic_info(mnemonic_identifier):
     info : dict
         Object that contains the returned data
     """
-    mast_token = get_mast_token()
-    return query_mnemonic_info(mnemonic_identifier, token=mast_token)
+    return MNEMONIC_INFO_CACHE.lookup(mnemonic_identifier,
+                                      lambda: query_mnemonic_info(mnemonic_identifier, token=get_mast_token()))
 
 
 def interpolate_datetimes(new_times, old_times, old_data):
@@ -1700,8 +1830,9 @@ def interpolate_datetimes(new_times, old_times, old_data):
     """
     # We can only linearly interpolate if we have more than one entry
     if len(old_data) >= 2:
-        interp_times = np.array([create_time_offset(ele, old_times[0]) for ele in new_times])
-        mnem_times = np.array([create_time_offset(ele, old_times[0]) for ele in old_times])
+        old_microsecs = datetimes_to_microseconds(old_times)
+        interp_times = (datetimes_to_microseconds(new_times) - old_microsecs[0]) / 1e6
+        mnem_times = (old_microsecs - old_microsecs[0]) / 1e6
         new_data = np.interp(interp_times, mnem_times, old_data)
     else:
         # If there are not enough data and we are unable to interpolate,
@@ -1723,18 +1854,33 @@ def is_valid_mnemonic(mnemonic_identifier):
     bool
         Is mnemonic_identifier a valid EDB mnemonic?
     """
-    inventory = mnemonic_inventory()[0]
-    if mnemonic_identifier in inventory['tlmMnemonic']:
-        return True
-    else:
-        return False
+    return get_inventory_cache().lookup(mnemonic_identifier) is not None
+
+
+def microseconds_to_datetimes(microseconds):
+    """Convert integer numbers of microseconds since the Unix epoch to
+    datetimes, for plotting or storing in the database.
+
+    Parameters
+    ----------
+    microseconds : numpy.ndarray
+        Microseconds since the Unix epoch
+
+    Returns
+    -------
+    dates : numpy.ndarray
+        Object array of ``datetime.datetime`` instances, in UTC
+    """
+    return np.asarray(microseconds, dtype=np.int64).astype('datetime64[us]').astype(object)
 
 
 def mnemonic_inventory():
     """Return all mnemonics in the DMS engineering database.
     No authentication is required, this information is public.
     Since this is a rather large and quasi-static table (~15000 rows),
-    it is cached using functools.
+    it is cached in memory and on disk, and retrieved again in the
+    background once the cached copy is older than ``INVENTORY_TTL``
+    seconds.
 
     Returns
     -------
@@ -1743,13 +1889,47 @@ def mnemonic_inventory():
     meta : dict
         Additional information returned by the query.
     """
-    out = Mast.service_request_async(MAST_EDB_MNEMONIC_SERVICE, {})
-    data, meta = process_mast_service_request_result(out)
+    return get_inventory_cache().get()
 
-    # convert numerical ID to str for homogenity (all columns are str)
-    data['tlmIdentifier'] = data['tlmIdentifier'].astype(str)
 
-    return data, meta
+def prefetch_mnemonics(queries, executor):
+    """Start adding the metadata, descriptions, and values of mnemonics
+    to the local caches, so that later calls to ``get_mnemonic`` for
+    the same time ranges do not need to query the EDB. The time ranges
+    of each mnemonic are merged and split into days, so that no two
+    requests retrieve the same data.
+
+    Parameters
+    ----------
+    queries : list
+        ``(mnemonic_identifier, start_time, end_time)`` tuples, with
+        times as ``astropy.time.Time`` or ``datetime.datetime``
+
+    executor : concurrent.futures.Executor
+        Executor that makes the requests. Requests are submitted in
+        the order in which the mnemonics first appear in ``queries``.
+
+    Returns
+    -------
+    futures : dict
+        Keys are mnemonic identifiers, values are lists of the futures
+        of the requests for each mnemonic. Errors are kept in the
+        futures rather than raised; a later ``get_mnemonic`` call for
+        the mnemonic repeats the failed request.
+    """
+    cache = get_telemetry_cache()
+    intervals = defaultdict(list)
+    for mnemonic_identifier, start_time, end_time in queries:
+        intervals[mnemonic_identifier].append((to_unix(start_time), to_unix(end_time)))
+
+    futures = {}
+    for mnemonic_identifier, mnemonic_intervals in intervals.items():
+        futures[mnemonic_identifier] = [executor.submit(cache.get_meta, mnemonic_identifier),
+                                        executor.submit(get_mnemonic_info, mnemonic_identifier)]
+        for start, end in split_by_day(mnemonic_intervals):
+            futures[mnemonic_identifier].append(executor.submit(cache.get_values, mnemonic_identifier,
+                                                                unix_to_time(start), unix_to_time(end)))
+    return futures
 
 
 def process_mast_service_request_result(result, data_as_table=True):
@@ -1797,6 +1977,26 @@ def process_mast_service_request_result(result, data_as_table=True):
     return data, meta
 
 
+def query_mnemonic_inventory():
+    """Retrieve all mnemonics in the DMS engineering database from
+    MAST, without using the cache.
+
+    Returns
+    -------
+    data : astropy.table.Table
+        Table representation of the mnemonic inventory.
+    meta : dict
+        Additional information returned by the query.
+    """
+    out = Mast.service_request_async(MAST_EDB_MNEMONIC_SERVICE, {})
+    data, meta = process_mast_service_request_result(out)
+
+    # convert numerical ID to str for homogenity (all columns are str)
+    data['tlmIdentifier'] = data['tlmIdentifier'].astype(str)
+
+    return data, meta
+
+
 def query_mnemonic_info(mnemonic_identifier, token=None):
     """Query the EDB to return the mnemonic description.
 
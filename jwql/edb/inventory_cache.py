@@ -0,0 +1,271 @@
+#! /usr/bin/env python
+
+"""Local cache of the inventory of mnemonics in the JWST DMS
+Engineering Database.
+
+The inventory is a large table that rarely changes. It is kept in
+memory, and in an ECSV file on disk so that it survives restarts. The
+time of the query and the metadata it returned are kept in the header
+of the file. Once the cached inventory is more than ``INVENTORY_TTL``
+seconds old, it is still returned straight away, while a fresh copy is
+retrieved in a background thread. After a background refresh fails,
+no other is started for ``RETRY_INTERVAL`` seconds. Callers only wait
+for the inventory to be retrieved when there is no cached copy at all.
+
+An index from each mnemonic to its identifier, description, and unit
+is built along with the cached inventory, so that mnemonics can be
+looked up without searching the table.
+
+Use
+---
+
+    This module can be imported and used with
+
+    ::
+
+        from jwql.edb.inventory_cache import InventoryCache
+        cache = InventoryCache(cache_file, query_function)
+        data, meta = cache.get()
+        identifier, description, unit = cache.lookup('SA_ZFGOUTFOV')
+"""
+import copy
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from astropy.table import Table
+
+from jwql.utils import permissions
+
+# Number of seconds after which the cached inventory is retrieved again
+INVENTORY_TTL = 86400.
+
+# Number of seconds after a failed background refresh before another
+# is started
+RETRY_INTERVAL = 600.
+
+# Keys of the table metadata in the cache file holding the time of the
+# query and the metadata it returned
+TIME_KEY = 'inventory_cache_time'
+META_KEY = 'inventory_cache_meta'
+
+# Columns of the inventory that are indexed for each mnemonic
+INDEX_COLUMNS = ['tlmIdentifier', 'description', 'unit']
+
+
+class InventoryCache:
+    """In-memory and on-disk cache of the mnemonic inventory.
+
+    Attributes
+    ----------
+    cache_file : str
+        Name, including path, of the ECSV file holding the inventory
+
+    query : callable
+        Function, taking no arguments, that retrieves the inventory
+        and returns it as an ``astropy.table.Table`` and a dictionary
+        of metadata
+
+    ttl : float
+        Number of seconds after which the cached inventory is
+        retrieved again
+
+    retry_interval : float
+        Number of seconds after a failed background refresh before
+        another is started
+    """
+    def __init__(self, cache_file, query, ttl=INVENTORY_TTL, retry_interval=RETRY_INTERVAL):
+        """Initialize the cache.
+
+        Parameters
+        ----------
+        cache_file : str
+            Name, including path, of the ECSV file holding the
+            inventory. Its directory is created if necessary.
+
+        query : callable
+            Function, taking no arguments, that retrieves the inventory
+
+        ttl : float
+            Number of seconds after which the cached inventory is
+            retrieved again
+
+        retry_interval : float
+            Number of seconds after a failed background refresh before
+            another is started
+        """
+        self.cache_file = cache_file
+        self.query = query
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._entry = None
+        self._last_failure = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def get(self):
+        """Return the inventory. Values are copied, so that callers may
+        modify them.
+
+        Returns
+        -------
+        data : astropy.table.Table
+            Table representation of the mnemonic inventory
+
+        meta : dict
+            Additional information returned by the query
+        """
+        entry = self.get_entry()
+        return entry['data'].copy(), copy.deepcopy(entry['meta'])
+
+    def get_entry(self):
+        """Return the cached inventory, reading it from disk or
+        retrieving it if it is not in memory, and starting a
+        background refresh if it has expired.
+
+        Returns
+        -------
+        entry : dict
+            Keys are ``time`` (when the inventory was retrieved, in
+            seconds since the Unix epoch), ``data``, ``meta``, and
+            ``index``, as returned by ``index_inventory``
+        """
+        with self._lock:
+            if self._entry is None:
+                self._entry = self.load()
+            entry = self._entry
+
+        if entry is None:
+            # Nothing is cached, so wait for the inventory, unless
+            # another thread has retrieved it in the meantime
+            with self._refresh_lock:
+                with self._lock:
+                    entry = self._entry
+                if entry is None:
+                    entry = self.refresh()
+        elif time.time() - entry['time'] > self.ttl:
+            self.start_refresh()
+
+        return entry
+
+    def load(self):
+        """Read the inventory from the cache file.
+
+        Returns
+        -------
+        entry : dict
+            Cached inventory, as returned by ``get_entry``, or ``None``
+            if there is no readable cache file
+        """
+        try:
+            data = Table.read(self.cache_file, format='ascii.ecsv')
+            query_time = float(data.meta.pop(TIME_KEY))
+            meta = data.meta.pop(META_KEY)
+            index = index_inventory(data)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            # Any file that cannot be read, e.g. one written by an
+            # earlier version of the cache, is retrieved again
+            logging.warning(f'Unable to read the mnemonic inventory cache {self.cache_file}: {error}')
+            return None
+
+        return {'time': query_time, 'data': data, 'meta': meta, 'index': index}
+
+    def lookup(self, mnemonic_identifier):
+        """Return the identifier, description, and unit of a mnemonic.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier, e.g. ``SA_ZFGOUTFOV``
+
+        Returns
+        -------
+        properties : tuple
+            The ``tlmIdentifier``, ``description``, and ``unit`` of the
+            mnemonic, or ``None`` if it is not in the inventory
+        """
+        return self.get_entry()['index'].get(mnemonic_identifier)
+
+    def refresh(self):
+        """Retrieve the inventory and replace the cached copy, in
+        memory and on disk.
+
+        Returns
+        -------
+        entry : dict
+            The new cached inventory, as returned by ``get_entry``
+        """
+        query_time = time.time()
+        data, meta = self.query()
+        entry = {'time': query_time, 'data': data, 'meta': meta, 'index': index_inventory(data)}
+        with self._lock:
+            self._entry = entry
+
+        # Write to a temporary file and rename it, so that readers
+        # never see a partly written file
+        cached = Table(data, copy=False)
+        cached.meta = dict(data.meta, **{TIME_KEY: query_time, META_KEY: meta})
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        handle, temp_filename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_file)), suffix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            cached.write(temp_file, format='ascii.ecsv')
+        os.replace(temp_filename, self.cache_file)
+        permissions.set_permissions(self.cache_file)
+
+        return entry
+
+    def start_refresh(self):
+        """Refresh the inventory in a background thread, unless a
+        refresh is already in progress, or the last one failed less
+        than ``retry_interval`` seconds ago.
+
+        Returns
+        -------
+        thread : threading.Thread
+            The thread making the refresh, or ``None`` if no refresh
+            was started
+        """
+        last_failure = self._last_failure
+        if last_failure is not None and time.time() - last_failure < self.retry_interval:
+            return None
+        if not self._refresh_lock.acquire(blocking=False):
+            return None
+
+        def run():
+            try:
+                self.refresh()
+                self._last_failure = None
+            except Exception as error:
+                # The expired inventory stays in use until a refresh succeeds
+                logging.warning(f'Unable to refresh the mnemonic inventory: {error}')
+                self._last_failure = time.time()
+            finally:
+                self._refresh_lock.release()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def index_inventory(data):
+    """Index the inventory by mnemonic.
+
+    Parameters
+    ----------
+    data : astropy.table.Table
+        Table representation of the mnemonic inventory
+
+    Returns
+    -------
+    index : dict
+        Keys are mnemonics, values are tuples of their values in
+        ``INDEX_COLUMNS``. Columns missing from the inventory give
+        values of ``None``.
+    """
+    columns = [data[name] if name in data.colnames else [None] * len(data) for name in INDEX_COLUMNS]
+    return {str(mnemonic): tuple(None if value is None else str(value) for value in values)
+            for mnemonic, *values in zip(data['tlmMnemonic'], *columns)}
@@ -0,0 +1,913 @@
+#! /usr/bin/env python
+
+"""Local cache of telemetry from the JWST DMS Engineering Database.
+
+Telemetry are cached on disk in one ``numpy`` ``.npz`` file per
+mnemonic per UTC day, with times stored as seconds since the Unix
+epoch. Each file also records which time intervals of that day have
+been queried from the EDB. When telemetry are requested, only the
+parts of the requested time range that have not been queried before
+are fetched from the EDB, and the results are merged into the cache.
+Queried intervals that end less than ``CACHE_SETTLE_TIME`` seconds
+before the query are not recorded as queried on disk, since telemetry
+for recent times may still be arriving in the EDB. Instead, they are
+treated as queried, in memory only, for ``RECENT_COVERAGE_TTL``
+seconds, so that recent data retrieved ahead of time (e.g. by
+``engineering_database.prefetch_mnemonics``) are not queried again
+within the same monitor run.
+
+The values preceding and following each queried interval are always
+fetched and cached along with the interval, so that the bracketing
+values of change-only mnemonics can be found in the cache.
+
+Mnemonic metadata are kept in memory for ``METADATA_TTL`` seconds.
+
+Cache files that have not been written for more than
+``CACHE_RETENTION`` seconds are removed. The cache is pruned when
+values are stored, at most once every ``PRUNE_INTERVAL`` seconds.
+
+Values that cannot be written to the cache, e.g. because the cache
+belongs to another user, are still returned, and are queried from the
+EDB again the next time they are requested.
+
+The cache may be used from several threads at once. Services that
+keep the state of a request on themselves, such as ``ENGDB_Service``,
+should be wrapped in a ``ThreadLocalService`` so that each thread has
+its own instance. Requests to the EDB are spaced at least ``REQUEST_INTERVAL`` seconds apart, and
+requests that fail with a connection error, a timeout, or a server
+error are retried up to ``MAX_RETRIES`` times, waiting twice as long
+before each retry.
+
+Use
+---
+
+    This module can be imported and used with
+
+    ::
+
+        from jwst.lib.engdb_tools import ENGDB_Service
+        from jwql.edb.telemetry_cache import TelemetryCache, ThreadLocalService
+        service = ThreadLocalService(lambda: ENGDB_Service(base_url))
+        cache = TelemetryCache(cache_dir, service)
+        times, values = cache.get_values('SA_ZFGOUTFOV', start_time, end_time)
+"""
+import copy
+from datetime import timezone
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from astropy.time import Time
+import numpy as np
+import requests
+
+from jwql.utils import permissions
+
+SECONDS_PER_DAY = 86400.
+
+# Queried intervals are only recorded as complete up to this many
+# seconds before the time of the query
+CACHE_SETTLE_TIME = 86400.
+
+# Number of seconds for which queried intervals within the settle time
+# are treated as queried
+RECENT_COVERAGE_TTL = 3600.
+
+# Number of seconds for which mnemonic metadata are kept in memory
+METADATA_TTL = 86400.
+
+# Cache files that have not been written for this many seconds are
+# removed, and the number of seconds between checks for such files
+CACHE_RETENTION = 30 * SECONDS_PER_DAY
+PRUNE_INTERVAL = SECONDS_PER_DAY
+
+# Minimum number of seconds between the starts of requests to the EDB
+REQUEST_INTERVAL = 0.1
+
+# Number of times a request to the EDB that fails with a transient
+# error is retried, and the number of seconds to wait before the
+# first retry
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.
+
+# HTTP status codes of transient errors
+TRANSIENT_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+class RateLimiter:
+    """Spaces out calls made from any number of threads.
+
+    Attributes
+    ----------
+    interval : float
+        Minimum number of seconds between calls
+    """
+    def __init__(self, interval):
+        """Initialize the limiter.
+
+        Parameters
+        ----------
+        interval : float
+            Minimum number of seconds between calls
+        """
+        self.interval = interval
+        self._next_time = 0.
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Wait until at least ``interval`` seconds have passed since
+        the previous call returned from ``wait``."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ThreadLocalService:
+    """Gives each thread its own instance of a service. Attributes of
+    the wrapper are those of the instance of the calling thread, which
+    is created the first time that thread uses the wrapper.
+
+    Attributes
+    ----------
+    factory : callable
+        Function, taking no arguments, that creates an instance of the
+        service
+    """
+    def __init__(self, factory):
+        """Initialize the wrapper.
+
+        Parameters
+        ----------
+        factory : callable
+            Function, taking no arguments, that creates an instance of
+            the service
+        """
+        self.factory = factory
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._local.service = self.factory()
+        return getattr(service, name)
+
+
+class TTLCache:
+    """Memo of values that expire a fixed time after they are stored.
+
+    Attributes
+    ----------
+    ttl : float
+        Number of seconds for which each value is kept
+    """
+    def __init__(self, ttl):
+        """Initialize the memo.
+
+        Parameters
+        ----------
+        ttl : float
+            Number of seconds for which each value is kept
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Remove all values"""
+        with self._lock:
+            self._entries.clear()
+
+    def lookup(self, key, function):
+        """Return the value for ``key``, calling ``function`` to compute
+        it if there is no value or the value has expired. Values are
+        copied, so that callers may modify them.
+
+        Parameters
+        ----------
+        key : object
+            Hashable key of the value
+
+        function : callable
+            Function, taking no arguments, that returns the value
+
+        Returns
+        -------
+        value : object
+            The value for ``key``
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            entry = (time.time(), function())
+            with self._lock:
+                self._entries[key] = entry
+        return copy.deepcopy(entry[1])
+
+
+class TelemetryCache:
+    """On-disk cache of mnemonic values from the EDB.
+
+    Attributes
+    ----------
+    cache_dir : str
+        Directory containing the cache. Each mnemonic has a
+        subdirectory containing one file per day.
+
+    service : jwst.lib.engdb_tools.ENGDB_Service
+        Service used to query the EDB. Any object with the same
+        ``get_meta`` and ``get_values`` methods can be used. A service
+        that is not thread-safe must be wrapped in a
+        ``ThreadLocalService`` if the cache is used from several
+        threads.
+
+    settle_time : float
+        Queried intervals are only recorded as complete up to this
+        many seconds before the time of the query
+
+    max_retries : int
+        Number of times a request that fails with a transient error
+        is retried
+
+    retry_backoff : float
+        Number of seconds to wait before the first retry
+
+    retention : float
+        Cache files that have not been written for this many seconds
+        are removed
+
+    recent_ttl : float
+        Number of seconds for which queried intervals within the
+        settle time are treated as queried
+    """
+    def __init__(self, cache_dir, service, settle_time=CACHE_SETTLE_TIME, metadata_ttl=METADATA_TTL,
+                 request_interval=REQUEST_INTERVAL, max_retries=MAX_RETRIES, retry_backoff=RETRY_BACKOFF,
+                 retention=CACHE_RETENTION, recent_ttl=RECENT_COVERAGE_TTL):
+        """Initialize the cache.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Directory containing the cache. It is created if necessary.
+
+        service : jwst.lib.engdb_tools.ENGDB_Service
+            Service used to query the EDB
+
+        settle_time : float
+            Queried intervals are only recorded as complete up to this
+            many seconds before the time of the query
+
+        metadata_ttl : float
+            Number of seconds for which mnemonic metadata are kept in
+            memory
+
+        request_interval : float
+            Minimum number of seconds between the starts of requests
+            to the EDB
+
+        max_retries : int
+            Number of times a request that fails with a transient error
+            is retried
+
+        retry_backoff : float
+            Number of seconds to wait before the first retry
+
+        retention : float
+            Cache files that have not been written for this many
+            seconds are removed
+
+        recent_ttl : float
+            Number of seconds for which queried intervals within the
+            settle time are treated as queried
+        """
+        self.cache_dir = cache_dir
+        self.service = service
+        self.settle_time = settle_time
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retention = retention
+        self.recent_ttl = recent_ttl
+        self._meta = TTLCache(metadata_ttl)
+        self._rate_limiter = RateLimiter(request_interval)
+        self._lock = threading.Lock()
+        self._next_prune = 0.
+        self._recent = {}
+        self._recent_lock = threading.Lock()
+
+    def day_file(self, mnemonic_identifier, day):
+        """Return the name of the file holding a day of data.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        day : int
+            Number of days since the Unix epoch
+
+        Returns
+        -------
+        filename : str
+            Name, including path, of the file
+        """
+        return os.path.join(self.cache_dir, mnemonic_identifier, f'{np.datetime64(day, "D")}.npz')
+
+    def fetch(self, mnemonic_identifier, start, end):
+        """Query the EDB for the values in a time interval, including
+        the bracketing values, and add them to the cache.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        start : float
+            Start of the interval, in seconds since the Unix epoch
+
+        end : float
+            End of the interval, in seconds since the Unix epoch
+
+        Returns
+        -------
+        times : numpy.ndarray
+            Times of the values, in seconds since the Unix epoch
+
+        values : numpy.ndarray
+            Values of the mnemonic
+        """
+        query_time = time.time()
+        times, values = self.query(mnemonic_identifier, start, end, include_bracket_values=True)
+
+        covered_end = min(end, query_time - self.settle_time)
+        coverage = [(start, covered_end)] if covered_end >= start else []
+        try:
+            self.store(mnemonic_identifier, times, values, coverage)
+        except OSError as error:
+            logging.warning(f'Unable to add the values of {mnemonic_identifier} to the telemetry cache: {error}')
+            return times, values
+
+        # The rest of the interval is only treated as queried for a while
+        if end > covered_end:
+            with self._recent_lock:
+                self._recent.setdefault(mnemonic_identifier, []).append((max(start, covered_end), end, query_time))
+
+        return times, values
+
+    def find_neighbor(self, mnemonic_identifier, unix_time, direction):
+        """Find the cached value immediately preceding or following
+        the given time.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        unix_time : float
+            Time, in seconds since the Unix epoch
+
+        direction : int
+            -1 to find the preceding value, 1 to find the following
+            value
+
+        Returns
+        -------
+        times : numpy.ndarray
+            Time of the value, or an empty array if there is none
+
+        values : numpy.ndarray
+            The value, or an empty array if there is none
+        """
+        day = day_number(unix_time)
+        days = self.list_days(mnemonic_identifier)
+        if direction < 0:
+            days = [d for d in reversed(days) if d <= day]
+        else:
+            days = [d for d in days if d >= day]
+
+        for d in days:
+            times, values, _ = self.load_day(mnemonic_identifier, d)
+            if direction < 0:
+                index = np.searchsorted(times, unix_time, side='left') - 1
+            else:
+                index = np.searchsorted(times, unix_time, side='right')
+            if 0 <= index < len(times):
+                return times[index:index + 1], values[index:index + 1]
+        return np.array([]), np.array([])
+
+    def get_meta(self, mnemonic_identifier):
+        """Return the EDB metadata of a mnemonic, from memory if they
+        were retrieved less than ``METADATA_TTL`` seconds ago.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        Returns
+        -------
+        meta : dict
+            Metadata returned by the EDB
+        """
+        return self._meta.lookup(mnemonic_identifier, lambda: self.request(self.service.get_meta, mnemonic_identifier))
+
+    def get_values(self, mnemonic_identifier, start_time, end_time, include_bracket_values=False):
+        """Return the values of a mnemonic within a time range. Only the
+        parts of the range that are not already cached are queried
+        from the EDB. Queried values are returned even if they could
+        not be added to the cache.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        start_time : astropy.time.Time or datetime.datetime
+            Start time
+
+        end_time : astropy.time.Time or datetime.datetime
+            End time
+
+        include_bracket_values : bool
+            If ``True``, also return the values preceding the start
+            time and following the end time
+
+        Returns
+        -------
+        times : numpy.ndarray
+            Times of the values, in seconds since the Unix epoch
+
+        values : numpy.ndarray
+            Values of the mnemonic
+        """
+        start = to_unix(start_time)
+        end = to_unix(end_time)
+
+        # Queried values come first, so that they replace cached values
+        # at the same times
+        time_list, value_list = [], []
+        for interval_start, interval_end in self.uncovered_intervals(mnemonic_identifier, start, end):
+            times, values = self.fetch(mnemonic_identifier, interval_start, interval_end)
+            time_list.append(times)
+            value_list.append(values)
+
+        for day in range(day_number(start), day_number(end) + 1):
+            times, values, _ = self.load_day(mnemonic_identifier, day)
+            time_list.append(times)
+            value_list.append(values)
+
+        if include_bracket_values:
+            for unix_time, direction in [(start, -1), (end, 1)]:
+                times, values = self.find_neighbor(mnemonic_identifier, unix_time, direction)
+                time_list.append(times)
+                value_list.append(values)
+
+        all_times, index = np.unique(concatenate(time_list), return_index=True)
+        all_values = concatenate(value_list)[index]
+        if all_values.dtype == object:
+            all_values = all_values.astype(str)
+
+        selected = (all_times >= start) & (all_times <= end)
+        if include_bracket_values:
+            selected[np.flatnonzero(all_times < start)[-1:]] = True
+            selected[np.flatnonzero(all_times > end)[:1]] = True
+        return all_times[selected], all_values[selected]
+
+    def list_days(self, mnemonic_identifier):
+        """Return the days for which a mnemonic has a cache file.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        Returns
+        -------
+        days : list
+            Sorted numbers of days since the Unix epoch
+        """
+        try:
+            filenames = os.listdir(os.path.join(self.cache_dir, mnemonic_identifier))
+        except FileNotFoundError:
+            return []
+        return sorted(int(np.datetime64(filename[:10], 'D').astype(int)) for filename in filenames
+                      if filename.endswith('.npz'))
+
+    def load_day(self, mnemonic_identifier, day):
+        """Read a day of cached data.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        day : int
+            Number of days since the Unix epoch
+
+        Returns
+        -------
+        times : numpy.ndarray
+            Sorted times of the values, in seconds since the Unix epoch
+
+        values : numpy.ndarray
+            Values of the mnemonic
+
+        coverage : numpy.ndarray
+            ``(N, 2)`` array of the start and end times of the intervals
+            of the day that have been queried
+        """
+        try:
+            with np.load(self.day_file(mnemonic_identifier, day), allow_pickle=False) as cached:
+                return cached['times'], cached['values'], cached['coverage']
+        except FileNotFoundError:
+            return np.array([]), np.array([]), np.zeros((0, 2))
+
+    def prune(self):
+        """Remove cache files that have not been written for more than
+        ``retention`` seconds.
+
+        Returns
+        -------
+        n_removed : int
+            Number of files removed
+        """
+        oldest = time.time() - self.retention
+        n_removed = 0
+        try:
+            mnemonic_dirs = [entry.path for entry in os.scandir(self.cache_dir) if entry.is_dir()]
+        except FileNotFoundError:
+            return n_removed
+
+        for mnemonic_dir in mnemonic_dirs:
+            for entry in os.scandir(mnemonic_dir):
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < oldest:
+                        os.remove(entry.path)
+                        n_removed += 1
+                except OSError:
+                    # Removed by another process in the meantime, or
+                    # owned by another user
+                    continue
+        return n_removed
+
+    def query(self, mnemonic_identifier, start, end, include_bracket_values=False):
+        """Query the EDB for the values in a time interval, without
+        using the cache.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        start : float
+            Start of the interval, in seconds since the Unix epoch
+
+        end : float
+            End of the interval, in seconds since the Unix epoch
+
+        include_bracket_values : bool
+            If ``True``, also return the values preceding the start
+            time and following the end time
+
+        Returns
+        -------
+        times : numpy.ndarray
+            Times of the values, in seconds since the Unix epoch
+
+        values : numpy.ndarray
+            Values of the mnemonic
+        """
+        data = self.request(self.service.get_values, mnemonic_identifier, unix_to_time(start), unix_to_time(end),
+                            include_obstime=True, include_bracket_values=include_bracket_values)
+        if len(data) == 0:
+            return np.array([]), np.array([])
+
+        times = np.atleast_1d(Time([row.obstime for row in data]).unix)
+        values = np.array([row.value for row in data])
+        return times, values
+
+    def request(self, method, *args, **kwargs):
+        """Call a method of the service, waiting as needed to keep
+        requests at least ``request_interval`` seconds apart, and
+        retrying after transient errors.
+
+        Parameters
+        ----------
+        method : callable
+            Method of the service
+
+        *args, **kwargs
+            Arguments passed to the method
+
+        Returns
+        -------
+        result : object
+            Value returned by the method
+        """
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.wait()
+            try:
+                return method(*args, **kwargs)
+            except Exception as error:
+                if attempt == self.max_retries or not is_transient_error(error):
+                    raise
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def recent_coverage(self, mnemonic_identifier):
+        """Return the intervals within the settle time that were queried
+        less than ``recent_ttl`` seconds ago.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        Returns
+        -------
+        intervals : list
+            ``(start, end)`` tuples of the queried intervals
+        """
+        oldest = time.time() - self.recent_ttl
+        with self._recent_lock:
+            recent = [interval for interval in self._recent.get(mnemonic_identifier, []) if interval[2] >= oldest]
+            self._recent[mnemonic_identifier] = recent
+        return [(start, end) for start, end, _ in recent]
+
+    def store(self, mnemonic_identifier, times, values, coverage):
+        """Merge values and queried intervals into the cache.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        times : numpy.ndarray
+            Times of the values, in seconds since the Unix epoch
+
+        values : numpy.ndarray
+            Values of the mnemonic
+
+        coverage : list
+            ``(start, end)`` tuples of the queried intervals
+
+        Raises
+        ------
+        OSError
+            If the cache cannot be written
+        """
+        # Split the values and queried intervals by day
+        new_values = {}
+        point_days = np.floor(times / SECONDS_PER_DAY).astype(int)
+        for day in np.unique(point_days):
+            new_values[int(day)] = (times[point_days == day], values[point_days == day])
+
+        new_coverage = {}
+        for start, end in coverage:
+            for day in range(day_number(start), day_number(end) + 1):
+                day_start = day * SECONDS_PER_DAY
+                day_end = day_start + SECONDS_PER_DAY
+                new_coverage.setdefault(day, []).append((max(start, day_start), min(end, day_end)))
+
+        mnemonic_dir = os.path.join(self.cache_dir, mnemonic_identifier)
+        if not os.path.isdir(mnemonic_dir):
+            os.makedirs(mnemonic_dir, exist_ok=True)
+            permissions.set_permissions(self.cache_dir)
+            permissions.set_permissions(mnemonic_dir)
+
+        with self._lock:
+            if time.time() >= self._next_prune:
+                self._next_prune = time.time() + PRUNE_INTERVAL
+                self.prune()
+
+            for day in sorted(set(new_values) | set(new_coverage)):
+                times, values, day_coverage = self.load_day(mnemonic_identifier, day)
+
+                # Newly queried values replace cached values at the same times
+                add_times, add_values = new_values.get(day, (np.array([]), np.array([])))
+                all_times = concatenate([add_times, times])
+                all_values = concatenate([add_values, values])
+                all_times, index = np.unique(all_times, return_index=True)
+                all_values = all_values[index]
+                if all_values.dtype == object:
+                    all_values = all_values.astype(str)
+
+                intervals = [tuple(interval) for interval in day_coverage] + new_coverage.get(day, [])
+                all_coverage = np.array(merge_intervals(intervals), dtype=float).reshape(-1, 2)
+
+                # Write to a temporary file and rename it, so that readers
+                # never see a partly written file
+                filename = self.day_file(mnemonic_identifier, day)
+                handle, temp_filename = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+                try:
+                    with os.fdopen(handle, 'wb') as temp_file:
+                        np.savez(temp_file, times=all_times, values=all_values, coverage=all_coverage)
+                    os.replace(temp_filename, filename)
+                except OSError:
+                    os.remove(temp_filename)
+                    raise
+                permissions.set_permissions(filename)
+
+    def uncovered_intervals(self, mnemonic_identifier, start, end):
+        """Find the parts of a time range that have not been queried.
+
+        Parameters
+        ----------
+        mnemonic_identifier : str
+            Telemetry mnemonic identifier
+
+        start : float
+            Start of the range, in seconds since the Unix epoch
+
+        end : float
+            End of the range, in seconds since the Unix epoch
+
+        Returns
+        -------
+        intervals : list
+            ``(start, end)`` tuples of the parts of the range that have
+            not been queried
+        """
+        intervals = self.recent_coverage(mnemonic_identifier)
+        for day in range(day_number(start), day_number(end) + 1):
+            intervals.extend(tuple(interval) for interval in self.load_day(mnemonic_identifier, day)[2])
+
+        gaps = []
+        cursor = start
+        covered = False
+        for interval_start, interval_end in merge_intervals(intervals):
+            if interval_end < cursor:
+                continue
+            if interval_start > end:
+                break
+            if interval_start > cursor:
+                gaps.append((cursor, interval_start))
+            covered = True
+            cursor = max(cursor, interval_end)
+        if cursor < end or not covered:
+            gaps.append((cursor, end))
+        return gaps
+
+
+def concatenate(arrays):
+    """Concatenate arrays, ignoring empty arrays so that their type does
+    not affect the type of the result.
+
+    Parameters
+    ----------
+    arrays : list
+        List of 1D ``numpy`` arrays
+
+    Returns
+    -------
+    result : numpy.ndarray
+        Concatenated array
+    """
+    arrays = [array for array in arrays if len(array) > 0]
+    if len(arrays) == 0:
+        return np.array([])
+    return np.concatenate(arrays)
+
+
+def day_number(unix_time):
+    """Return the number of whole days between the Unix epoch and the
+    given time.
+
+    Parameters
+    ----------
+    unix_time : float
+        Time, in seconds since the Unix epoch
+
+    Returns
+    -------
+    day : int
+        Number of days
+    """
+    return int(np.floor(unix_time / SECONDS_PER_DAY))
+
+
+def is_transient_error(error):
+    """Determine whether a failed request may succeed if it is retried.
+
+    Parameters
+    ----------
+    error : Exception
+        Error raised by the request
+
+    Returns
+    -------
+    transient : bool
+        ``True`` for connection errors, timeouts, and HTTP errors with
+        a status code in ``TRANSIENT_STATUS_CODES``
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching intervals.
+
+    Parameters
+    ----------
+    intervals : list
+        ``(start, end)`` tuples
+
+    Returns
+    -------
+    merged : list
+        Sorted, non-overlapping ``(start, end)`` tuples
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if len(merged) > 0 and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def split_by_day(intervals):
+    """Merge intervals, and split the result at the boundaries of UTC
+    days, so that each interval lies within a single cache file.
+
+    Parameters
+    ----------
+    intervals : list
+        ``(start, end)`` tuples, in seconds since the Unix epoch
+
+    Returns
+    -------
+    split : list
+        Sorted, non-overlapping ``(start, end)`` tuples
+    """
+    split = []
+    for start, end in merge_intervals(intervals):
+        for day in range(day_number(start), day_number(end) + 1):
+            day_start = day * SECONDS_PER_DAY
+            piece = (max(start, day_start), min(end, day_start + SECONDS_PER_DAY))
+
+            # An interval ending at midnight has nothing in the next day
+            if piece[0] < piece[1] or start == end:
+                split.append(piece)
+    return split
+
+
+def to_unix(time_value):
+    """Convert a time to seconds since the Unix epoch. Datetimes without
+    a time zone are assumed to be in UTC.
+
+    Parameters
+    ----------
+    time_value : astropy.time.Time or datetime.datetime
+        Time to convert
+
+    Returns
+    -------
+    unix_time : float
+        Seconds since the Unix epoch
+    """
+    if isinstance(time_value, Time):
+        return float(time_value.unix)
+    if time_value.tzinfo is None:
+        time_value = time_value.replace(tzinfo=timezone.utc)
+    return time_value.timestamp()
+
+
+def unix_to_datetime(unix_times):
+    """Convert seconds since the Unix epoch to UTC datetimes, rounded
+    to the nearest microsecond.
+
+    Parameters
+    ----------
+    unix_times : numpy.ndarray
+        Seconds since the Unix epoch
+
+    Returns
+    -------
+    dates : numpy.ndarray
+        ``datetime64[us]`` array of the times
+    """
+    return np.round(np.asarray(unix_times, dtype=float) * 1e6).astype(np.int64).astype('datetime64[us]')
+
+
+def unix_to_time(unix_time):
+    """Convert seconds since the Unix epoch to an ``astropy`` ``Time``.
+
+    Parameters
+    ----------
+    unix_time : float
+        Seconds since the Unix epoch
+
+    Returns
+    -------
+    time_value : astropy.time.Time
+        The time, in ISO format
+    """
+    time_value = Time(unix_time, format='unix', scale='utc')
+    time_value.format = 'iso'
+    return time_value
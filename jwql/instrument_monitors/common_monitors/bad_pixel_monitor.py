@@ -391,6 +391,9 @@ class BadPixels():
 
     def __init__(self):
         """Initialize an instance of the ``BadPixels`` class."""
+        # Linear indexes of previously found bad pixels, keyed by
+        # (detector, pixel_type)
+        self.existing_badpix = {}
 
     def add_bad_pix(self, coordinates, pixel_type, files, obs_start_time, obs_mid_time, obs_end_time, baseline_file):
         """Add a set of bad pixels to the bad pixel database table
@@ -438,6 +441,9 @@ class BadPixels():
         with engine.begin() as connection:
             connection.execute(self.pixel_table.__table__.insert(), entry)
 
+        # The cached list of existing bad pixels is now out of date
+        self.existing_badpix.pop((self.detector, pixel_type), None)
+
     def filter_query_results(self, results, datatype):
         """Filter MAST query results. For input flats, keep only those
         with the most common filter/pupil/grating combination. For both
@@ -583,30 +589,25 @@ class BadPixels():
         if pixel_type not in ['hot', 'dead', 'noisy']:
             raise ValueError('Unrecognized bad pixel type: {}'.format(pixel_type))
 
-        db_entries = session.query(self.pixel_table) \
-            .filter(self.pixel_table.type == pixel_type) \
-            .filter(self.pixel_table.detector == self.detector) \
-            .all()
+        key = (self.detector, pixel_type)
+        if key not in self.existing_badpix:
+            db_entries = session.query(self.pixel_table) \
+                .filter(self.pixel_table.type == pixel_type) \
+                .filter(self.pixel_table.detector == self.detector) \
+                .all()
 
-        already_found = []
-        if len(db_entries) != 0:
+            found_x = []
+            found_y = []
             for _row in db_entries:
-                x_coords = _row.x_coord
-                y_coords = _row.y_coord
-                for x, y in zip(x_coords, y_coords):
-                    already_found.append((x, y))
+                found_x.extend(_row.x_coord)
+                found_y.extend(_row.y_coord)
+            self.existing_badpix[key] = monitor_utils.bad_pixel_index(found_x, found_y)
+
+            session.close()
 
         # Check to see if each pixel already appears in the database for
         # the given bad pixel type
-        new_pixels_x = []
-        new_pixels_y = []
-        for x, y in zip(badpix[0], badpix[1]):
-            pixel = (x, y)
-            if pixel not in already_found:
-                new_pixels_x.append(x)
-                new_pixels_y.append(y)
-
-        session.close()
+        new_pixels_x, new_pixels_y = monitor_utils.exclude_existing_pixels(badpix, self.existing_badpix[key])
 
         return (new_pixels_x, new_pixels_y)
 
@@ -172,16 +172,20 @@ class CosmicRay:
 
         Computes a list of magnitudes using the coordinate of the
         detected jump compared to the magnitude of the same pixel in
-        the group prior to the jump.
+        the group prior to the jump. All jumps are handled at once using
+        array indexing, in the same way as ``magnitude`` does for a single
+        jump.
 
         Parameters:
         ----------
 
-        jump_locs: list
-            List of coordinates to a pixel marked with a jump.
+        jump_locs: numpy.ndarray
+            Array of coordinates to pixels marked with a jump, with one
+            row per jump (e.g. the output of ``get_jump_locs``). A list
+            of coordinate tuples is also accepted.
 
-        jump_locs_pre: list
-            List of matching coordinates one group before jump_locs.
+        jump_locs_pre: numpy.ndarray
+            Array of matching coordinates one group before jump_locs.
 
         rateints: ndarray
             Array in DN/s.
@@ -200,23 +204,40 @@ class CosmicRay:
             cosmic rays of each magnitude.
 
         """
-        mag_bins = np.arange(65536 * 2 + 1, dtype=int) - 65536
-        mags = np.zeros_like(mag_bins, dtype=int)
+        num_bins = 65536 * 2 + 1
         outliers = []
-        num_outliers = 0
-        total = 0
-
-        for coord, coord_gb in zip(jump_locs, jump_locs_pre):
-            total += 1
-            mag = self.magnitude(coord, coord_gb, rateints, jump_data, jump_head)
-            if abs(mag) > 65535:
-                num_outliers += 1
-                outliers.append(int(mag))
-            else:
-                mags[mag_bins[mag]] += 1
+        total = len(jump_locs)
+
+        if total == 0:
+            logging.info("0 of 0 cosmic rays are beyond bin boundaries")
+            return [0] * num_bins, outliers
+
+        coords = tuple(np.asarray(jump_locs, dtype=int).T)
+        coords_gb = tuple(np.asarray(jump_locs_pre, dtype=int).T)
+        grouptime = jump_head['TGROUP']
+
+        # The rate correction is done in float64, as it is when calculating
+        # the magnitude of a single jump using scalar values
+        if self.nints == 1:
+            rate = np.asarray(rateints[coords[-2], coords[-1]], dtype=np.float64)
+            cr_mags = jump_data[0][coords[:3]] - jump_data[0][coords_gb[:3]] - rate * grouptime
+        else:
+            rate = np.asarray(rateints[coords[0], coords[-2], coords[-1]], dtype=np.float64)
+            cr_mags = jump_data[coords] - jump_data[coords_gb] - rate * grouptime
+        cr_mags = np.round(np.nan_to_num(cr_mags))
+
+        out_of_range = np.abs(cr_mags) > 65535
+        outliers = [int(mag) for mag in cr_mags[out_of_range]]
+        num_outliers = len(outliers)
+
+        # Magnitude m is counted in bin m + 65537. This matches the
+        # original indexing of mags[mag_bins[m]], where
+        # mag_bins = np.arange(num_bins) - 65536
+        bin_index = cr_mags[~out_of_range].astype(int) + 65537
+        mags = np.bincount(bin_index, minlength=num_bins)
 
         logging.info("{} of {} cosmic rays are beyond bin boundaries".format(num_outliers, total))
-        return [int(m) for m in mags], outliers
+        return mags.tolist(), outliers
 
     def file_exists_in_database(self, filename):
         """Checks if an entry for filename exists in the cosmic ray stats
@@ -331,25 +352,15 @@ class CosmicRay:
 
         Returns:
         -------
-        jump_locs: list
-            List of coordinates to a pixel marked with a jump.
+        jump_locs: numpy.ndarray
+            Array of coordinates to pixels marked with a jump, with one
+            row per jump and one column per dimension of ``dq``.
         """
+        if dq.ndim not in [3, 4]:
+            logging.error(f'dq has {dq.ndim} dimensions. We expect it to have 3 or 4.')
+            return np.empty((0, dq.ndim), dtype=int)
 
-        temp = np.where(dq & dqflags.pixel["JUMP_DET"] > 0)
-
-        jump_locs = []
-
-        if len(temp) == 4:
-            for i in range(len(temp[0])):
-                jump_locs.append((temp[0][i], temp[1][i], temp[2][i], temp[3][i]))
-        elif len(temp) == 3:
-            for i in range(len(temp[0])):
-                jump_locs.append((temp[0][i], temp[1][i], temp[2][i]))
-        elif len(temp) == 0:
-            # This is the (unlikely) case where the data contain no flagged CRs
-            pass
-        else:
-            logging.error(f'dq has {len(temp)} dimensions. We expect it to have 3 or 4.')
+        jump_locs = np.argwhere(dq & dqflags.pixel["JUMP_DET"] > 0)
 
         return jump_locs
 
@@ -375,34 +386,34 @@ class CosmicRay:
         return data
 
     def group_before(self, jump_locs):
-        """Creates a list of coordinates one group before given jump
+        """Creates an array of coordinates one group before given jump
         coordinates.
 
         Parameters:
         ----------
-        jump_locs: list
-            List of coordinates to a pixel marked with a jump.
+        jump_locs: numpy.ndarray
+            Array of coordinates to pixels marked with a jump, with one
+            row per jump. A list of coordinate tuples is also accepted.
 
         Returns:
         -------
-        jump_locs_pre: list
-            List of matching coordinates one group before jump_locs.
+        jump_locs_pre: numpy.ndarray
+            Array of matching coordinates one group before jump_locs.
         """
-
-        jump_locs_pre = []
+        jump_locs = np.asarray(jump_locs, dtype=int)
 
         if len(jump_locs) == 0:
             logging.error("No entries in jump_locs!")
-            return []
-
-        if len(jump_locs[0]) == 4:
-            for coord in jump_locs:
-                jump_locs_pre.append((coord[0], coord[1] - 1, coord[2], coord[3]))
-        elif len(jump_locs[0]) == 3:
-            for coord in jump_locs:
-                jump_locs_pre.append((coord[0] - 1, coord[1], coord[2]))
+            return jump_locs.copy()
+
+        jump_locs_pre = jump_locs.copy()
+        if jump_locs.shape[1] in [3, 4]:
+            # The group axis is the third from last for both
+            # (group, y, x) and (integration, group, y, x) coordinates
+            jump_locs_pre[:, -3] -= 1
         else:
-            logging.error(f'jump_locs has {len(jump_locs[0])} dimensions. Expecting 3 or 4.')
+            logging.error(f'jump_locs has {jump_locs.shape[1]} dimensions. Expecting 3 or 4.')
+            jump_locs_pre = jump_locs_pre[:0]
 
         return jump_locs_pre
 
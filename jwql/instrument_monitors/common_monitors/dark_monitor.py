@@ -179,6 +179,9 @@ class Dark():
 
     def __init__(self):
         """Initialize an instance of the ``Dark`` class."""
+        # Linear indexes of previously found bad pixels, keyed by
+        # (detector, pixel_type)
+        self.existing_badpix = {}
 
     def add_bad_pix(self, coordinates, pixel_type, files, mean_filename, baseline_filename,
                     observation_start_time, observation_mid_time, observation_end_time):
@@ -238,6 +241,9 @@ class Dark():
         entry = self.pixel_table(**entry)
         entry.save()
 
+        # The cached list of existing bad pixels is now out of date
+        self.existing_badpix.pop((self.detector, pixel_type), None)
+
     def create_mean_slope_figure(self, image, num_files, hotxy=None, deadxy=None, noisyxy=None, baseline_file=None,
                                  min_time='', max_time=''):
         """Create and save a png containing the mean dark slope image,
@@ -415,35 +421,29 @@ class Dark():
         if pixel_type not in ['hot', 'dead', 'noisy']:
             raise ValueError('Unrecognized bad pixel type: {}'.format(pixel_type))
 
-        logging.info("\t\tRunning database query")
+        key = (self.detector, pixel_type)
+        if key not in self.existing_badpix:
+            logging.info("\t\tRunning database query")
 
-        filters = {"type__iexact": pixel_type,
-                   "detector__iexact": self.detector
-                   }
-        records = self.pixel_table.objects.filter(**filters).all()
+            filters = {"type__iexact": pixel_type,
+                       "detector__iexact": self.detector
+                       }
+            records = self.pixel_table.objects.filter(**filters).all()
 
-        already_found = []
-        if records is not None:
-            for _row in records:
-                x_coords = _row.x_coord
-                y_coords = _row.y_coord
-                for x, y in zip(x_coords, y_coords):
-                    already_found.append((x, y))
-        found_x = np.array([x[0] for x in already_found])
-        found_y = np.array([x[1] for x in already_found])
+            found_x = []
+            found_y = []
+            if records is not None:
+                for _row in records:
+                    found_x.extend(_row.x_coord)
+                    found_y.extend(_row.y_coord)
+            self.existing_badpix[key] = monitor_utils.bad_pixel_index(found_x, found_y)
 
         msg = "\t\tChecking pixels against list of {} existing {} pixels"
-        logging.info(msg.format(len(found_x), pixel_type))
+        logging.info(msg.format(len(self.existing_badpix[key]), pixel_type))
+
         # Check to see if each pixel already appears in the database for
         # the given bad pixel type
-        new_pixels_x = []
-        new_pixels_y = []
-        for x, y in zip(badpix[0], badpix[1]):
-            ind_x = np.where(found_x == x)
-            ind_y = np.where(found_y == y)
-            if len(np.intersect1d(ind_x[0], ind_y[0])) == 0:
-                new_pixels_x.append(x)
-                new_pixels_y.append(y)
+        new_pixels_x, new_pixels_y = monitor_utils.exclude_existing_pixels(badpix, self.existing_badpix[key])
 
         logging.info("\t\tKeeping {} {} pixels".format(len(new_pixels_x), pixel_type))
 
@@ -738,7 +738,11 @@ class Dark():
         try:
             # Read in all slope images and create a stack of ints (from rateints files)
             # or mean ints (from rate files)
-            slope_image_stack, slope_exptimes = pipeline_tools.image_stack(slope_files, skipped_initial_ints=self.skipped_initial_ints)
+            # The stack is backed by a temporary file in the working directory
+            # in order to keep memory use down for large numbers of files
+            slope_image_stack, slope_exptimes = pipeline_tools.image_stack(slope_files,
+                                                                           skipped_initial_ints=self.skipped_initial_ints,
+                                                                           scratch_dir=self.working_data_dir)
             logging.info(f'Shape of slope image stack: {slope_image_stack.shape}')
 
             # Calculate a mean slope image from the inputs
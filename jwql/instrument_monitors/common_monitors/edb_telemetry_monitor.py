@@ -365,6 +365,7 @@ Use
 """
 import argparse
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from copy import deepcopy
 import datetime
 import json
@@ -903,6 +904,103 @@ class EdbMnemonicMonitor():
 
         return mnem_data
 
+    def find_query_times(self, mnemonic, telem_type, plot_start, plot_end):
+        """Determine the times over which the EDB must be queried for a single mnemonic, based on
+        the telemetry type and the end time of the previous query stored in the JWQL database.
+
+        Parameters
+        ----------
+        mnemonic : dict
+            Dictionary of information about the mnemonic to be processed. Dictionary
+            as read in from the json file of mnemonics to be monitored.
+
+        telem_type : str
+            Type of telemetry, e.g. "daily_means", "all"
+
+        plot_start : datetime.datetime
+            Starting time for the output plot
+
+        plot_end : datetime.datetime
+            Ending time for the output plot
+
+        Returns
+        -------
+        query_plan : dict
+            Keys are "usename" (the key of ``mnemonic`` to use for the mnemonic's identity),
+            "product_identifier", "starttime", "create_new_history_entry", "query_start_times",
+            and "query_end_times"
+        """
+        logging.info(f'Finding query times for {mnemonic["name"]}')
+        create_new_history_entry = True
+
+        # Only two types of plots are currently supported. Plotting the data in the EdbMnemonic
+        # directly, and plotting it as the product with a second EdbMnemonic
+        if '*' not in mnemonic["plot_data"] and 'nominal' not in mnemonic["plot_data"]:
+            raise NotImplementedError(('The plot_data entry in the mnemonic dictionary can currently only '
+                                       'be "nominal" or "*<MNEMONIC_NAME>", indicating that the current '
+                                       'mnemonic should be plotted as the product of the mnemonic*<MNEMONIC_NAME>. '
+                                       'e.g. for a mnemonic that reports current, plot the data as a power by '
+                                       'multiplying with a mnemonic that reports voltage. No other mnemonic '
+                                       'combination schemes have been implemented.'))
+
+        # A mnemonic that is being monitored in more than one way will have a secondary name to
+        # use for the database, stored in the "database_id" key.
+        usename = 'name'
+        if 'database_id' in mnemonic:
+            usename = 'database_id'
+
+        # Construct the mnemonic identifer to be used for database entries and plot titles
+        if '*' in mnemonic["plot_data"]:
+            # Define the mnemonic identifier to be <mnemonic_name_1>*<mnemonic_name_2>
+            term2 = mnemonic["plot_data"].split(',')[0]
+            product_identifier = f'{mnemonic[usename]}{term2}'
+        else:
+            product_identifier = mnemonic[usename]
+
+        if telem_type != 'all':
+            # Find the end time of the previous query from the database.
+            most_recent_search = self.most_recent_search(product_identifier)
+
+            # For daily_means mnemonics, we force the search to always start at noon, and
+            # have a 1 day cadence
+            if telem_type == 'daily_means':
+                most_recent_search = datetime.datetime.combine(most_recent_search.date(), datetime.time(hour=12))
+
+            logging.info(f'Most recent search is {most_recent_search}.')
+            logging.info(f'Query cadence is {self.query_cadence}')
+
+            if plot_end > (most_recent_search + self.query_cadence):
+                # Here we need to query the EDB to cover the entire plot range
+                logging.info("Plot range extends outside the time contained in the JWQLDB. Need to query the EDB.")
+                logging.info(f"Plot_end: {plot_end}")
+                logging.info(f"Most recent search: {most_recent_search}")
+                logging.info(f"Search end: {most_recent_search + self.query_cadence}")
+                starttime = most_recent_search + self.query_cadence
+                logging.info(f"New starttime: {starttime}")
+            else:
+                # Here the entire plot range is before the most recent search,
+                # so all we need to do is query the JWQL database for the data.
+                logging.info(f"Plot time span contained entirely in JWQLDB. No need to query EDB.")
+                create_new_history_entry = False
+                starttime = None
+
+        else:
+            # In the case where telemetry data have no averaging done, we do not store the data
+            # in the JWQL database, in order to save space. So in this case, we will retrieve
+            # all of the data from the EDB directly, from some default start time until the
+            # present day.
+            starttime = plot_start
+            create_new_history_entry = False
+
+        query_start_times, query_end_times = self.generate_query_start_times(starttime)
+        logging.info(f'Query start times: {query_start_times}')
+        logging.info(f'Query end times: {query_end_times}')
+
+        query_plan = {"usename": usename, "product_identifier": product_identifier, "starttime": starttime,
+                      "create_new_history_entry": create_new_history_entry, "query_start_times": query_start_times,
+                      "query_end_times": query_end_times}
+        return query_plan
+
     def generate_query_start_times(self, starting_time):
         """Generate a list of starting and ending query times such that the entire time range
         is covered, but we are only querying the EDB for one day's worth of data at a time.
@@ -1454,6 +1552,32 @@ class EdbMnemonicMonitor():
         logging.info(f'DONE retrieving/filtering/averaging data for {mnemonic_dict["name"]}')
         return all_data
 
+    def prefetch_queries(self, mnemonic, starting_time_list, ending_time_list):
+        """List the EDB queries needed to process a single mnemonic over the given times,
+        including queries for its dependencies and for the mnemonic it is multiplied by.
+
+        Parameters
+        ----------
+        mnemonic : dict
+            Dictionary of information for a single mnemonic. This comes from the json file describing all
+            mnemonics to be monitored
+
+        starting_time_list : list
+            List of datetime values indicating beginning query times
+
+        ending_time_list : list
+            List of datetime values indicating the end time of each query
+
+        Returns
+        -------
+        queries : list
+            ``(mnemonic_name, starttime, endtime)`` tuples
+        """
+        queries = []
+        for name in related_mnemonics(mnemonic):
+            queries.extend((name, starttime, endtime) for starttime, endtime in zip(starting_time_list, ending_time_list))
+        return queries
+
     def run(self, instrument, mnemonic_dict, plot_start=None, plot_end=None):
         """Run the monitor on a single mnemonic.
 
@@ -1489,260 +1613,228 @@ class EdbMnemonicMonitor():
         self._plot_start = plot_start
         self._plot_end = plot_end
 
-        # At the top level, we loop over the different types of telemetry. These types
-        # largely control if/how the data will be averaged.
-        for telemetry_kind in mnemonic_dict:
-            telem_type = telemetry_kind
-            logging.info(f'Working on telemetry_type: {telem_type}')
-
-            # For the combined telemetry types (e.g. "all+daily_mean") break up
-            # into its component parts. Work on the second part (e.g. "daily_mean")
-            # first, and then the "all" part afterwards
-            if telemetry_kind in ALLOWED_COMBINATION_TYPES:
-                telem_type = telemetry_kind.split('+')[1]
-                logging.info(f'Working first on {telem_type}')
-
-            # Figure out the time duration over which the mnemonic should be queried. In
-            # most cases this is just a full day. In some cases ("daily_average" telem_type)
-            # the query will span a shorter time since the mnemonic won't change much over
-            # a full day.
-            self.query_duration = utils.get_query_duration(telem_type)
-
-            # Determine which database tables are needed based on instrument. A telemetry
-            # type of "all" indicates that no time-averaging is done, and therefore the
-            # data are not stored in the JWQL database (for database table size reasons).
-            if telem_type != 'all':
-                self.identify_tables(instrument, telem_type)
-
-            # Work on one mnemonic at a time
-            for mnemonic in mnemonic_dict[telemetry_kind]:
-                logging.info(f'Working on {mnemonic["name"]}')
-                create_new_history_entry = True
-
-                # Only two types of plots are currently supported. Plotting the data in the EdbMnemonic
-                # directly, and plotting it as the product with a second EdbMnemonic
-                if '*' not in mnemonic["plot_data"] and 'nominal' not in mnemonic["plot_data"]:
-                    raise NotImplementedError(('The plot_data entry in the mnemonic dictionary can currently only '
-                                               'be "nominal" or "*<MNEMONIC_NAME>", indicating that the current '
-                                               'mnemonic should be plotted as the product of the mnemonic*<MNEMONIC_NAME>. '
-                                               'e.g. for a mnemonic that reports current, plot the data as a power by '
-                                               'multiplying with a mnemonic that reports voltage. No other mnemonic '
-                                               'combination schemes have been implemented.'))
-
-                # A mnemonic that is being monitored in more than one way will have a secondary name to
-                # use for the database, stored in the "database_id" key.
-                self._usename = 'name'
-                if 'database_id' in mnemonic:
-                    self._usename = 'database_id'
-
-                # Construct the mnemonic identifer to be used for database entries and plot titles
-                if '*' in mnemonic["plot_data"]:
-                    # Define the mnemonic identifier to be <mnemonic_name_1>*<mnemonic_name_2>
-                    term2 = mnemonic["plot_data"].split(',')[0]
-                    product_identifier = f'{mnemonic[self._usename]}{term2}'
-                else:
-                    product_identifier = mnemonic[self._usename]
-
-                if telem_type != 'all':
-                    # Find the end time of the previous query from the database.
-                    most_recent_search = self.most_recent_search(product_identifier)
-
-                    # For daily_means mnemonics, we force the search to always start at noon, and
-                    # have a 1 day cadence
-                    if telem_type == 'daily_means':
-                        most_recent_search = datetime.datetime.combine(most_recent_search.date(), datetime.time(hour=12))
-
-                    logging.info(f'Most recent search is {most_recent_search}.')
-                    logging.info(f'Query cadence is {self.query_cadence}')
-
-                    if plot_end > (most_recent_search + self.query_cadence):
-                        # Here we need to query the EDB to cover the entire plot range
-                        logging.info("Plot range extends outside the time contained in the JWQLDB. Need to query the EDB.")
-                        logging.info(f"Plot_end: {plot_end}")
-                        logging.info(f"Most recent search: {most_recent_search}")
-                        logging.info(f"Search end: {most_recent_search + self.query_cadence}")
-                        starttime = most_recent_search + self.query_cadence
-                        logging.info(f"New starttime: {starttime}")
-                    else:
-                        # Here the entire plot range is before the most recent search,
-                        # so all we need to do is query the JWQL database for the data.
-                        logging.info(f"Plot time span contained entirely in JWQLDB. No need to query EDB.")
-                        create_new_history_entry = False
-                        starttime = None
-
-                else:
-                    # In the case where telemetry data have no averaging done, we do not store the data
-                    # in the JWQL database, in order to save space. So in this case, we will retrieve
-                    # all of the data from the EDB directly, from some default start time until the
-                    # present day.
-                    starttime = plot_start
-                    create_new_history_entry = False
-
-                query_start_times, query_end_times = self.generate_query_start_times(starttime)
-                logging.info(f'Query start times: {query_start_times}')
-                logging.info(f'Query end times: {query_end_times}')
-
+        # Threads used to retrieve data from the EDB ahead of processing
+        executor = ThreadPoolExecutor(max_workers=ed.EDB_MAX_WORKERS)
+        try:
+            # At the top level, we loop over the different types of telemetry. These types
+            # largely control if/how the data will be averaged.
+            for telemetry_kind in mnemonic_dict:
+                telem_type = telemetry_kind
+                logging.info(f'Working on telemetry_type: {telem_type}')
+
+                # For the combined telemetry types (e.g. "all+daily_mean") break up
+                # into its component parts. Work on the second part (e.g. "daily_mean")
+                # first, and then the "all" part afterwards
+                if telemetry_kind in ALLOWED_COMBINATION_TYPES:
+                    telem_type = telemetry_kind.split('+')[1]
+                    logging.info(f'Working first on {telem_type}')
+
+                # Figure out the time duration over which the mnemonic should be queried. In
+                # most cases this is just a full day. In some cases ("daily_average" telem_type)
+                # the query will span a shorter time since the mnemonic won't change much over
+                # a full day.
+                self.query_duration = utils.get_query_duration(telem_type)
+
+                # Determine which database tables are needed based on instrument. A telemetry
+                # type of "all" indicates that no time-averaging is done, and therefore the
+                # data are not stored in the JWQL database (for database table size reasons).
                 if telem_type != 'all':
-                    if query_start_times is not None:
+                    self.identify_tables(instrument, telem_type)
+
+                # Find the times to query for every mnemonic, and start retrieving the data from the
+                # EDB for all of them, along with the data of their dependencies and of the mnemonics
+                # they are multiplied by. Each mnemonic is then processed as soon as its own data have
+                # arrived, while the data for later mnemonics are still being retrieved.
+                query_plans = []
+                queries = []
+                if telemetry_kind in ALLOWED_COMBINATION_TYPES:
+                    full_query_start_times, full_query_end_times = self.generate_query_start_times(self._plot_start)
+                for mnemonic in mnemonic_dict[telemetry_kind]:
+                    query_plan = self.find_query_times(mnemonic, telem_type, plot_start, plot_end)
+                    query_plans.append(query_plan)
+                    if query_plan["query_start_times"] is not None:
+                        queries.extend(self.prefetch_queries(mnemonic, query_plan["query_start_times"],
+                                                             query_plan["query_end_times"]))
+                    if telemetry_kind in ALLOWED_COMBINATION_TYPES and full_query_start_times is not None:
+                        queries.extend(self.prefetch_queries(mnemonic, full_query_start_times, full_query_end_times))
+                prefetched = ed.prefetch_mnemonics(queries, executor)
+
+                # Work on one mnemonic at a time
+                for mnemonic, query_plan in zip(mnemonic_dict[telemetry_kind], query_plans):
+                    logging.info(f'Working on {mnemonic["name"]}')
+                    wait([future for name in related_mnemonics(mnemonic) for future in prefetched.get(name, [])])
+
+                    self._usename = query_plan["usename"]
+                    product_identifier = query_plan["product_identifier"]
+                    starttime = query_plan["starttime"]
+                    create_new_history_entry = query_plan["create_new_history_entry"]
+                    query_start_times = query_plan["query_start_times"]
+                    query_end_times = query_plan["query_end_times"]
+
+                    if telem_type != 'all':
+                        if query_start_times is not None:
+
+                            # Query the EDB/JWQLDB, filter by dependencies, and perform averaging
+                            new_data = self.multiday_mnemonic_query(mnemonic, query_start_times, query_end_times, telem_type)
 
-                        # Query the EDB/JWQLDB, filter by dependencies, and perform averaging
+                        else:
+                            # In this case, all the data needed are already in the JWQLDB, so return an empty
+                            # EDBMnemonic instance. This will be combined with the data from the JWQLDB later.
+                            info = ed.get_mnemonic_info(mnemonic["name"])
+                            new_data = empty_edb_instance(mnemonic[self._usename], plot_start, plot_end, info=info)
+                            new_data.mnemonic_identifier = product_identifier
+                            logging.info(f'All data needed are already in JWQLDB.')
+                            create_new_history_entry = False
+                    else:
+                        # For data where no averaging is done, all data must be retrieved from EDB. They are not
+                        # stored in the JWQLDB
                         new_data = self.multiday_mnemonic_query(mnemonic, query_start_times, query_end_times, telem_type)
 
-                    else:
-                        # In this case, all the data needed are already in the JWQLDB, so return an empty
-                        # EDBMnemonic instance. This will be combined with the data from the JWQLDB later.
-                        info = ed.get_mnemonic_info(mnemonic["name"])
-                        new_data = empty_edb_instance(mnemonic[self._usename], plot_start, plot_end, info=info)
-                        new_data.mnemonic_identifier = product_identifier
-                        logging.info(f'All data needed are already in JWQLDB.')
-                        create_new_history_entry = False
-                else:
-                    # For data where no averaging is done, all data must be retrieved from EDB. They are not
-                    # stored in the JWQLDB
-                    new_data = self.multiday_mnemonic_query(mnemonic, query_start_times, query_end_times, telem_type)
-
-                # Save the averaged/smoothed data and dates/times to the database, but only for cases where we
-                # are averaging. For cases with no averaging the database would get too large too quickly. In
-                # that case the monitor will re-query the EDB for the entire history each time.
-                if telem_type != "all":
-
-                    # "every_change" data must be treated differently from other types of averaging, since
-                    # those mnemonics have their data separated into collections based on the value of a
-                    # dependency.
-                    if telem_type != 'every_change':
-
-                        # Retrieve the historical data from the database, so that we can add the new data
-                        # to it
-                        historical_data = self.get_history(new_data.mnemonic_identifier, plot_start, plot_end, info=new_data.info,
-                                                           meta=new_data.meta)
-                        ending = starttime
-                        if ending is None:
-                            ending = plot_end
-                        historical_data.requested_end_time = ending
-
-                        logging.info(f'Retrieved data from JWQLDB. Number of data points: {len(historical_data)}')
-
-                        # Add the data newly filtered and averaged data retrieved from the EDB to the JWQLDB
-                        # If no new data were retrieved from the EDB, then there is no need to add an entry to the JWQLDB
-                        if create_new_history_entry:
-                            self.add_new_block_db_entry(new_data, query_start_times[-1])
-                            logging.info('New data added to the JWQLDB.')
+                    # Save the averaged/smoothed data and dates/times to the database, but only for cases where we
+                    # are averaging. For cases with no averaging the database would get too large too quickly. In
+                    # that case the monitor will re-query the EDB for the entire history each time.
+                    if telem_type != "all":
+
+                        # "every_change" data must be treated differently from other types of averaging, since
+                        # those mnemonics have their data separated into collections based on the value of a
+                        # dependency.
+                        if telem_type != 'every_change':
+
+                            # Retrieve the historical data from the database, so that we can add the new data
+                            # to it
+                            historical_data = self.get_history(new_data.mnemonic_identifier, plot_start, plot_end, info=new_data.info,
+                                                               meta=new_data.meta)
+                            ending = starttime
+                            if ending is None:
+                                ending = plot_end
+                            historical_data.requested_end_time = ending
+
+                            logging.info(f'Retrieved data from JWQLDB. Number of data points: {len(historical_data)}')
+
+                            # Add the data newly filtered and averaged data retrieved from the EDB to the JWQLDB
+                            # If no new data were retrieved from the EDB, then there is no need to add an entry to the JWQLDB
+                            if create_new_history_entry:
+                                self.add_new_block_db_entry(new_data, query_start_times[-1])
+                                logging.info('New data added to the JWQLDB.')
+                            else:
+                                logging.info("No new data retrieved from EDB, so no new entry added to JWQLDB")
+
+                            # Now add the new data to the historical data
+                            mnemonic_info = new_data + historical_data
+                            logging.info(f'Combined new data plus historical data contains {len(mnemonic_info)} data points.')
                         else:
-                            logging.info("No new data retrieved from EDB, so no new entry added to JWQLDB")
+                            # "every_change" data is more complex, and requires custom functions
+                            # Retrieve the historical data from the database, so that we can add the new data
+                            # to it
+                            historical_data = self.get_history_every_change(new_data.mnemonic_identifier, plot_start, plot_end)
+                            logging.info(f'Retrieved data from JWQLDB. Number of data points per key:')
+                            for key in historical_data:
+                                logging.info(f'Key: {key}, Num of Points: {len(historical_data[key][0])}')
+                            if historical_data == {}:
+                                logging.info('No historical data')
+
+                            # Before we can add the every-change data to the database, organize it to make it
+                            # easier to access. Note that every_change_data is now a dict rather than an EDBMnemonic instance
+                            every_change_data = organize_every_change(new_data)
+
+                            # Add new data to JWQLDB.
+                            # If no new data were retrieved from the EDB, then there is no need to add an entry to the JWQLDB
+                            if create_new_history_entry:
+                                self.add_new_every_change_db_entry(new_data.mnemonic_identifier, every_change_data, mnemonic['dependency'][0]["name"],
+                                                                   query_start_times[-1])
+                            else:
+                                logging.info("No new data retrieved from EDB, so no new entry added to JWQLDB")
+
+                            # Combine the historical data with the new data from the EDB
+                            for key in every_change_data:
+                                logging.info(f'Key: {key}, Num of Points: {len(every_change_data[key][0])}')
+                            logging.info(f'Total number of points in new_data from the EDB: {len(new_data)}')
+
+                            # Note that the line below will change mnemonic_info into a dictionary
+                            mnemonic_info = add_every_change_history(historical_data, every_change_data)
+
+                            logging.info(f'Combined new data plus historical data. Number of data points per key:')
+                            for key in mnemonic_info:
+                                logging.info(f'Key: {key}, Num of Points: {len(mnemonic_info[key][0])}')
 
-                        # Now add the new data to the historical data
-                        mnemonic_info = new_data + historical_data
-                        logging.info(f'Combined new data plus historical data contains {len(mnemonic_info)} data points.')
                     else:
-                        # "every_change" data is more complex, and requires custom functions
-                        # Retrieve the historical data from the database, so that we can add the new data
-                        # to it
-                        historical_data = self.get_history_every_change(new_data.mnemonic_identifier, plot_start, plot_end)
-                        logging.info(f'Retrieved data from JWQLDB. Number of data points per key:')
-                        for key in historical_data:
-                            logging.info(f'Key: {key}, Num of Points: {len(historical_data[key][0])}')
-                        if historical_data == {}:
-                            logging.info('No historical data')
-
-                        # Before we can add the every-change data to the database, organize it to make it
-                        # easier to access. Note that every_change_data is now a dict rather than an EDBMnemonic instance
-                        every_change_data = organize_every_change(new_data)
-
-                        # Add new data to JWQLDB.
-                        # If no new data were retrieved from the EDB, then there is no need to add an entry to the JWQLDB
-                        if create_new_history_entry:
-                            self.add_new_every_change_db_entry(new_data.mnemonic_identifier, every_change_data, mnemonic['dependency'][0]["name"],
-                                                               query_start_times[-1])
-                        else:
-                            logging.info("No new data retrieved from EDB, so no new entry added to JWQLDB")
-
-                        # Combine the historical data with the new data from the EDB
-                        for key in every_change_data:
-                            logging.info(f'Key: {key}, Num of Points: {len(every_change_data[key][0])}')
-                        logging.info(f'Total number of points in new_data from the EDB: {len(new_data)}')
-
-                        # Note that the line below will change mnemonic_info into a dictionary
-                        mnemonic_info = add_every_change_history(historical_data, every_change_data)
-
-                        logging.info(f'Combined new data plus historical data. Number of data points per key:')
-                        for key in mnemonic_info:
-                            logging.info(f'Key: {key}, Num of Points: {len(mnemonic_info[key][0])}')
+                        mnemonic_info = new_data
 
-                else:
-                    mnemonic_info = new_data
-
-                # For a telemetry_kind that is a combination of all+something, here we work on the "all" part.
-                if telemetry_kind in ALLOWED_COMBINATION_TYPES:
-                    temp_telem_type = "all"
+                    # For a telemetry_kind that is a combination of all+something, here we work on the "all" part.
+                    if telemetry_kind in ALLOWED_COMBINATION_TYPES:
+                        temp_telem_type = "all"
 
-                    # Query the EDB/JWQLDB, filter by dependencies, and perform averaging
-                    full_query_start_times, full_query_end_times = self.generate_query_start_times(self._plot_start)
-                    additional_data = self.multiday_mnemonic_query(mnemonic, full_query_start_times, full_query_end_times, temp_telem_type)
-
-                    # Now arrange the data in a way that makes sense. Place the non-averaged data collected above
-                    # into self.data, and the averaged data into the self.mean and self.median_times attributes
-                    mnemonic_info.mean = mnemonic_info.data["euvalues"].value
-                    mnemonic_info.median_times = mnemonic_info.data["dates"].value
-                    tmp_table = Table()
-                    tmp_table["dates"] = additional_data.data["dates"]
-                    tmp_table["euvalues"] = additional_data.data["euvalues"]
-                    mnemonic_info.data = tmp_table
-
-                # Create plot
-                # If there is a nominal value, or yellow/red limits to be included in the plot, get those here
-                nominal = utils.check_key(mnemonic, "nominal_value")
-                yellow = utils.check_key(mnemonic, "yellow_limits")
-                red = utils.check_key(mnemonic, "red_limits")
-
-                # Make the plot title as useful as possible. Include the description from the input json
-                # file. If there is none, fall back to the description from MAST. If that is also not
-                # present, then the title will be only the mnemonic name.
-                if 'description' in mnemonic:
-                    plot_title = f'{new_data.mnemonic_identifier}: {mnemonic["description"]}'
-                elif 'description' in new_data.info:
-                    plot_title = f'{new_data.mnemonic_identifier}: {new_data.info["description"]}'
-                else:
-                    plot_title = new_data.mnemonic_identifier
-
-                if telemetry_kind == 'every_change':
-                    # For every_change data, the plot is more complex, and we must use the custom
-                    # plot_every_change_data() method. Again, return the figure object without saving it.
-                    figure = plot_every_change_data(mnemonic_info, new_data.mnemonic_identifier, new_data.info["unit"],
-                                                    savefig=False, out_dir=self.plot_output_dir, show_plot=False, return_components=False,
-                                                    return_fig=True, title=plot_title, minimal_start=self._plot_start,
-                                                    minimal_end=self._plot_end)
-
-                elif telemetry_kind in ALLOWED_COMBINATION_TYPES:
-                    figure = mnemonic_info.plot_data_plus_devs(savefig=False, out_dir=self.plot_output_dir, nominal_value=nominal,
-                                                               yellow_limits=yellow, red_limits=red, return_components=False,
-                                                               return_fig=True, show_plot=False, title=plot_title)
-                else:
-                    # For telemetry types other than every_change, the data will be contained in an instance of
-                    # and EDBMnemonic. In this case, we can create the plot using the bokeh_plot method. The default
-                    # behavior is to return the Bokeh figure itself, rather than the script and div. Also, do not
-                    # save the figure and return the figure, or else Bokeh will later fail with an error that figure
-                    # elements are shared between documents.
-                    plot_mean = False
-                    plot_median = False
-                    plot_max = False
-                    plot_min = False
-                    plot_parts = mnemonic["plot_data"].split(',')
-                    if 'median' in plot_parts:
-                        # Assume that we want to plot only one of the mean and median
-                        plot_median = True
+                        # Query the EDB/JWQLDB, filter by dependencies, and perform averaging
+                        full_query_start_times, full_query_end_times = self.generate_query_start_times(self._plot_start)
+                        additional_data = self.multiday_mnemonic_query(mnemonic, full_query_start_times, full_query_end_times, temp_telem_type)
+
+                        # Now arrange the data in a way that makes sense. Place the non-averaged data collected above
+                        # into self.data, and the averaged data into the self.mean and self.median_times attributes
+                        mnemonic_info.mean = mnemonic_info.data["euvalues"].value
+                        mnemonic_info.median_times = mnemonic_info.data["dates"].value
+                        tmp_table = Table()
+                        tmp_table["dates"] = additional_data.data["dates"]
+                        tmp_table["euvalues"] = additional_data.data["euvalues"]
+                        mnemonic_info.data = tmp_table
+
+                    # Create plot
+                    # If there is a nominal value, or yellow/red limits to be included in the plot, get those here
+                    nominal = utils.check_key(mnemonic, "nominal_value")
+                    yellow = utils.check_key(mnemonic, "yellow_limits")
+                    red = utils.check_key(mnemonic, "red_limits")
+
+                    # Make the plot title as useful as possible. Include the description from the input json
+                    # file. If there is none, fall back to the description from MAST. If that is also not
+                    # present, then the title will be only the mnemonic name.
+                    if 'description' in mnemonic:
+                        plot_title = f'{new_data.mnemonic_identifier}: {mnemonic["description"]}'
+                    elif 'description' in new_data.info:
+                        plot_title = f'{new_data.mnemonic_identifier}: {new_data.info["description"]}'
+                    else:
+                        plot_title = new_data.mnemonic_identifier
+
+                    if telemetry_kind == 'every_change':
+                        # For every_change data, the plot is more complex, and we must use the custom
+                        # plot_every_change_data() method. Again, return the figure object without saving it.
+                        figure = plot_every_change_data(mnemonic_info, new_data.mnemonic_identifier, new_data.info["unit"],
+                                                        savefig=False, out_dir=self.plot_output_dir, show_plot=False, return_components=False,
+                                                        return_fig=True, title=plot_title, minimal_start=self._plot_start,
+                                                        minimal_end=self._plot_end)
+
+                    elif telemetry_kind in ALLOWED_COMBINATION_TYPES:
+                        figure = mnemonic_info.plot_data_plus_devs(savefig=False, out_dir=self.plot_output_dir, nominal_value=nominal,
+                                                                   yellow_limits=yellow, red_limits=red, return_components=False,
+                                                                   return_fig=True, show_plot=False, title=plot_title)
+                    else:
+                        # For telemetry types other than every_change, the data will be contained in an instance of
+                        # and EDBMnemonic. In this case, we can create the plot using the bokeh_plot method. The default
+                        # behavior is to return the Bokeh figure itself, rather than the script and div. Also, do not
+                        # save the figure and return the figure, or else Bokeh will later fail with an error that figure
+                        # elements are shared between documents.
                         plot_mean = False
-                    if 'max' in plot_parts:
-                        plot_max = True
-                    if 'min' in plot_parts:
-                        plot_min = True
-
-                    figure = mnemonic_info.bokeh_plot(savefig=False, out_dir=self.plot_output_dir, nominal_value=nominal,
-                                                      yellow_limits=yellow, red_limits=red, return_components=False,
-                                                      return_fig=True, show_plot=False, title=plot_title, plot_mean=plot_mean,
-                                                      plot_median=plot_median, plot_max=plot_max, plot_min=plot_min)
-
-                # Add the figure to a dictionary that organizes the plots by plot_category
-                self.add_figure(figure, mnemonic["plot_category"])
+                        plot_median = False
+                        plot_max = False
+                        plot_min = False
+                        plot_parts = mnemonic["plot_data"].split(',')
+                        if 'median' in plot_parts:
+                            # Assume that we want to plot only one of the mean and median
+                            plot_median = True
+                            plot_mean = False
+                        if 'max' in plot_parts:
+                            plot_max = True
+                        if 'min' in plot_parts:
+                            plot_min = True
+
+                        figure = mnemonic_info.bokeh_plot(savefig=False, out_dir=self.plot_output_dir, nominal_value=nominal,
+                                                          yellow_limits=yellow, red_limits=red, return_components=False,
+                                                          return_fig=True, show_plot=False, title=plot_title, plot_mean=plot_mean,
+                                                          plot_median=plot_median, plot_max=plot_max, plot_min=plot_min)
+
+                    # Add the figure to a dictionary that organizes the plots by plot_category
+                    self.add_figure(figure, mnemonic["plot_category"])
+        finally:
+            # Requests that have not started are not needed if the run fails
+            executor.shutdown(cancel_futures=True)
 
         # Create a tabbed, gridded set of plots for each category of plot, and save as a json file.
         self.tabbed_figure()
@@ -2180,6 +2272,28 @@ def plot_every_change_data(data, mnem_name, units, show_plot=False, savefig=True
         return fig
 
 
+def related_mnemonics(mnemonic):
+    """List the names of the mnemonics whose data are needed to process a mnemonic: the
+    mnemonic itself, its dependencies, and the mnemonic it is multiplied by, if any.
+
+    Parameters
+    ----------
+    mnemonic : dict
+        Dictionary of information for a single mnemonic. This comes from the json file describing all
+        mnemonics to be monitored
+
+    Returns
+    -------
+    names : list
+        Names of the mnemonics, without duplicates
+    """
+    names = [mnemonic["name"]]
+    names.extend(dependency["name"] for dependency in mnemonic["dependency"])
+    if '*' in mnemonic["plot_data"]:
+        names.append(mnemonic["plot_data"].split(',')[0].strip('*'))
+    return list(dict.fromkeys(names))
+
+
 if __name__ == '__main__':
     module = os.path.basename(__file__).strip('.py')
     start_time, log_file = monitor_utils.initialize_instrument_monitor(module)
@@ -19,6 +19,7 @@ from collections import OrderedDict
 import copy
 import numpy as np
 import os
+import tempfile
 
 from astropy.io import fits
 from jwst import datamodels
@@ -193,10 +194,16 @@ def get_pipeline_steps(instrument):
     return required_steps
 
 
-def image_stack(file_list, skipped_initial_ints=0):
+def image_stack(file_list, skipped_initial_ints=0, scratch_dir=None):
     """Given a list of fits files containing 2D or 3D images, read in all data
     and place into a 3D stack
 
+    The stack is built in two passes. The headers of all files are read
+    first in order to determine the final size of the cube, which is then
+    allocated once as a float32 array (or a memory-mapped file within
+    ``scratch_dir``). The data from each file are then copied directly into
+    the appropriate slice of the cube.
+
     Parameters
     ----------
     file_list : list
@@ -209,42 +216,73 @@ def image_stack(file_list, skipped_initial_ints=0):
         we want to skip the first N integrations due to dark current
         instability.
 
+    scratch_dir : str
+        Optional directory in which to place a temporary file backing
+        the cube as a ``numpy.memmap``. The file is removed automatically
+        once the cube is no longer referenced. If ``None``, the cube is
+        held in memory.
+
     Returns
     -------
     cube : numpy.ndarray
         3D stack of the 2D images
+
+    exptimes : list
+        List of lists containing the effective integration time of each
+        integration in the stack, grouped by input file
     """
 
+    # First pass: check the array dimensions of all files and find the
+    # total number of frames that will go into the stack
     exptimes = []
-    for i, input_file in enumerate(file_list):
-        with fits.open(input_file) as hdu:
-            image = hdu[1].data
+    frame_ranges = []
+    ndim_base = None
+    total_frames = 0
+    for input_file in file_list:
+        with fits.open(input_file, memmap=True) as hdu:
             exptime = hdu[0].header['EFFINTTM']
             num_ints = hdu[0].header['NINTS']
-
-        # Stack all inputs together into a single 3D image cube
-        if i == 0:
-            ndim_base = image.shape
-            if len(ndim_base) == 3:
-                cube = copy.deepcopy(image[skipped_initial_ints:, :, :])
-                num_ints -= skipped_initial_ints
-            elif len(ndim_base) == 2:
-                cube = np.expand_dims(image, 0)
+            naxis = hdu[1].header['NAXIS']
+            ndim = tuple(hdu[1].header['NAXIS{}'.format(axis)] for axis in range(naxis, 0, -1))
+
+        if naxis > 3:
+            raise ValueError("4-dimensional input slope images not supported.")
+        if ndim_base is None:
+            ndim_base = ndim
+        elif ndim_base[-2:] != ndim[-2:]:
+            raise ValueError("Input images are of inconsistent size in x/y dimension.")
+
+        if naxis == 3:
+            num_frames = max(ndim[0] - skipped_initial_ints, 0)
+            num_ints -= skipped_initial_ints
         else:
-            ndim = image.shape
-            if ndim_base[-2:] == ndim[-2:]:
-                if len(ndim) == 2:
-                    image = np.expand_dims(image, 0)
-                    cube = np.vstack((cube, image))
-                elif len(ndim) == 3:
-                    cube = np.vstack((cube, image[skipped_initial_ints:, :, :]))
-                    num_ints -= skipped_initial_ints
-                elif len(ndim) > 3:
-                    raise ValueError("4-dimensional input slope images not supported.")
-            else:
-                raise ValueError("Input images are of inconsistent size in x/y dimension.")
+            num_frames = 1
+
+        frame_ranges.append((total_frames, total_frames + num_frames))
+        total_frames += num_frames
         exptimes.append([exptime] * num_ints)
 
+    if ndim_base is None:
+        raise ValueError("No input files provided.")
+
+    # Allocate the full cube only once
+    cube_shape = (total_frames, ndim_base[-2], ndim_base[-1])
+    if scratch_dir is not None:
+        with tempfile.TemporaryFile(dir=scratch_dir) as backing_file:
+            cube = np.memmap(backing_file, dtype=np.float32, mode='w+', shape=cube_shape)
+    else:
+        cube = np.empty(cube_shape, dtype=np.float32)
+
+    # Second pass: copy the data from each file into its slice of the cube
+    for input_file, (first, last) in zip(file_list, frame_ranges):
+        with fits.open(input_file, memmap=True) as hdu:
+            image = hdu[1].data
+            if image.ndim == 3:
+                cube[first:last, :, :] = image[skipped_initial_ints:, :, :]
+            else:
+                cube[first, :, :] = image
+            del image
+
     return cube, exptimes
 
 
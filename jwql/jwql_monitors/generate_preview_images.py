@@ -27,20 +27,25 @@ Use
 """
 
 import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
 import glob
 import logging
 import multiprocessing
 import os
 import re
+import time
 
+from astropy.io import fits
 import numpy as np
 
-from jwql.utils import permissions
+from jwql.utils import image_inventory, permissions
 from jwql.utils.constants import IGNORED_SUFFIXES, JWST_INSTRUMENT_NAMES_SHORTHAND, NIRCAM_LONGWAVE_DETECTORS, \
-    NIRCAM_SHORTWAVE_DETECTORS, PREVIEW_IMAGE_LISTFILE, THUMBNAIL_LISTFILE
+    NIRCAM_SHORTWAVE_DETECTORS, ON_GITHUB_ACTIONS, ON_READTHEDOCS
 from jwql.utils.logging_functions import log_info, log_fail
 from jwql.utils.protect_module import lock_module
-from jwql.utils.preview_image import PreviewImage
+from jwql.utils.preview_image import LIMITS_SAMPLE_ERROR, PreviewImage
 from jwql.utils.utils import get_config, filename_parser
 from jwql.utils.monitor_utils import update_monitor_table, initialize_instrument_monitor
 
@@ -51,7 +56,15 @@ SW_DET_GAP = 145  # pixels = int(4.5 arcsec / 0.031 arcsec/pixel)
 FULLX = 2048  # Width of the full detector
 FULLY = 2048  # Height of the full detector
 
-SETTINGS = get_config()
+# Number of new preview images and thumbnails collected before they are
+# added to the inventories
+INVENTORY_BATCH_SIZE = 500
+
+# Edges, in seconds, of the bins of the per-file latency histogram
+LATENCY_BIN_EDGES = [1, 2, 5, 10, 30, 60, 120, 300]
+
+if not ON_GITHUB_ACTIONS and not ON_READTHEDOCS:
+    SETTINGS = get_config()
 
 
 def array_coordinates(channelmod, detector_list, lowerleft_list):
@@ -183,7 +196,7 @@ def array_coordinates(channelmod, detector_list, lowerleft_list):
     return xdim, ydim, module_lowerlefts
 
 
-def check_existence(file_list, outdir):
+def check_existence(file_list, outdir, existing_stems=None):
     """Given a list of fits files, determine if a preview image has
     already been created in ``outdir``.
 
@@ -196,17 +209,23 @@ def check_existence(file_list, outdir):
     outdir : str
         Directory that will contain the preview image if it exists
 
+    existing_stems : set
+        Stems of the preview images in ``outdir``, as returned by
+        ``get_preview_stems``. If ``None``, ``outdir`` is listed.
+
     Returns
     -------
     exists : bool
         ``True`` if preview image exists, ``False`` if it does not
     """
+    if existing_stems is None:
+        existing_stems = get_preview_stems(outdir)
 
     # If file_list contains only a single file, then we need to search
     # for a preview image name that contains the detector name
     if len(file_list) == 1:
         filename = os.path.split(file_list[0])[1]
-        search_string = filename.split('.fits')[0] + '_*.jpg'
+        return filename.split('.fits')[0] in existing_stems
     else:
         # If file_list contains multiple files, then we need to search
         # for the appropriately named jpg of the mosaic, which depends
@@ -223,17 +242,63 @@ def check_existence(file_list, outdir):
             mosaic_str = "NRC_SW*_MOSAIC_"
         elif file_parts['detector'].upper() in NIRCAM_LONGWAVE_DETECTORS:
             mosaic_str = "NRC_LW*_MOSAIC_"
-        search_string = 'jw{}{}{}_{}{}{}_{}_{}{}*.jpg'.format(
+        search_string = 'jw{}{}{}_{}{}{}_{}_{}{}*'.format(
                         file_parts['program_id'], file_parts['observation'],
                         file_parts['visit'], file_parts['visit_group'],
                         file_parts['parallel_seq_id'], file_parts['activity'],
                         file_parts['exposure_id'], mosaic_str, file_parts['suffix'])
 
-    current_files = glob.glob(os.path.join(outdir, search_string))
-    if len(current_files) > 0:
-        return True
-    else:
-        return False
+        mosaic_stems = [stem for stem in existing_stems if '_MOSAIC_' in stem]
+        return len(fnmatch.filter(mosaic_stems, search_string)) > 0
+
+
+def collect_results(results, batch_size=INVENTORY_BATCH_SIZE):
+    """Add the preview images and thumbnails made by ``run_task`` to the
+    inventories as they arrive, in batches of about ``batch_size``
+    images.
+
+    Parameters
+    ----------
+    results : iterable
+        Outputs of ``run_task``
+
+    batch_size : int
+        Number of new images collected before they are added to the
+        inventories
+
+    Returns
+    -------
+    n_previews : int
+        Number of preview images added
+
+    n_thumbnails : int
+        Number of thumbnails added
+
+    n_bytes : int
+        Total size of the processed files
+
+    latencies : list
+        Time, in seconds, taken to process each file
+    """
+    preview_files, thumbnail_files = [], []
+    n_previews, n_thumbnails, n_bytes = 0, 0, 0
+    latencies = []
+    for previews, thumbnails, file_size, latency in results:
+        preview_files.extend(previews)
+        thumbnail_files.extend(thumbnails)
+        n_bytes += file_size
+        latencies.append(latency)
+        if len(preview_files) + len(thumbnail_files) >= batch_size:
+            update_inventory(preview_files, thumbnail_files)
+            n_previews += len(preview_files)
+            n_thumbnails += len(thumbnail_files)
+            preview_files, thumbnail_files = [], []
+
+    update_inventory(preview_files, thumbnail_files)
+    n_previews += len(preview_files)
+    n_thumbnails += len(thumbnail_files)
+
+    return n_previews, n_thumbnails, n_bytes, latencies
 
 
 def create_dummy_filename(filelist):
@@ -292,44 +357,61 @@ def create_dummy_filename(filelist):
     return dummy_name
 
 
-def create_mosaic(filenames):
+def create_mosaic(filenames, max_workers=1):
     """If an exposure comprises data from multiple detectors read in all
     the appropriate files and create a mosaic so that the preview image
     will show all the data together.
 
+    The geometry of the mosaic is found from the file headers before
+    any data are read. The mosaic array is then allocated once, and the
+    difference image(s) of each detector are read directly into their
+    place within it.
+
     Parameters
     ----------
     filenames : list
         List of filenames to be combined into a mosaic
 
+    max_workers : int
+        Number of threads used to read the detectors' data. The
+        default of 1 reads the detectors one after another.
+
     Returns
     -------
-    mosaic_filename : str
-        Name of fits file containing the mosaicked data
+    full_array : numpy.ndarray
+        3D ``float32`` array containing the mosaicked data of each
+        integration. Pixels not covered by any detector are NaN.
+
+    full_dq : numpy.ndarray
+        2D boolean map of the science pixels in the mosaic
     """
 
-    # Use preview_image to load data and create difference image
-    # for each detector. Save in a list
-    data = []
+    # Find the detector, aperture location, and data shape of each
+    # file from the headers, without reading the data
+    filenames_used = []
     detector = []
     data_lower_left = []
+    data_shape = []
     for filename in filenames:
-        image = PreviewImage(filename, "SCI")  # Now have image.data, image.dq
-        data_dim = len(image.data.shape)
-        if data_dim == 4:
-            diff_im = image.difference_image(image.data)
-        else:
-            diff_im = image.data
-        data.append(diff_im)
         file_info = filename_parser(filename)
-        if file_info['recognized_filename']:
-            detector.append(file_info['detector'].upper())
-        else:
+        if not file_info['recognized_filename']:
             # If filename_parser() does not recognize the file, skip it.
-            logging.warning((f'While running create_mosaic() using {file_list[0]}, '
+            logging.warning((f'While running create_mosaic() using {filename}, '
                              'filename_parser() failed to recognize the file pattern.'))
-            pass
-        data_lower_left.append((image.xstart, image.ystart))
+            continue
+        with fits.open(filename) as hdulist:
+            try:
+                shape = hdulist['SCI'].shape
+            except KeyError:
+                raise ValueError('WARNING: no SCI extension in {}!'.format(filename))
+            try:
+                lower_left = (hdulist[0].header['SUBSTRT1'], hdulist[0].header['SUBSTRT2'])
+            except KeyError:
+                raise ValueError('SUBSTR header keywords not found in {}'.format(filename))
+        filenames_used.append(filename)
+        detector.append(file_info['detector'].upper())
+        data_lower_left.append(lower_left)
+        data_shape.append(shape)
 
     # Make sure SW and LW data are not being mixed. Create the
     # appropriately sized numpy array to hold all the data based
@@ -338,26 +420,32 @@ def create_mosaic(filenames):
     full_xdim, full_ydim, full_lower_left = array_coordinates(mosaic_channel, detector,
                                                               data_lower_left)
 
-    # Create the array to hold all the data
-    datashape = data[0].shape
-    datadim = len(datashape)
-    if datadim == 2:
-        full_array = np.zeros((1, full_ydim, full_xdim)) * np.nan
-    elif datadim == 3:
-        full_array = np.zeros((datashape[0], full_ydim, full_xdim)) * np.nan
+    # Create the array to hold all the data. 4D data are reduced to one
+    # difference image per integration.
+    datashape = data_shape[0]
+    if len(datashape) == 2:
+        nint = 1
+    elif len(datashape) in [3, 4]:
+        nint = datashape[0]
     else:
-        raise ValueError('Difference image for {} must be either 2D or 3D.'.format(filenames[0]))
+        raise ValueError('Data in {} must be 2D, 3D or 4D.'.format(filenames_used[0]))
+    full_array = np.full((nint, full_ydim, full_xdim), np.nan, dtype=np.float32)
 
-    # Place the data from the individual detectors in the appropriate
+    # Read the data from the individual detectors into the appropriate
     # places in the final image
-    for pixdata, detect in zip(data, detector):
+    tiles = []
+    for filename, detect, shape in zip(filenames_used, detector, data_shape):
         x0, y0 = full_lower_left[detect]
-        if datadim == 2:
-            yd, xd = pixdata.shape
-            full_array[0, y0: y0 + yd, x0: x0 + xd] = pixdata
-        elif datadim == 3:
-            ints, yd, xd = pixdata.shape
-            full_array[:, y0: y0 + yd, x0: x0 + xd] = pixdata
+        yd, xd = shape[-2:]
+        tiles.append((filename, full_array[:, y0: y0 + yd, x0: x0 + xd]))
+
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Consume the results so that errors in the threads are raised
+            list(executor.map(lambda tile: read_mosaic_tile(*tile), tiles))
+    else:
+        for tile in tiles:
+            read_mosaic_tile(*tile)
 
     # Create associated DQ array and set unpopulated pixels to be skipped
     # in preview image scaling
@@ -489,6 +577,29 @@ def detector_check(detector_list, search_string):
     return total
 
 
+def estimate_cost(task):
+    """Estimate the relative cost of creating the preview images for a
+    task from ``find_program_tasks``, as the size of the file. The file
+    is not opened, so that every task can be estimated quickly before
+    any processing starts.
+
+    Parameters
+    ----------
+    task : tuple
+        ``(filename, preview_output_directory,
+        thumbnail_output_directory)``
+
+    Returns
+    -------
+    cost : int
+        Estimated cost of the task
+    """
+    try:
+        return os.stat(task[0]).st_size
+    except OSError:
+        return 0
+
+
 def find_data_channel(detectors):
     """Using a list of detectors, identify the channel(s) that the data
     are from.
@@ -535,6 +646,105 @@ def find_data_channel(detectors):
     return channel
 
 
+def find_program_tasks(program, overwrite):
+    """Find the files in the given program that need preview images,
+    and create the output directories for them.
+
+    Parameters
+    ----------
+    program : str
+        The program identifier (e.g. ``jw88600``)
+    overwrite : bool
+        If False, skip over files whose preview images already exist.
+        If True, return all files in the program.
+
+    Returns
+    -------
+    tasks : list
+        List of ``(filename, preview_output_directory,
+        thumbnail_output_directory)`` tuples, one for each file
+    """
+
+    logging.info('')
+    logging.info('Finding files in {}'.format(program))
+
+    # Gather files to process
+    filenames = glob.glob(os.path.join(SETTINGS['filesystem'], 'public', program, 'jw*/*.fits'))
+    filenames.extend(glob.glob(os.path.join(SETTINGS['filesystem'], 'proprietary', program, 'jw*/*.fits')))
+    filenames = list(set(filenames))
+
+    # remove specific "ignored" suffix files (currently "original" and "stream")
+    filenames = [filename for filename in filenames if os.path.splitext(filename.split('_')[-1])[0] not in IGNORED_SUFFIXES]
+
+    # Remove guiding files, as these are not currently visible in JWQL anyway
+    filtered_filenames = []
+    for filename in filenames:
+        parsed = filename_parser(filename)
+        if parsed['recognized_filename']:
+            if 'guider_mode' not in parsed and 'detector' in parsed:
+                filtered_filenames.append(filename)
+        else:
+            logging.warning((f'While running generate_preview_images.find_program_tasks() on {filename}, the '
+                             'filename_parser() failed to recognize the file pattern.'))
+    filenames = filtered_filenames
+
+    logging.info('Found {} filenames'.format(len(filenames)))
+    logging.info('')
+
+    tasks = []
+    existing_preview_counter = 0
+
+    # Stems of the existing preview images in each output directory. Each
+    # directory is listed once, rather than once per file.
+    existing_stems = {}
+    for filename in filenames:
+
+        # Determine the save location
+        parsed = filename_parser(filename)
+        if parsed['recognized_filename']:
+            identifier = 'jw{}'.format(parsed['program_id'])
+        else:
+            # In this case, the filename_parser failed to recognize the filename
+            identifier = os.path.basename(filename).split('.fits')[0]
+            logging.warning((f'While running generate_preview_images.find_program_tasks() on filtered filename {filename}, the '
+                             'filename_parser() failed to recognize the file pattern.'))
+        preview_output_directory = os.path.join(SETTINGS['preview_image_filesystem'], identifier)
+        thumbnail_output_directory = os.path.join(SETTINGS['thumbnail_filesystem'], identifier)
+
+        # Check to see if the preview images already exist and skip if they do
+        if not overwrite:
+            # If overwrite is False, we create preview images only for files that
+            # don't have them yet.
+            if preview_output_directory not in existing_stems:
+                existing_stems[preview_output_directory] = get_preview_stems(preview_output_directory)
+            file_exists = check_existence([filename], preview_output_directory,
+                                          existing_stems=existing_stems[preview_output_directory])
+            if file_exists:
+                logging.debug("\tJPG already exists for {}, skipping.".format(filename))
+                existing_preview_counter += 1
+                continue
+
+            # The same file may be in both the public and proprietary
+            # directories. Only make its preview images once.
+            existing_stems[preview_output_directory].add(os.path.basename(filename).split('.fits')[0])
+
+        # Create the output directories if necessary
+        if not os.path.exists(preview_output_directory):
+            os.makedirs(preview_output_directory)
+            permissions.set_permissions(preview_output_directory)
+            logging.info('\tCreated directory {}'.format(preview_output_directory))
+        if not os.path.exists(thumbnail_output_directory):
+            os.makedirs(thumbnail_output_directory)
+            permissions.set_permissions(thumbnail_output_directory)
+            logging.info('\tCreated directory {}'.format(thumbnail_output_directory))
+
+        tasks.append((filename, preview_output_directory, thumbnail_output_directory))
+
+    logging.info(f"Skipped {existing_preview_counter} previously-existing preview images.")
+
+    return tasks
+
+
 def get_base_output_name(filename_dict):
     """Returns the base output name used for preview images and
     thumbnails.
@@ -560,6 +770,65 @@ def get_base_output_name(filename_dict):
     return base_output_name
 
 
+def get_exposure_key(filename, filename_dict):
+    """Returns a key identifying the exposure, and for NIRCam the
+    channel, that a stage 1 or 2 file belongs to. Files that should be
+    combined into a single mosaic share the same key: NIRCam shortwave
+    or longwave files from the same exposure, in the same directory,
+    with the same suffix. For other detectors, the detector is part of
+    the key, so that each file has its own key.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file, including path
+
+    filename_dict : dict
+        A dictionary containing parsed filename parts via
+        ``filename_parser``
+
+    Returns
+    -------
+    key : tuple
+        The directory, base output name, NIRCam channel (or detector),
+        and suffix of the file, in lowercase
+    """
+    detector = filename_dict['detector'].upper()
+    if detector in NIRCAM_SHORTWAVE_DETECTORS:
+        channel = 'nrc_sw'
+    elif detector in NIRCAM_LONGWAVE_DETECTORS:
+        channel = 'nrc_lw'
+    else:
+        channel = detector.lower()
+
+    return (os.path.dirname(filename).lower(), get_base_output_name(filename_dict).lower(),
+            channel, filename_dict['suffix'].lower())
+
+
+def get_preview_stems(outdir):
+    """List ``outdir`` once and return the stems of the preview images
+    within it. Preview images are named ``<stem>_integ<N>.jpg``, where
+    the stem is the name of the fits file they were created from,
+    minus the ``.fits`` extension.
+
+    Parameters
+    ----------
+    outdir : str
+        Directory containing preview images
+
+    Returns
+    -------
+    stems : set
+        Stems of all preview images in ``outdir``. Empty if the
+        directory does not exist.
+    """
+    try:
+        with os.scandir(outdir) as entries:
+            return set(entry.name.rsplit('_', 1)[0] for entry in entries if entry.name.endswith('.jpg'))
+    except FileNotFoundError:
+        return set()
+
+
 @log_fail
 @log_info
 def generate_preview_images(overwrite, programs=None):
@@ -601,36 +870,25 @@ def generate_preview_images(overwrite, programs=None):
         logging.info(no_prog_message)
         raise ValueError(no_prog_message)
 
-    # Process programs in parallel
-    pool = multiprocessing.Pool(processes=int(SETTINGS['cores']))
-    program_list = [(element, overwrite) for element in program_list]
-    results = pool.starmap(process_program, program_list)
-    pool.close()
-    pool.join()
-
-    # Filter the nested list in results into separate lists of preview
-    # images and thumbnail images
-    full_preview_files = []
-    full_thumbnail_files = []
-    for r in results:
-        full_preview_files.extend(r[0])
-        full_thumbnail_files.extend(r[1])
-
-    # Filter the preview and thumbnail images by instrument and update the listfiles.
-    # We do this by looking for instrument abbreviations in the filenames. But will
-    # this work for level 3 files?? If an instrument abbreviation is not in the filename,
-    # then the preview/thubnail images won't be caught and added here.
-    for abbrev, inst_name in JWST_INSTRUMENT_NAMES_SHORTHAND.items():
-        inst_previews = [ele for ele in full_preview_files if re.search(abbrev, ele, re.IGNORECASE)]
-        inst_thumbs = [ele for ele in full_thumbnail_files if abbrev in ele]
-
-        # Read in the preview image listfile and the thumbnail image list file
-        # and add these new files to each
-        preview_image_listfile = os.path.join(SETTINGS['preview_image_filesystem'], f"{PREVIEW_IMAGE_LISTFILE}_{inst_name}.txt")
-        update_listfile(preview_image_listfile, inst_previews, 'preview')
-
-        thumbnail_image_listfile = os.path.join(SETTINGS['thumbnail_filesystem'], f"{THUMBNAIL_LISTFILE}_{inst_name}.txt")
-        update_listfile(thumbnail_image_listfile, inst_thumbs, 'thumbnail')
+    # Flatten the programs into one task per file, so that the work of
+    # large programs is spread over all of the processes. The most
+    # expensive files are started first.
+    tasks = []
+    for program in program_list:
+        tasks.extend(find_program_tasks(program, overwrite))
+    tasks = sorted(tasks, key=estimate_cost, reverse=True)
+    logging.info(f'Creating preview images for {len(tasks)} files.')
+
+    # Process files in parallel. Files are handed out one at a time, so
+    # that the largest files at the head of the list go to different
+    # processes.
+    cores = int(SETTINGS['cores'])
+    start_time = time.time()
+    with multiprocessing.Pool(processes=cores) as pool:
+        n_previews, n_thumbnails, n_bytes, latencies = collect_results(pool.imap_unordered(run_task, tasks))
+
+    logging.info(f"Added {n_previews} preview images and {n_thumbnails} thumbnails to the inventories.")
+    log_throughput(latencies, n_bytes, time.time() - start_time)
 
     # Complete logging:
     logging.info("Completed.")
@@ -661,64 +919,129 @@ def group_filenames(filenames):
     """
 
     # Some initializations
-    grouped, matched_names = [], []
+    grouped, matched_names = [], set()
     filenames.sort()
 
-    # Loop over each file in the list of good files
+    # Parse each file once, and bucket the stage 1 and 2 files by exposure
+    parsed = []
+    exposures = defaultdict(list)
     for filename in filenames:
+        filename_dict = filename_parser(os.path.basename(filename))
+        key = None
+        if filename_dict['recognized_filename'] and filename_dict['filename_type'] == 'stage_1_and_2':
+            key = get_exposure_key(filename, filename_dict)
+            exposures[key].append(filename)
+        parsed.append((filename, filename_dict, key))
 
-        # Holds list of matching files for exposure
-        subgroup = []
+    # Loop over each file in the list of good files
+    for filename, filename_dict, key in parsed:
 
-        # Generate string to be matched with other filenames
-        filename_dict = filename_parser(os.path.basename(filename))
         if not filename_dict['recognized_filename']:
             logging.warning((f'While running generate_preview_images.group_filenames() on {filename}, the '
                              'filename_parser() failed to recognize the file pattern.'))
             break
 
         # If the filename was already involved in a match, then skip
-        if filename not in matched_names:
-
-            # For stage 3 filenames, treat individually
-            if 'stage_3' in filename_dict['filename_type']:
-                matched_names.append(filename)
-                subgroup.append(filename)
-
-            # Group together stage 1 and 2 filenames
-            elif filename_dict['filename_type'] == 'stage_1_and_2':
-
-                # Determine detector naming convention
-                if filename_dict['detector'].upper() in NIRCAM_SHORTWAVE_DETECTORS:
-                    detector_str = 'NRC[AB][1234]'
-                elif filename_dict['detector'].upper() in NIRCAM_LONGWAVE_DETECTORS:
-                    detector_str = 'NRC[AB]5'
-                else:  # non-NIRCam detectors
-                    detector_str = filename_dict['detector'].upper()
-
-                # Build pattern to match against
-                base_output_name = get_base_output_name(filename_dict)
-                match_str = '{}{}_{}.fits'.format(base_output_name, detector_str, filename_dict['suffix'])
-                match_str = os.path.join(os.path.dirname(filename), match_str)
-                pattern = re.compile(match_str, re.IGNORECASE)
-
-                # Try to match the substring to each good file
-                for file_to_match in filenames:
-                    if pattern.match(file_to_match) is not None:
-                        matched_names.append(file_to_match)
-                        subgroup.append(file_to_match)
+        if filename in matched_names:
+            continue
 
-            else:
-                # filename_dict['filename_type'] may be 'guider' or 'time_series', for instance. Treat individually.
-                matched_names.append(filename)
-                subgroup.append(filename)
+        if key is not None:
+            # Group together stage 1 and 2 filenames from the same exposure
+            subgroup = exposures[key]
+        else:
+            # For stage 3 filenames, treat individually. filename_dict['filename_type']
+            # may also be 'guider' or 'time_series', for instance. Treat individually.
+            subgroup = [filename]
 
-        if len(subgroup) > 0:
-            grouped.append(subgroup)
+        matched_names.update(subgroup)
+        grouped.append(subgroup)
 
     return grouped
 
 
+def log_throughput(latencies, n_bytes, elapsed):
+    """Log the throughput of ``generate_preview_images`` and a
+    histogram of the time taken for each file.
+
+    Parameters
+    ----------
+    latencies : list
+        Time, in seconds, taken to process each file
+    n_bytes : int
+        Total size of the processed files
+    elapsed : float
+        Wall clock time, in seconds, taken to process all files
+    """
+    n_files = len(latencies)
+    if n_files == 0 or elapsed <= 0:
+        return
+
+    logging.info((f'Processed {n_files} files ({n_bytes / 1e6:.1f} MB) in {elapsed:.1f} s: '
+                  f'{n_files / elapsed:.2f} files/s, {n_bytes / 1e6 / elapsed:.2f} MB/s'))
+
+    counts = np.bincount(np.digitize(latencies, LATENCY_BIN_EDGES), minlength=len(LATENCY_BIN_EDGES) + 1)
+    labels = [f'< {LATENCY_BIN_EDGES[0]} s']
+    labels.extend([f'{low}-{high} s' for low, high in zip(LATENCY_BIN_EDGES[:-1], LATENCY_BIN_EDGES[1:])])
+    labels.append(f'>= {LATENCY_BIN_EDGES[-1]} s')
+    logging.info('Time taken per file:')
+    for label, count in zip(labels, counts):
+        logging.info(f'\t{label}: {count}')
+
+
+def process_file(filename, preview_output_directory, thumbnail_output_directory):
+    """Generate the preview images, and the thumbnail if appropriate,
+    for the given file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the fits file
+    preview_output_directory : str
+        Directory in which to save the preview images
+    thumbnail_output_directory : str
+        Directory in which to save the thumbnail
+
+    Returns
+    -------
+    preview_image_files : list
+        List of preview image filenames
+    thumbnail_files : list
+        List of thumbnail image filenames
+    """
+
+    logging.debug(f'Working on {filename}')
+
+    # Create the nominal preview image and thumbnail
+    try:
+        im = PreviewImage(filename, "SCI")
+        im.clip_percent = 0.01
+        im.scaling = 'log'
+        im.cmap = 'viridis'
+        im.output_format = 'jpg'
+        im.preview_output_directory = preview_output_directory
+        im.thumbnail_output_directory = thumbnail_output_directory
+
+        # Mosaics can be very large, so estimate their signal limits
+        # from a subsample of the pixels
+        if 'i2d' in filename:
+            im.limits_error = LIMITS_SAMPLE_ERROR
+
+        # Create a thumbnail for rate or dark files only. Create preview
+        # images for all filetypes
+        if 'rate.fits' in filename or 'dark.fits' in filename:
+            im.make_image(max_img_size=8, create_thumbnail=True)
+            logging.debug('\tCreated preview image and thumbnail for: {}'.format(filename))
+        else:
+            im.make_image(max_img_size=8, create_thumbnail=False)
+            logging.debug('\tCreated preview image for: {}'.format(filename))
+
+    except (ValueError, AttributeError) as error:
+        logging.warning(error)
+        return [], []
+
+    return im.preview_images, im.thumbnail_images
+
+
 def process_program(program, overwrite):
     """Generate preview images and thumbnails for the given program.
 
@@ -743,140 +1066,96 @@ def process_program(program, overwrite):
     logging.info('')
     logging.info('Processing {}'.format(program))
 
-    # Gather files to process
-    filenames = glob.glob(os.path.join(SETTINGS['filesystem'], 'public', program, 'jw*/*.fits'))
-    filenames.extend(glob.glob(os.path.join(SETTINGS['filesystem'], 'proprietary', program, 'jw*/*.fits')))
-    filenames = list(set(filenames))
-
-    # remove specific "ignored" suffix files (currently "original" and "stream")
-    filenames = [filename for filename in filenames if os.path.splitext(filename.split('_')[-1])[0] not in IGNORED_SUFFIXES]
-
-    # Remove guiding files, as these are not currently visible in JWQL anyway
-    filtered_filenames = []
-    for filename in filenames:
-        parsed = filename_parser(filename)
-        if parsed['recognized_filename']:
-            if 'guider_mode' not in parsed and 'detector' in parsed:
-                filtered_filenames.append(filename)
-        else:
-            logging.warning((f'While running generate_preview_images.process_program() on {filename}, the '
-                             'filename_parser() failed to recognize the file pattern.'))
-    filenames = filtered_filenames
-
-    logging.info('Found {} filenames'.format(len(filenames)))
-    logging.info('')
-
-    new_preview_counter = 0
-    existing_preview_counter = 0
     thumbnail_files = []
     preview_image_files = []
-    for filename in filenames:
+    for task in find_program_tasks(program, overwrite):
+        previews, thumbnails = process_file(*task)
+        preview_image_files.extend(previews)
+        thumbnail_files.extend(thumbnails)
 
-        logging.debug(f'Working on {filename}')
+    logging.info(f"Created {len(preview_image_files)} new preview images.")
 
-        # Determine the save location
-        parsed = filename_parser(filename)
-        if parsed['recognized_filename']:
-            identifier = 'jw{}'.format(parsed['program_id'])
-        else:
-            # In this case, the filename_parser failed to recognize the filename
-            identifier = os.path.basename(filename).split('.fits')[0]
-            logging.warning((f'While running generate_preview_images.process_program() on filtered filename {filename}, the '
-                             'filename_parser() failed to recognize the file pattern.'))
-        preview_output_directory = os.path.join(SETTINGS['preview_image_filesystem'], identifier)
-        thumbnail_output_directory = os.path.join(SETTINGS['thumbnail_filesystem'], identifier)
-
-        # Check to see if the preview images already exist and skip if they do
-        if not overwrite:
-            # If overwrite is False, we create preview images only for files that
-            # don't have them yet.
-            file_exists = check_existence([filename], preview_output_directory)
-            if file_exists:
-                logging.debug("\tJPG already exists for {}, skipping.".format(filename))
-                existing_preview_counter += 1
-                continue
-        else:
-            # If overwrite is set to True, then we always create a new image
-            file_exists = False
-
-        # Create the output directories if necessary
-        if not os.path.exists(preview_output_directory):
-            os.makedirs(preview_output_directory)
-            permissions.set_permissions(preview_output_directory)
-            logging.info('\tCreated directory {}'.format(preview_output_directory))
-        if not os.path.exists(thumbnail_output_directory):
-            os.makedirs(thumbnail_output_directory)
-            permissions.set_permissions(thumbnail_output_directory)
-            logging.info('\tCreated directory {}'.format(thumbnail_output_directory))
+    update_inventory(preview_image_files, thumbnail_files)
 
-        # Create the nominal preview image and thumbnail
-        try:
-            im = PreviewImage(filename, "SCI")
-            im.clip_percent = 0.01
-            im.scaling = 'log'
-            im.cmap = 'viridis'
-            im.output_format = 'jpg'
-            im.preview_output_directory = preview_output_directory
-            im.thumbnail_output_directory = thumbnail_output_directory
-
-            # Create a thumbnail for rate or dark files only. Create preview
-            # images for all filetypes
-            if 'rate.fits' in filename or 'dark.fits' in filename:
-                im.make_image(max_img_size=8, create_thumbnail=True)
-                new_preview_counter += 1
-                thumbnail_files.extend(im.thumbnail_images)
-                logging.debug('\tCreated preview image and thumbnail for: {}'.format(filename))
-            else:
-                im.make_image(max_img_size=8, create_thumbnail=False)
-                new_preview_counter += 1
-                logging.debug('\tCreated preview image for: {}'.format(filename))
+    return preview_image_files, thumbnail_files
 
-            preview_image_files.extend(im.preview_images)
 
-        except (ValueError, AttributeError) as error:
-            logging.warning(error)
+def read_mosaic_tile(filename, tile):
+    """Read the difference image(s) of the science data in the given
+    file into ``tile``. For 4D data, only the first and last groups of
+    each integration are read, one integration at a time.
 
-    logging.info(f"Created {new_preview_counter} new preview images.")
-    logging.info(f"Skipped {existing_preview_counter} previously-existing preview images.")
+    Parameters
+    ----------
+    filename : str
+        Name of fits file containing the data
 
-    return preview_image_files, thumbnail_files
+    tile : numpy.ndarray
+        3D view into the mosaic array, with shape ``(nint, y, x)``,
+        into which the data are written
+    """
+    with fits.open(filename) as hdulist:
+        shape = hdulist['SCI'].shape
+        section = hdulist['SCI'].section
+        for integration in range(tile.shape[0]):
+            if len(shape) == 4:
+                tile[integration] = section[integration, shape[1] - 1, :, :]
+                tile[integration] -= section[integration, 0, :, :]
+            elif len(shape) == 3:
+                tile[integration] = section[integration, :, :]
+            else:
+                tile[integration] = section[:, :]
 
 
-def update_listfile(filename, file_list, filetype):
-    """Add a list of files to a text file. Designed to add new files to the
-    file containing the list of all preview images and the file containing the
-    list of all thumbnail images.
+def run_task(task):
+    """Run ``process_file`` for a task from ``find_program_tasks``, and
+    time it. This is the function run by the worker processes of
+    ``generate_preview_images``.
 
     Parameters
     ----------
-    filename : str
-        Name, including path, of the file to be amended/created
-
-    file_list : list
-        List of filenames to be added to filename
+    task : tuple
+        ``(filename, preview_output_directory,
+        thumbnail_output_directory)``
 
-    filetype : str
-        Descriptor of the contents of the file being amended. Used only for
-        the logging statement
+    Returns
+    -------
+    preview_image_files : list
+        List of preview image filenames
+    thumbnail_files : list
+        List of thumbnail image filenames
+    file_size : int
+        Size of the file in bytes
+    latency : float
+        Time, in seconds, taken to process the file
     """
-    if len(file_list) > 0:
-        if not os.path.isfile(filename):
-            logging.warning(f"{filetype} image listfile not found!! Expected to be at {filename}. Creating a new file.")
+    start_time = time.time()
+    preview_image_files, thumbnail_files = process_file(*task)
+    return preview_image_files, thumbnail_files, os.path.getsize(task[0]), time.time() - start_time
+
 
-        with open(filename, 'a+') as fobj:
-            # Move read cursor to the start of file.
-            fobj.seek(0)
+def update_inventory(preview_files, thumbnail_files):
+    """Add new preview images and thumbnails to the inventories. This
+    is safe to call from several processes at once.
 
-            # If file is not empty then append '\n'
-            data = fobj.read(100)
-            if len(data) > 0:
-                fobj.write("\n")
+    Parameters
+    ----------
+    preview_files : list
+        Names, including path, of new preview images
 
-            # Append file_list at the end of file
-            for file_to_add in file_list:
-                fobj.write(f'{file_to_add}\n')
+    thumbnail_files : list
+        Names, including path, of new thumbnail images
+    """
+    # Filter the preview and thumbnail images by instrument. We do this by
+    # looking for instrument abbreviations in the filenames. But will this
+    # work for level 3 files?? If an instrument abbreviation is not in the
+    # filename, then the preview/thubnail images won't be caught and added here.
+    for abbrev, inst_name in JWST_INSTRUMENT_NAMES_SHORTHAND.items():
+        inst_previews = [ele for ele in preview_files if re.search(abbrev, ele, re.IGNORECASE)]
+        inst_thumbs = [ele for ele in thumbnail_files if abbrev in ele]
 
-        logging.info(f"{filetype} image listfile {filename} updated with new entries.")
+        image_inventory.add_files('preview', inst_name, inst_previews)
+        image_inventory.add_files('thumbnail', inst_name, inst_thumbs)
 
 
 @lock_module
@@ -21,6 +21,15 @@ Use
 
         python monitor_filesystem.py
 
+    The filesystem is crawled with ``os.scandir``, in parallel across
+    the top-level (e.g. proposal) directories of each area. The
+    per-directory results are saved to a manifest in the ``outputs``
+    area, so that subsequent runs only rescan directories whose
+    modification time has changed. Changing a file in place does not
+    change the modification time of its directory, so the ``outputs``
+    and ``logs`` areas, whose files are appended to and overwritten,
+    are rescanned in full on every run.
+
     The user must have a ``config.json`` file in the ``jwql``
     directory with the following keys:
       - ``filesystem`` - The path to the filesystem
@@ -37,7 +46,9 @@ Dependencies
 from collections import defaultdict
 import datetime
 import itertools
+import json
 import logging
+import multiprocessing
 import os
 import subprocess
 
@@ -59,21 +70,24 @@ from jwql.utils.logging_functions import log_info, log_fail
 from jwql.utils.permissions import set_permissions
 from jwql.utils.constants import FILESYSTEM_MONITOR_SUBDIRS, FILE_SUFFIX_TYPES, FILTERS_PER_INSTRUMENT, INSTRUMENT_SERVICE_MATCH
 from jwql.utils.constants import JWST_INSTRUMENT_NAMES, JWST_INSTRUMENT_NAMES_MIXEDCASE, JWST_INSTRUMENT_NAMES_MIXEDCASE
+from jwql.utils.constants import ON_GITHUB_ACTIONS, ON_READTHEDOCS
 from jwql.utils.utils import filename_parser
 from jwql.utils.utils import get_config
 from jwql.utils.monitor_utils import initialize_instrument_monitor, update_monitor_table
 from jwql.utils.protect_module import lock_module
 from jwql.website.apps.jwql.data_containers import get_instrument_proposals
 
-SETTINGS = get_config()
-FILESYSTEM = SETTINGS['filesystem']
-PROPRIETARY_FILESYSTEM = os.path.join(FILESYSTEM, 'proprietary')
-PUBLIC_FILESYSTEM = os.path.join(FILESYSTEM, 'public')
-CENTRAL = SETTINGS['jwql_dir']
-OUTPUTS = SETTINGS['outputs']
-PREVIEW_IMAGES = SETTINGS['preview_image_filesystem']
-THUMBNAILS = SETTINGS['thumbnail_filesystem']
-LOGS = SETTINGS['log_dir']
+if not ON_GITHUB_ACTIONS and not ON_READTHEDOCS:
+    SETTINGS = get_config()
+    FILESYSTEM = SETTINGS['filesystem']
+    PROPRIETARY_FILESYSTEM = os.path.join(FILESYSTEM, 'proprietary')
+    PUBLIC_FILESYSTEM = os.path.join(FILESYSTEM, 'public')
+    CENTRAL = SETTINGS['jwql_dir']
+    OUTPUTS = SETTINGS['outputs']
+    PREVIEW_IMAGES = SETTINGS['preview_image_filesystem']
+    THUMBNAILS = SETTINGS['thumbnail_filesystem']
+    LOGS = SETTINGS['log_dir']
+    MANIFEST_FILE = os.path.join(OUTPUTS, 'monitor_filesystem', 'filesystem_manifest.json')
 
 
 def files_per_filter():
@@ -105,9 +119,276 @@ def files_per_filter():
     return n_files
 
 
-def gather_statistics(general_results_dict, instrument_results_dict):
-    """Walks the filesytem to gather various statistics to eventually
-    store in the database
+def crawl_directory(dirpath):
+    """Tabulate the files directly within ``dirpath`` (i.e. not
+    recursively) using a single ``os.scandir`` pass. As with
+    ``os.walk``, symbolic links to directories are neither counted
+    nor followed.
+
+    Parameters
+    ----------
+    dirpath : str
+        The directory to tabulate
+
+    Returns
+    -------
+    record : dict
+        The number and total size in bytes of all files and of fits
+        files within the directory, the count and size of fits files
+        per instrument and suffix, and the names of subdirectories
+        to descend into.
+    """
+    record = {'file_count': 0, 'file_size': 0, 'fits_count': 0, 'fits_size': 0,
+              'instrument': {}, 'subdirs': []}
+
+    try:
+        entries = list(os.scandir(dirpath))
+    except OSError as e:
+        logging.warning(f'Unable to scan {dirpath}: {e}')
+        return record
+
+    for entry in entries:
+        if entry.is_dir():
+            if not entry.is_symlink():
+                record['subdirs'].append(entry.name)
+            continue
+
+        record['file_count'] += 1
+        try:
+            if not entry.is_file():
+                continue
+            filesize = entry.stat().st_size
+        except OSError:
+            # File removed since the directory was listed
+            continue
+        record['file_size'] += filesize
+
+        if entry.name.endswith('.fits'):
+
+            # Parse out filename information
+            filename_dict = filename_parser(entry.name)
+            if not filename_dict['recognized_filename']:
+                logging.warning((f'While running crawl_directory() on the filesystem {entry.name}, '
+                                 'caused filename_parser() to fail.'))
+                continue
+
+            # For MSA files, which do not have traditional suffixes, set the
+            # suffix to "msa"
+            if 'suffix' not in filename_dict:
+                if filename_dict['filename_type'] == 'stage_2_msa':
+                    filename_dict['suffix'] = 'msa'
+
+            record['fits_count'] += 1
+            record['fits_size'] += filesize
+
+            try:
+                filetype = filename_dict['suffix']
+                instrument = filename_dict['instrument']
+            except KeyError:
+                logging.info(f'File {entry.name} skipped as it contains either no suffix or no instrument name from the filename parser.')
+                continue
+
+            counts = record['instrument'].setdefault(instrument, {}).setdefault(filetype, [0, 0])
+            counts[0] += 1
+            counts[1] += filesize
+
+    record['subdirs'].sort()
+
+    return record
+
+
+def crawl_tree(top, manifest=None):
+    """Recursively tabulate the files in ``top``. Directories whose
+    modification time matches that stored in ``manifest`` are not
+    rescanned; their previous results are reused.
+
+    Parameters
+    ----------
+    top : str
+        The directory at the top of the tree to crawl
+    manifest : dict
+        Results of a previous crawl, keyed by directory path
+
+    Returns
+    -------
+    records : dict
+        Output of ``crawl_directory`` along with the directory
+        modification time (``mtime``, in ns), keyed by directory path,
+        for every directory in the tree
+    """
+    if manifest is None:
+        manifest = {}
+
+    records = {}
+    to_visit = [top]
+    while to_visit:
+        dirpath = to_visit.pop()
+        record = _crawl_if_modified(dirpath, manifest)
+        if record is None:
+            continue
+        records[dirpath] = record
+        to_visit.extend(os.path.join(dirpath, subdir) for subdir in record['subdirs'])
+
+    return records
+
+
+def _crawl_if_modified(dirpath, manifest):
+    """Return the manifest entry for ``dirpath`` if the directory has
+    not been modified since, otherwise rescan it. Returns ``None`` if
+    the directory cannot be accessed."""
+    try:
+        mtime = os.stat(dirpath).st_mtime_ns
+    except OSError:
+        return None
+
+    record = manifest.get(dirpath)
+    if record is None or record['mtime'] != mtime:
+        record = crawl_directory(dirpath)
+        record['mtime'] = mtime
+
+    return record
+
+
+def _crawl_tree_star(args):
+    """Unpack arguments for ``crawl_tree`` when used with
+    ``multiprocessing.Pool.imap_unordered``."""
+    return crawl_tree(*args)
+
+
+def crawl_filesystem(areas, manifest=None, processes=None, rescan=None):
+    """Crawl each of the given areas of the filesystem, distributing the
+    top-level subdirectories (e.g. proposal directories) of each area
+    across a pool of processes. Areas that lie within another area are
+    covered by the crawl of the enclosing area.
+
+    Parameters
+    ----------
+    areas : list
+        Directories to crawl
+    manifest : dict
+        Results of a previous crawl, keyed by directory path
+    processes : int
+        Number of processes to use. Defaults to the ``cores`` setting
+        of the config file.
+    rescan : list
+        Directories within which the manifest is not used, because
+        their files may be modified in place
+
+    Returns
+    -------
+    records : dict
+        Output of ``crawl_tree`` for every directory within ``areas``
+    """
+    if manifest is None:
+        manifest = {}
+    if processes is None:
+        processes = int(SETTINGS['cores'])
+    if rescan:
+        manifest = {dirpath: record for dirpath, record in manifest.items()
+                    if not any(_in_directory(dirpath, directory) for directory in rescan)}
+
+    # Sorting places each area ahead of any areas nested within it
+    roots = []
+    for area in sorted(set(os.path.normpath(area) for area in areas)):
+        if not any(_in_directory(area, root) for root in roots):
+            roots.append(area)
+
+    # Tabulate the top level of each area here, and collect the subdirectories
+    # to be crawled in parallel along with their portion of the manifest
+    records = {}
+    jobs = {}
+    for root in roots:
+        record = _crawl_if_modified(root, manifest)
+        if record is None:
+            logging.warning(f'Unable to access {root}')
+            continue
+        records[root] = record
+        for subdir in records[root]['subdirs']:
+            jobs[os.path.join(root, subdir)] = {}
+
+    for dirpath, record in manifest.items():
+        for root in roots:
+            if _in_directory(dirpath, root) and dirpath != root:
+                job = os.path.join(root, os.path.relpath(dirpath, root).split(os.sep)[0])
+                if job in jobs:
+                    jobs[job][dirpath] = record
+                break
+
+    pool = multiprocessing.Pool(processes=processes)
+    for job_records in pool.imap_unordered(_crawl_tree_star, jobs.items()):
+        records.update(job_records)
+    pool.close()
+    pool.join()
+
+    return records
+
+
+def _in_directory(path, directory):
+    """Return whether ``path`` is ``directory`` or lies within it."""
+    directory = os.path.normpath(directory)
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def _sum_records(records, directory):
+    """Return the total size in bytes of the files in all directories
+    within ``directory``."""
+    return sum(record['file_size'] for dirpath, record in records.items() if _in_directory(dirpath, directory))
+
+
+def load_manifest(filename=None):
+    """Read the results of the previous filesystem crawl.
+
+    Parameters
+    ----------
+    filename : str
+        The manifest file. Defaults to ``MANIFEST_FILE``.
+
+    Returns
+    -------
+    manifest : dict
+        Output of ``crawl_filesystem`` from the previous run. Empty if
+        the manifest does not exist or cannot be read.
+    """
+    if filename is None:
+        filename = MANIFEST_FILE
+
+    try:
+        with open(filename) as fobj:
+            return json.load(fobj)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f'Unable to read filesystem manifest {filename}, rescanning all directories: {e}')
+        return {}
+
+
+def save_manifest(records, filename=None):
+    """Save the results of a filesystem crawl for use in the next run.
+
+    Parameters
+    ----------
+    records : dict
+        Output of ``crawl_filesystem``
+    filename : str
+        The manifest file. Defaults to ``MANIFEST_FILE``.
+    """
+    if filename is None:
+        filename = MANIFEST_FILE
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    # Write to a temporary file first so an interrupted run does not leave
+    # a truncated manifest behind
+    temp_filename = f'{filename}.tmp'
+    with open(temp_filename, 'w') as fobj:
+        json.dump(records, fobj)
+    os.replace(temp_filename, filename)
+    set_permissions(filename)
+
+
+def gather_statistics(general_results_dict, instrument_results_dict, records=None):
+    """Tabulates the filesystem crawl to gather various statistics to
+    eventually store in the database
 
     Parameters
     ----------
@@ -115,6 +396,9 @@ def gather_statistics(general_results_dict, instrument_results_dict):
         A dictionary for the ``filesystem_general`` database table
     instrument_results_dict : dict
         A dictionary for the ``filesystem_instrument`` database table
+    records : dict
+        Output of ``crawl_filesystem``. If ``None``, the filesystem is
+        crawled from scratch.
 
     Returns
     -------
@@ -126,54 +410,30 @@ def gather_statistics(general_results_dict, instrument_results_dict):
 
     logging.info('Gathering stats for filesystem')
 
-    for filesystem_area in [PROPRIETARY_FILESYSTEM, PUBLIC_FILESYSTEM]:
-        for dirpath, _, files in os.walk(filesystem_area):
-            general_results_dict['total_file_count'] += len(files)
-            for filename in files:
-
-                file_path = os.path.join(dirpath, filename)
-                if os.path.isfile(file_path):
-                    general_results_dict['total_file_size'] += os.path.getsize(file_path)
-
-                    if filename.endswith(".fits"):
-
-                        # Parse out filename information
-                        filename_dict = filename_parser(filename)
-                        if filename_dict['recognized_filename']:
-                            filename_type = filename_dict['filename_type']
-                        else:
-                            logging.warning((f'While running gather_statistics() on the filesystem {filename}, '
-                                             'caused filename_parser() to fail.'))
-                            break
-
-                        # For MSA files, which do not have traditional suffixes, set the
-                        # suffix to "msa"
-                        if 'suffix' not in filename_dict:
-                            if filename_dict['filename_type'] == 'stage_2_msa':
-                                filename_dict['suffix'] = 'msa'
-
-                        try:
-                            filetype = filename_dict['suffix']
-                            instrument = filename_dict['instrument']
-                        except KeyError:
-                            logging.info(f'File {filename} skipped as it contains either no suffix or no instrument name from the filename parser.')
-                            filetype = None
-                            instrument = None
-
-                        # Populate general stats
-                        general_results_dict['fits_file_count'] += 1
-                        general_results_dict['fits_file_size'] += os.path.getsize(file_path)
-
-                        if filetype is not None:
-                            # Populate instrument specific stats
-                            if instrument not in instrument_results_dict:
-                                instrument_results_dict[instrument] = {}
-                            if filetype not in instrument_results_dict[instrument]:
-                                instrument_results_dict[instrument][filetype] = {}
-                                instrument_results_dict[instrument][filetype]['count'] = 0
-                                instrument_results_dict[instrument][filetype]['size'] = 0
-                            instrument_results_dict[instrument][filetype]['count'] += 1
-                            instrument_results_dict[instrument][filetype]['size'] += os.path.getsize(file_path) / (2**40)
+    filesystem_areas = [os.path.normpath(PROPRIETARY_FILESYSTEM), os.path.normpath(PUBLIC_FILESYSTEM)]
+    if records is None:
+        records = crawl_filesystem(filesystem_areas)
+
+    for dirpath, record in records.items():
+        if not any(_in_directory(dirpath, area) for area in filesystem_areas):
+            continue
+
+        general_results_dict['total_file_count'] += record['file_count']
+        general_results_dict['total_file_size'] += record['file_size']
+        general_results_dict['fits_file_count'] += record['fits_count']
+        general_results_dict['fits_file_size'] += record['fits_size']
+
+        # Populate instrument specific stats
+        for instrument, filetypes in record['instrument'].items():
+            if instrument not in instrument_results_dict:
+                instrument_results_dict[instrument] = {}
+            for filetype, (count, size) in filetypes.items():
+                if filetype not in instrument_results_dict[instrument]:
+                    instrument_results_dict[instrument][filetype] = {}
+                    instrument_results_dict[instrument][filetype]['count'] = 0
+                    instrument_results_dict[instrument][filetype]['size'] = 0
+                instrument_results_dict[instrument][filetype]['count'] += count
+                instrument_results_dict[instrument][filetype]['size'] += size / (2**40)
 
     # Convert file sizes to terabytes
     general_results_dict['total_file_size'] = general_results_dict['total_file_size'] / (2**40)
@@ -212,7 +472,7 @@ def get_global_filesystem_stats(general_results_dict):
     return general_results_dict
 
 
-def get_area_stats(central_storage_dict):
+def get_area_stats(central_storage_dict, records=None):
     """Gathers ``used`` and ``available`` ``df``-style stats on the
     selected area.
 
@@ -220,6 +480,9 @@ def get_area_stats(central_storage_dict):
     ----------
     central_storage_dict : dict
         A dictionary for the ``central_storage`` database table
+    records : dict
+        Output of ``crawl_filesystem``. If ``None``, the central
+        storage areas are crawled from scratch.
 
     Returns
     -------
@@ -234,6 +497,9 @@ def get_area_stats(central_storage_dict):
              'thumbnails': THUMBNAILS,
              'all': CENTRAL}
 
+    if records is None:
+        records = crawl_filesystem(areas.values())
+
     counteddirs = []
 
     sums = 0  # to be used to count 'all'
@@ -244,7 +510,7 @@ def get_area_stats(central_storage_dict):
         if area not in central_storage_dict:
             central_storage_dict[area] = {}
 
-        fullpath = areas[area]
+        fullpath = os.path.normpath(areas[area])
 
         logging.info('\tSearching directory {}'.format(fullpath))
         counteddirs.append(fullpath)
@@ -260,32 +526,18 @@ def get_area_stats(central_storage_dict):
         central_storage_dict[area]['size'] = total
         central_storage_dict[area]['available'] = free
 
-        # do an os.walk on each directory to count up used space
+        # sum up used space from the crawl of each directory
         if area == 'all':
             # get listing of subdirectories
-            subdirs = [f.path for f in os.scandir(fullpath) if f.is_dir()]
+            subdirs = [os.path.join(fullpath, subdir) for subdir in records.get(fullpath, {}).get('subdirs', [])]
             for onedir in subdirs:
                 if onedir not in counteddirs:
                     logging.info('\tSearching directory {}'.format(onedir))
-                    for dirpath, _, files in os.walk(onedir):
-                        for filename in files:
-                            file_path = os.path.join(dirpath, filename)
-                            # Check if file_path exists, if so, add to used space
-                            exists = os.path.isfile(file_path)
-                            if exists:
-                                filesize = os.path.getsize(file_path)
-                                sums += filesize
+                    sums += _sum_records(records, onedir)
             use = sums / (1024 ** 4)
         else:
-            for dirpath, _, files in os.walk(fullpath):
-                for filename in files:
-                    file_path = os.path.join(dirpath, filename)
-                    # Check if file_path exists, if so, add to used space
-                    exists = os.path.isfile(file_path)
-                    if exists:
-                        filesize = os.path.getsize(file_path)
-                        used += filesize
-                        sums += filesize
+            used = _sum_records(records, fullpath)
+            sums += used
             use = used / (1024 ** 4)
         central_storage_dict[area]['used'] = use
 
@@ -397,14 +649,24 @@ def monitor_filesystem():
     # Initialize dictionaries for database input
     general_results_dict, instrument_results_dict, central_storage_dict = initialize_results_dicts()
 
-    # Walk through filesystem recursively to gather statistics
-    general_results_dict, instrument_results_dict = gather_statistics(general_results_dict, instrument_results_dict)
+    # Crawl the filesystem and central storage areas in a single pass, only
+    # rescanning directories that have changed since the previous run. Files
+    # in the outputs and logs areas are modified in place, so those areas are
+    # always rescanned.
+    manifest = load_manifest()
+    records = crawl_filesystem([PROPRIETARY_FILESYSTEM, PUBLIC_FILESYSTEM, OUTPUTS, LOGS,
+                                PREVIEW_IMAGES, THUMBNAILS, CENTRAL], manifest=manifest,
+                               rescan=[OUTPUTS, LOGS])
+    save_manifest(records)
+
+    # Gather statistics from the crawl
+    general_results_dict, instrument_results_dict = gather_statistics(general_results_dict, instrument_results_dict, records)
 
     # Get df style stats on file system
     general_results_dict = get_global_filesystem_stats(general_results_dict)
 
     # Get stats on central storage areas
-    central_storage_dict = get_area_stats(central_storage_dict)
+    central_storage_dict = get_area_stats(central_storage_dict, records)
 
     # Get stats on number of observations with particular characteristics
     characteristics = get_observation_characteristics()
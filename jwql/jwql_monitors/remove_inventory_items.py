@@ -1,9 +1,9 @@
 #! /usr/bin/env python
 
-"""Remove items from the preview image or thumbnail inventory file based on instrument and/or program number.
-This will open the preview image or thumbnail invnetory file for the given instrument, and delete all lines that
-contain the given string. The location of the preview or thumbnail inventory file to be examined is determined
-using the JWQL config.json file.
+"""Remove items from the preview image or thumbnail inventory based on instrument and/or program number.
+This will open the preview image or thumbnail inventory database, and delete all entries for the given
+instrument that contain the given string. The location of the preview or thumbnail inventory to be examined
+is determined using the JWQL config.json file.
 
 Authors
 -------
@@ -13,11 +13,11 @@ Authors
 Use
 ---
 
-    This script is intended to be executed as shown below. In this example, it will remove all entries from
-    the nircam preview image inventory file that contain the string "jw01022". The -i option is used to
-    designate the instrument. The -p option is used to designate the preview image inventory file ('p')
-    or the thumbnail inventory file ('t'). The -s option is used to define the string to search for in
-    each line.
+    This script is intended to be executed as shown below. In this example, it will remove all nircam entries
+    from the preview image inventory that contain the string "jw01022". The -i option is used to
+    designate the instrument. The -p option is used to designate the preview image inventory ('p')
+    or the thumbnail inventory ('t'). The -s option is used to define the string to search for in
+    each filename.
 
     ::
 
@@ -26,13 +26,13 @@ Use
 """
 
 import argparse
-import os
-from jwql.utils.utils import get_config
+
+from jwql.utils import image_inventory
 
 
 def run(instrument, prev_or_thumb, str_to_exclude):
-    """The main function. Locates the inventory file using config.json, opens
-    it, and removes any lines containing ``str_to_exclude``.
+    """The main function. Opens the inventory located using config.json,
+    and removes any entries containing ``str_to_exclude``.
 
     Parameters
     ----------
@@ -40,45 +40,19 @@ def run(instrument, prev_or_thumb, str_to_exclude):
         Name of instrument, all lowercase. e.g. 'nircam'
 
     prev_or_thumb : str
-        Either 'p', which specifies to work on the preview image inventory file,
-        or 't', indicating to work on the thumbnail inventory file.
+        Either 'p', which specifies to work on the preview image inventory,
+        or 't', indicating to work on the thumbnail inventory.
 
     str_to_exclude : str
-        Any lines in the inventory file contianing this string will be removed.
+        Any entries in the inventory contianing this string will be removed.
     """
-    config = get_config()
-
     if prev_or_thumb == 'p':
-        basedir = config['preview_image_filesystem']
-        filename = f'preview_image_inventory_{instrument}.txt'
+        filetype = 'preview'
     elif prev_or_thumb == 't':
-        basedir = config['thumbnail_filesystem']
-        filename = f'thumbnail_inventory_{instrument}.txt'
-    filename = os.path.join(basedir, filename)
-
-    newlines = []
-    fobj = open(filename, 'r')
-    count = 0
-    while True:
-        count += 1
-
-        # Get next line from file
-        line = fobj.readline()
-
-        # if line is empty
-        # end of file is reached
-        if not line:
-            break
-
-        if str_to_exclude not in line:
-            newlines.append(line)
-    fobj.close()
-
-    os.remove(filename)
+        filetype = 'thumbnail'
 
-    newfile = open(filename, 'w')
-    newfile.writelines((newlines))
-    newfile.close()
+    n_removed = image_inventory.remove_files(filetype, instrument, str_to_exclude)
+    print(f'Removed {n_removed} entries from the {instrument} {filetype} image inventory.')
 
 
 def define_options(parser=None, usage=None, conflict_handler='resolve'):
@@ -83,6 +83,7 @@ import redis
 import shutil
 from subprocess import Popen, PIPE, run, STDOUT
 import sys
+import time
 
 from astropy.io import fits
 
@@ -151,6 +152,12 @@ celery_app.conf.update(task_acks_late=True)
 celery_app.conf.update(worker_concurrency=1)
 celery_app.conf.broker_transport_options = {'visibility_timeout': 14400}
 
+# Minimum and maximum time (in seconds) to wait between checks for finished tasks when
+# collecting the results of parallel pipeline calls. The wait time doubles each time no
+# task has finished, and is reset to the minimum whenever one does.
+RESULT_POLL_MIN_INTERVAL = 1.
+RESULT_POLL_MAX_INTERVAL = 60.
+
 
 def only_one(function=None, key="", timeout=None):
     """Enforce only one of the function running at a time. Import as decorator."""
@@ -764,7 +771,7 @@ def run_pipeline(input_file, in_ext, ext_or_exts, instrument, jump_pipe=False):
     return output
 
 
-def run_parallel_pipeline(input_files, in_ext, ext_or_exts, instrument, jump_pipe=False, step_args={}):
+def run_parallel_pipeline(input_files, in_ext, ext_or_exts, instrument, jump_pipe=False, step_args={}, callback=None):
     """Convenience function for using the ``run_calwebb_detector1`` function on a list of
     data files, breaking them into parallel celery calls, collecting the results together,
     and returning the results as another list. In particular, this function will do the
@@ -779,6 +786,11 @@ def run_parallel_pipeline(input_files, in_ext, ext_or_exts, instrument, jump_pip
     - Delete the input file from the transfer location
     - Delete the output files from the transfer location
 
+    Results are collected in the order in which the tasks finish, rather than the order
+    in which they were submitted. As soon as a task finishes, its output files are
+    retrieved, its lock is released, and ``callback`` (if provided) is called, so that a
+    slow calibration does not hold up the files that have already been calibrated.
+
     It will then return what it was given – either a single file+path or a list of
     files+paths, depending on what ``out_exts`` was provided as.
 
@@ -810,6 +822,11 @@ def run_parallel_pipeline(input_files, in_ext, ext_or_exts, instrument, jump_pip
         are the step names (as seen in pipeline_tools.PIPELINE_STEP_MAPPING). Each value is a
         dictionary of keyword value pairs that are relevant for that step.
 
+    callback : function
+        Optional function to be called for each successfully calibrated file as soon as
+        its outputs have been retrieved. It is called as ``callback(input_file, outputs)``,
+        where ``outputs`` is the name (or names) of the result file(s) for ``input_file``.
+
     Returns
     -------
     file_or_files : str or list-of-str
@@ -839,23 +856,41 @@ def run_parallel_pipeline(input_files, in_ext, ext_or_exts, instrument, jump_pip
             logging.info("\tStarting {} with ID {}".format(short_name, results[short_name].id))
         logging.info("Celery tasks submitted.")
         logging.info("Waiting for task results")
-        for short_name in results:
-            try:
-                logging.info("\tWaiting for {} ({})".format(short_name, results[short_name].id))
-                processed_path = results[short_name].get()
-                logging.info("\t{} retrieved".format(short_name))
-                outputs[input_file_paths[short_name]] = retrieve_files(short_name, ext_or_exts, output_dirs[short_name])
-                logging.info("\tFiles copied for {}".format(short_name))
-            except Exception as e:
-                logging.error('\tPipeline processing failed for {}'.format(short_name))
-                logging.error('\tProcessing raised {}'.format(e))
+        pending = dict(results)
+        poll_interval = RESULT_POLL_MIN_INTERVAL
+        while len(pending) > 0:
+            finished = [short_name for short_name in pending if pending[short_name].ready()]
+            if len(finished) == 0:
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, RESULT_POLL_MAX_INTERVAL)
+                continue
+            poll_interval = RESULT_POLL_MIN_INTERVAL
+
+            for short_name in finished:
+                result = pending.pop(short_name)
+                input_file = input_file_paths[short_name]
+                try:
+                    processed_path = result.get()
+                    logging.info("\t{} retrieved".format(short_name))
+                    outputs[input_file] = retrieve_files(short_name, ext_or_exts, output_dirs[short_name])
+                    logging.info("\tFiles copied for {}".format(short_name))
+                except Exception as e:
+                    logging.error('\tPipeline processing failed for {}'.format(short_name))
+                    logging.error('\tProcessing raised {}'.format(e))
+                finally:
+                    locks.pop(short_name).release()
+                    logging.info("\tReleased Lock {}".format(short_name))
+
+                if callback is not None and input_file in outputs:
+                    callback(input_file, outputs[input_file])
         logging.info("Finished retrieving results")
     finally:
-        logging.info("Releasing locks")
-        for short_name in locks:
-            locks[short_name].release()
-            logging.info("\tReleased Lock {}".format(short_name))
-        logging.info("Finished releasing locks")
+        if len(locks) > 0:
+            logging.info("Releasing locks")
+            for short_name in locks:
+                locks[short_name].release()
+                logging.info("\tReleased Lock {}".format(short_name))
+            logging.info("Finished releasing locks")
 
     logging.info("Pipeline Call Completed")
     return outputs
@@ -12,10 +12,17 @@ Use
     mock various software functionality.
 """
 
+from collections import namedtuple
+
+from astropy.time import Time
+import numpy as np
 import pandas as pd
 
+from jwql.edb.telemetry_cache import to_unix
 from jwql.utils.utils import get_config
 
+EngdbValue = namedtuple('EngdbValue', ['obstime', 'value'])
+
 
 def has_test_db():
     try:
@@ -84,3 +91,29 @@ class MockPostRequest(object):
         self.GET = dict()
         self.POST = dict()
         self._messages = MockMessages()
+
+
+class MockEngdbService(object):
+    """Mock ``ENGDB_Service``, holding one value every 10 minutes over
+    three days from ``start`` (in seconds since the Unix epoch), and
+    recording the queries made."""
+    def __init__(self, start):
+        self.times = start + np.arange(0, 3 * 86400, 600.)
+        self.values = np.arange(len(self.times), dtype=float)
+        self.meta_queries = 0
+        self.queries = []
+
+    def get_meta(self, mnemonic_identifier):
+        self.meta_queries += 1
+        return {'TlmMnemonics': [{'TlmMnemonic': mnemonic_identifier, 'AllPoints': 0}]}
+
+    def get_values(self, mnemonic_identifier, starttime, endtime, include_obstime=False,
+                   include_bracket_values=False):
+        start, end = to_unix(starttime), to_unix(endtime)
+        self.queries.append((start, end))
+        index = np.where((self.times >= start) & (self.times <= end))[0]
+        if include_bracket_values:
+            before = np.where(self.times < start)[0]
+            after = np.where(self.times > end)[0]
+            index = np.concatenate([before[-1:], index, after[:1]])
+        return [EngdbValue(Time(self.times[i], format='unix'), self.values[i]) for i in index]
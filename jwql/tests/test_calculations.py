@@ -91,6 +91,24 @@ def test_mean_image():
     assert np.all(dev_img == 0.5)
 
 
+def test_mean_image_blocks():
+    """Test that processing the cube in blocks of rows gives results
+    identical to sigma-clipping the entire cube at once"""
+
+    rng = np.random.default_rng(seed=42)
+    cube = rng.normal(loc=1., scale=0.1, size=(30, 17, 11)).astype(np.float32)
+    cube[rng.random(cube.shape) < 0.02] = 50.
+    cube[:, 6, 7] = np.nan
+
+    full_mean, full_dev = calculations.mean_image(cube, sigma_threshold=3)
+
+    # Force blocks of a single row, and of a few rows with a partial final block
+    for memory_limit in [1, 30 * 11 * 48 * 5]:
+        mean_img, dev_img = calculations.mean_image(cube, sigma_threshold=3, memory_limit=memory_limit)
+        assert np.array_equal(mean_img, full_mean, equal_nan=True)
+        assert np.array_equal(dev_img, full_dev, equal_nan=True)
+
+
 def test_mean_stdev():
     """Test calcualtion of the sigma-clipped mean from an image"""
 
@@ -128,12 +128,12 @@ def test_group_before():
     jump_locations = [(2, 1, 1)]
     cr.nints = 1
 
-    assert cr.group_before(jump_locations) == [(1, 1, 1)]
+    assert np.array_equal(cr.group_before(jump_locations), [(1, 1, 1)])
 
     jump_locations = [(1, 2, 1, 1)]
     cr.nints = 2
 
-    assert cr.group_before(jump_locations) == [(1, 1, 1, 1)]
+    assert np.array_equal(cr.group_before(jump_locations), [(1, 1, 1, 1)])
 
 
 @pytest.mark.skipif(ON_GITHUB_ACTIONS, reason='Requires access to central storage.')
@@ -169,6 +169,20 @@ def test_magnitude_fake_data():
     assert mag == 10.
 
 
+def test_get_jump_locs():
+    """Test that jump locations are found from the DQ array"""
+    dq = np.zeros((2, 5, 10, 10), dtype=np.uint32)
+    dq[0, 3, 4, 4] = 4
+    dq[1, 2, 2, 2] = 4 + 1
+
+    cr = CosmicRay()
+    jump_locs = cr.get_jump_locs(dq)
+    assert np.array_equal(jump_locs, [(0, 3, 4, 4), (1, 2, 2, 2)])
+
+    jump_locs = cr.get_jump_locs(np.zeros((5, 10, 10), dtype=np.uint32))
+    assert len(jump_locs) == 0
+
+
 def test_get_cr_mags_fake_data():
     """Test the calculation of multiple CR magnitudes"""
     data, rate, header, jump_coords, prior_coords = define_fake_test_data()
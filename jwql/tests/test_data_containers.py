@@ -474,6 +474,33 @@ def test_get_image_info():
         assert key in image_info
 
 
+def test_preview_image_ints(tmp_path):
+    """Tests that the preview image index finds the integrations of a
+    rootname's preview images, and is updated when images are added."""
+    directory = str(tmp_path)
+    for name in ['jw01068001001_02102_00001_nrcb1_rate_integ0.jpg',
+                 'jw01068001001_02102_00001_nrcb1_rate_integ2.jpg',
+                 'jw01068001001_02102_00001_nrcb1_cal_integ0.jpg',
+                 'jw01068001001_02102_00001_nrcb2_rate_integ1.jpg',
+                 'jw01068001001_02102_00002_nrcb1_rate_integ0.jpg',
+                 'jw01068001001_02102_00001_nrcb1_rate_integ0.thumb']:
+        open(os.path.join(directory, name), 'w').close()
+
+    ints = data_containers._preview_image_ints(directory, 'jw01068001001_02102_00001')
+    assert ints == {'jw01068001001_02102_00001_nrcb1_cal': [0],
+                    'jw01068001001_02102_00001_nrcb1_rate': [0, 2],
+                    'jw01068001001_02102_00001_nrcb2_rate': [1]}
+
+    # New preview images are found once the directory has changed
+    open(os.path.join(directory, 'jw01068001001_02102_00001_nrcb1_rate_integ1.jpg'), 'w').close()
+    os.utime(directory, (0, 0))
+    ints = data_containers._preview_image_ints(directory, 'jw01068001001_02102_00001_nrcb1')
+    assert ints == {'jw01068001001_02102_00001_nrcb1_cal': [0],
+                    'jw01068001001_02102_00001_nrcb1_rate': [0, 1, 2]}
+
+    assert data_containers._preview_image_ints(str(tmp_path / 'missing'), 'jw01068') == {}
+
+
 def test_get_instrument_proposals():
     """Tests the ``get_instrument_proposals`` function."""
     # queries MAST, no need for central storage
@@ -602,6 +629,26 @@ def test_get_thumbnail_by_rootname():
     assert preview_images == 'none'
 
 
+def test_match_and_select_thumbnail():
+    """Tests that thumbnails are selected from a cached directory listing
+    the same way ``get_thumbnail_by_rootname`` selects them from a glob."""
+    listing = sorted(['jw01068001001_02102_00001_nrcb1_dark_integ0.thumb',
+                      'jw01068001001_02102_00001_nrcb1_rate_integ0.thumb',
+                      'jw01068001001_02102_00001_nrcb2_dark_integ0.thumb',
+                      'jw01068002001_02102_00001_nrcb1_rate_integ0.thumb'])
+
+    matches = data_containers._match_thumbnails('jw01068001001_02102_00001_nrcb1', listing)
+    assert matches == listing[:2]
+    assert data_containers._select_thumbnail(matches) == 'jw01068001001_02102_00001_nrcb1_rate_integ0.thumb'
+
+    matches = data_containers._match_thumbnails('jw01068001001_02102_00001_nrcb2', listing)
+    assert data_containers._select_thumbnail(matches) == 'jw01068001001_02102_00001_nrcb2_dark_integ0.thumb'
+
+    matches = data_containers._match_thumbnails('jw01068003001_02102_00001_nrcb1', listing)
+    assert matches == []
+    assert data_containers._select_thumbnail(matches) == 'none'
+
+
 def test_mast_query_by_rootname():
     """Tests the ``mast_query_by_rootname`` function."""
     instrument = 'NIRCam'
@@ -646,6 +693,28 @@ def test_mast_query_by_rootname():
     assert isinstance(defaults, dict)
 
 
+def test_mast_query_by_proposal(mocker):
+    """Tests the ``mast_query_by_proposal`` function, using a mocked MAST
+    response."""
+    class MockResponse():
+        def json(self):
+            return {'data': [{'filename': 'jw02767002001_02103_00005_nrcb4_uncal.fits', 'detector': 'NRCB4'},
+                             {'filename': 'jw02767002001_02103_00005_nrcb4_rate.fits', 'detector': 'NRCB4'},
+                             {'filename': 'jw02084001001_04103_00001-seg003_nrca3_rate.fits', 'detector': 'NRCA3'}]}
+
+    mock_request = mocker.patch.object(data_containers.Mast, 'service_request_async', return_value=[MockResponse()])
+    result = data_containers.mast_query_by_proposal('nircam', '2767')
+
+    service, params = mock_request.call_args[0]
+    assert service == constants.INSTRUMENT_SERVICE_MATCH['NIRCam']
+    assert params['columns'] == '*'
+    assert params['filters'] == [{'paramName': 'program', 'values': ['2767']}]
+
+    assert list(result.keys()) == ['jw02767002001_02103_00005_nrcb4', 'jw02084001001_04103_00001-seg003_nrca3']
+    assert result['jw02767002001_02103_00005_nrcb4']['filename'] == 'jw02767002001_02103_00005_nrcb4_uncal.fits'
+    assert result['jw02084001001_04103_00001-seg003_nrca3']['detector'] == 'NRCA3'
+
+
 @pytest.mark.skipif(ON_GITHUB_ACTIONS, reason='Requires access to central storage.')
 def test_thumbnails_ajax():
     """Tests the ``get_thumbnails_ajax`` function."""
@@ -17,8 +17,10 @@ Use
 
         pytest -s test_edb.py
 """
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import os
+import time
 
 from astropy.table import Table
 from astropy.time import Time
@@ -28,6 +30,8 @@ import numpy as np
 import pytest
 
 from jwql.edb import engineering_database as ed
+from jwql.edb.telemetry_cache import TelemetryCache
+from jwql.tests.resources import MockEngdbService
 from jwql.utils.constants import ON_GITHUB_ACTIONS
 
 
@@ -79,6 +83,57 @@ def test_change_only_bounding_points():
     assert np.all(new_values == expected_values)
 
 
+def test_block_stats():
+    """Test that statistics are calculated for each block, ignoring the
+    given values and blocks made up only of ignored values
+    """
+    dates = np.array([datetime(2021, 12, 18, 7, n, 0) for n in range(20, 28)])
+    tab = Table()
+    tab["dates"] = dates
+    tab["euvalues"] = np.array([5., 5., 0., 0., 0., 7., 7., 0.])
+    mnemonic = ed.EdbMnemonic('SOMETHING', dates[0], dates[-1], tab, {}, {}, blocks=[0, 3, 5, 8])
+    mnemonic.meta = {'TlmMnemonics': [{'AllPoints': 1}]}
+
+    mnemonic.block_stats(ignore_vals=[0.])
+    assert np.all(mnemonic.mean == np.array([5., 7.]))
+    assert np.all(mnemonic.max == np.array([5., 7.]))
+    assert mnemonic.median_times == [datetime(2021, 12, 18, 7, 21, 0), datetime(2021, 12, 18, 7, 26, 0)]
+
+
+def test_change_only_add_points():
+    """Make sure that a point is added before each change in a set of
+    change-only data
+    """
+    dates = np.array([datetime(2022, 3, 2, 12, i) for i in range(3)])
+    tab = Table()
+    tab["dates"] = dates
+    tab["euvalues"] = np.array([1., 5., 2.])
+    mnemonic = ed.EdbMnemonic('SOMETHING', dates[0], dates[-1], tab, {'TlmMnemonics': [{'AllPoints': 0}]}, {})
+    mnemonic.change_only_add_points()
+
+    delta_t = timedelta(microseconds=1)
+    expected_dates = [dates[0], dates[1] - delta_t, dates[1], dates[2] - delta_t, dates[2]]
+    assert all(mnemonic.data["dates"].data == expected_dates)
+    assert all(mnemonic.data["euvalues"].data == np.array([1., 1., 5., 5., 2.]))
+    assert mnemonic.meta['TlmMnemonics'][0]['AllPoints'] == 1
+
+
+def test_change_only_stats():
+    """Test that the statistics of change-only data are weighted by the
+    time that each value lasts
+    """
+    dates = [datetime(2022, 3, 2, 12, 0, 0), datetime(2022, 3, 2, 12, 0, 10), datetime(2022, 3, 2, 12, 0, 30)]
+    values = [1., 2., 3.]
+    meanval, medianval, stdevval, maxval, minval = ed.change_only_stats(dates, values)
+    assert np.isclose(meanval, 50. / 30.)
+    assert medianval == 2.
+    assert maxval == 3.
+    assert minval == 1.
+
+    # Times may also be given as datetime64 values
+    assert ed.change_only_stats(np.array(dates, dtype='datetime64[us]'), values)[1] == 2.
+
+
 def test_daily_stats():
     """Test that the daily statistics are calculated correctly
     """
@@ -101,6 +156,14 @@ def test_daily_stats():
     assert np.all(mnemonic.stdev == np.array([0., 0., 0., 0.]))
 
 
+def test_find_segments():
+    """Test that the data within each time range are found"""
+    dates = np.array([0, 1, 1, 2, 5, 6])
+    firsts, lasts = ed.find_segments(dates, np.array([0, 1, 3, 7]), np.array([1, 3, 5, 8]))
+    assert np.all(firsts == [0, 1, 4, 6])
+    assert np.all(lasts == [1, 4, 4, 6])
+
+
 def test_full_stats():
     """Test that the statistics calculated over the entire data set are
     correct
@@ -269,6 +332,31 @@ def test_multiplication():
     assert prod.info['tlmMnemonic'] == 'TEST_VOLTAGE * TEST_CURRENT'
 
 
+def test_prefetch_then_get_mnemonic(tmp_path, mocker):
+    """Test that recent values retrieved by prefetch_mnemonics are not
+    queried again by get_mnemonic"""
+    now = time.time()
+    service = MockEngdbService(now - 2 * 86400)
+    cache = TelemetryCache(str(tmp_path), service)
+    mocker.patch.object(ed, 'get_telemetry_cache', return_value=cache)
+    mocker.patch.object(ed, 'get_mnemonic_info', return_value={'description': 'FGS field of view'})
+
+    # A window ending within the settle time of the cache
+    start_time = datetime.fromtimestamp(now - 6 * 3600, timezone.utc).replace(tzinfo=None)
+    end_time = datetime.fromtimestamp(now - 2 * 3600, timezone.utc).replace(tzinfo=None)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = ed.prefetch_mnemonics([('SA_ZFGOUTFOV', start_time, end_time)], executor)
+        for future in futures['SA_ZFGOUTFOV']:
+            future.result()
+    n_queries = len(service.queries)
+    assert n_queries > 0
+
+    mnemonic = ed.get_mnemonic('SA_ZFGOUTFOV', start_time, end_time)
+    assert len(service.queries) == n_queries
+    assert service.meta_queries == 1
+    assert len(mnemonic) > 0
+
+
 def test_timed_stats():
     """Break up data into chunks of a given duration"""
     dates = np.array([datetime(2021, 12, 18, 12, 0, 0) + timedelta(hours=n) for n in range(0, 75, 2)])
@@ -0,0 +1,231 @@
+#! /usr/bin/env python
+
+"""Tests for the ``generate_preview_images`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_generate_preview_images.py
+"""
+
+import logging
+import os
+import random
+import re
+
+from astropy.io import fits
+import numpy as np
+import pytest
+
+from jwql.jwql_monitors.generate_preview_images import array_coordinates, collect_results, create_mosaic, \
+    estimate_cost, get_base_output_name, group_filenames, log_throughput, run_task, update_inventory
+from jwql.utils.constants import NIRCAM_LONGWAVE_DETECTORS, NIRCAM_SHORTWAVE_DETECTORS
+from jwql.utils.utils import filename_parser
+
+
+def regex_group_filenames(filenames):
+    """Reference implementation of ``group_filenames``, matching a
+    regular expression built from each file against every other file.
+    """
+    grouped, matched_names = [], []
+    filenames.sort()
+    for filename in filenames:
+        subgroup = []
+        filename_dict = filename_parser(os.path.basename(filename))
+        if not filename_dict['recognized_filename']:
+            break
+        if filename not in matched_names:
+            if 'stage_3' in filename_dict['filename_type']:
+                matched_names.append(filename)
+                subgroup.append(filename)
+            elif filename_dict['filename_type'] == 'stage_1_and_2':
+                if filename_dict['detector'].upper() in NIRCAM_SHORTWAVE_DETECTORS:
+                    detector_str = 'NRC[AB][1234]'
+                elif filename_dict['detector'].upper() in NIRCAM_LONGWAVE_DETECTORS:
+                    detector_str = 'NRC[AB]5'
+                else:
+                    detector_str = filename_dict['detector'].upper()
+                match_str = '{}{}_{}.fits'.format(get_base_output_name(filename_dict), detector_str,
+                                                  filename_dict['suffix'])
+                pattern = re.compile(os.path.join(os.path.dirname(filename), match_str), re.IGNORECASE)
+                for file_to_match in filenames:
+                    if pattern.match(file_to_match) is not None:
+                        matched_names.append(file_to_match)
+                        subgroup.append(file_to_match)
+            else:
+                matched_names.append(filename)
+                subgroup.append(filename)
+        if len(subgroup) > 0:
+            grouped.append(subgroup)
+    return grouped
+
+
+def synthetic_filenames(n_exposures, seed=0):
+    """Create a shuffled list of NIRCam, NIRSpec, time series and
+    stage 3 filenames spread over a few directories"""
+    rng = random.Random(seed)
+    detectors = ['nrca1', 'nrca2', 'nrca3', 'nrca4', 'nrcb1', 'nrcb2', 'nrcb3', 'nrcb4', 'nrca5', 'nrcb5',
+                 'nrcalong', 'nrs1', 'nrs2', 'mirimage']
+    filenames = []
+    for i in range(n_exposures):
+        directory = f'/data/jw01068/jw01068{rng.randint(1, 3):03d}001'
+        rootname = f'jw01068{rng.randint(1, 3):03d}001_0210{rng.randint(1, 2)}_{rng.randint(1, 4):05d}'
+        suffix = rng.choice(['rate', 'cal', 'uncal'])
+        for detector in rng.sample(detectors, rng.randint(1, 6)):
+            filenames.append(os.path.join(directory, f'{rootname}_{detector}_{suffix}.fits'))
+        if i % 7 == 0:
+            filenames.append(os.path.join(directory, f'{rootname}-seg001_nrca1_{suffix}ints.fits'))
+        if i % 11 == 0:
+            filenames.append(os.path.join(directory, f'jw01068-o00{rng.randint(1, 3)}_t001_nircam_clear-f090w_i2d.fits'))
+    rng.shuffle(filenames)
+    return filenames
+
+
+def test_group_filenames():
+    """Test that NIRCam files from the same exposure and channel are
+    grouped, and that all other files are kept separate"""
+    directory = '/data/jw01068/jw01068001001'
+    sw = [os.path.join(directory, f'jw01068001001_02102_00001_{det}_rate.fits') for det in ['nrca1', 'nrca2', 'nrcb4']]
+    lw = [os.path.join(directory, f'jw01068001001_02102_00001_{det}_rate.fits') for det in ['nrca5', 'nrcb5']]
+    other_suffix = [os.path.join(directory, 'jw01068001001_02102_00001_nrca1_cal.fits')]
+    other_dir = [os.path.join('/elsewhere', 'jw01068001001_02102_00001_nrca3_rate.fits')]
+    nirspec = [os.path.join(directory, f'jw01068001001_02102_00001_{det}_rate.fits') for det in ['nrs1', 'nrs2']]
+    stage3 = [os.path.join(directory, 'jw01068-o001_t001_nircam_clear-f090w_i2d.fits')]
+
+    filenames = sw + lw + other_suffix + other_dir + nirspec + stage3
+    grouped = group_filenames(list(reversed(filenames)))
+
+    expected = [other_dir, stage3, other_suffix, sw, lw, nirspec[:1], nirspec[1:]]
+    assert sorted(grouped) == sorted(expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_group_filenames_parity(seed):
+    """Test that grouping by exposure key gives the same groups, in the
+    same order, as matching each file against every other file"""
+    filenames = synthetic_filenames(60, seed=seed)
+    expected = regex_group_filenames(list(filenames))
+
+    assert group_filenames(list(filenames)) == expected
+
+    # Duplicated entries and unrecognized filenames are handled the same way
+    filenames = filenames + filenames[:10] + ['/data/jw01068/not_a_jwst_file.fits']
+    expected = regex_group_filenames(list(filenames))
+    assert group_filenames(list(filenames)) == expected
+
+
+def test_collect_results(mocker):
+    """Make sure that new images are added to the inventories in
+    batches, and that the totals cover every result"""
+    update_inventory = mocker.patch('jwql.jwql_monitors.generate_preview_images.update_inventory')
+    results = [([f'preview{i}.jpg'], [f'thumb{i}.thumb'], 100 * i, float(i)) for i in range(5)]
+
+    n_previews, n_thumbnails, n_bytes, latencies = collect_results(iter(results), batch_size=4)
+
+    batches = [(len(call.args[0]), len(call.args[1])) for call in update_inventory.call_args_list]
+    assert batches == [(2, 2), (2, 2), (1, 1)]
+    added = [name for call in update_inventory.call_args_list for name in call.args[0]]
+    assert added == [f'preview{i}.jpg' for i in range(5)]
+    assert (n_previews, n_thumbnails, n_bytes) == (5, 5, 1000)
+    assert latencies == [0., 1., 2., 3., 4.]
+
+
+def test_estimate_cost(tmp_path, mocker):
+    """Make sure that larger files are estimated to be more expensive,
+    without opening the files"""
+    tasks = []
+    for name, shape in [('small', (10, 10)), ('large', (100, 100))]:
+        filename = str(tmp_path / f'{name}.fits')
+        fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(np.zeros(shape), name='SCI')]).writeto(filename)
+        tasks.append((filename, str(tmp_path), str(tmp_path)))
+    tasks.append((str(tmp_path / 'missing.fits'), str(tmp_path), str(tmp_path)))
+
+    mock_fits = mocker.patch('jwql.jwql_monitors.generate_preview_images.fits')
+    costs = [estimate_cost(task) for task in tasks]
+    assert costs == [os.path.getsize(tasks[0][0]), os.path.getsize(tasks[1][0]), 0]
+    assert costs[0] < costs[1]
+    assert not mock_fits.mock_calls
+
+
+def test_log_throughput(caplog):
+    """Make sure that the rates and the histogram of the time taken per
+    file are logged"""
+    caplog.set_level(logging.INFO)
+    log_throughput([0.5, 1.5, 1.8, 400.], 8e6, 2.)
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == 'Processed 4 files (8.0 MB) in 2.0 s: 2.00 files/s, 4.00 MB/s'
+    assert '\t< 1 s: 1' in messages
+    assert '\t1-2 s: 2' in messages
+    assert '\t>= 300 s: 1' in messages
+
+    caplog.clear()
+    log_throughput([], 0, 0.)
+    assert len(caplog.records) == 0
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_create_mosaic(tmp_path, max_workers):
+    """Make sure that each detector's difference images are placed in
+    the mosaic, and that the rest of the mosaic is NaN"""
+    rng = np.random.default_rng(0)
+    lower_left = (1889, 1889)
+    filenames, diffs = [], {}
+    for detector in ['NRCA1', 'NRCA3']:
+        data = rng.integers(0, 1000, size=(2, 3, 160, 160)).astype(np.uint16)
+        primary = fits.PrimaryHDU()
+        primary.header['SUBSTRT1'], primary.header['SUBSTRT2'] = lower_left
+        filename = str(tmp_path / f'jw01068001001_02102_00001_{detector.lower()}_uncal.fits')
+        fits.HDUList([primary, fits.ImageHDU(data, name='SCI')]).writeto(filename)
+        filenames.append(filename)
+        diffs[detector] = data[:, -1, :, :].astype(np.float32) - data[:, 0, :, :]
+
+    mosaic, dq = create_mosaic(filenames, max_workers=max_workers)
+
+    xdim, ydim, lowerlefts = array_coordinates('SWA', list(diffs), [lower_left] * 2)
+    assert mosaic.shape == (2, ydim, xdim)
+    assert mosaic.dtype == np.float32
+    assert dq.shape == (ydim, xdim)
+
+    covered = np.zeros(mosaic.shape, dtype=bool)
+    for detector, diff in diffs.items():
+        x0, y0 = lowerlefts[detector]
+        assert np.array_equal(mosaic[:, y0: y0 + 160, x0: x0 + 160], diff)
+        covered[:, y0: y0 + 160, x0: x0 + 160] = True
+    assert np.all(np.isnan(mosaic[~covered]))
+
+
+def test_run_task(tmp_path, mocker):
+    """Make sure that the outputs of ``process_file`` are returned with
+    the file size and the time taken"""
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_rate.fits')
+    with open(filename, 'wb') as fobj:
+        fobj.write(b'\0' * 2880)
+    process_file = mocker.patch('jwql.jwql_monitors.generate_preview_images.process_file',
+                                return_value=(['preview.jpg'], ['thumb.thumb']))
+
+    task = (filename, str(tmp_path), str(tmp_path))
+    previews, thumbnails, file_size, latency = run_task(task)
+    process_file.assert_called_once_with(*task)
+    assert (previews, thumbnails, file_size) == (['preview.jpg'], ['thumb.thumb'], 2880)
+    assert latency >= 0
+
+
+def test_update_inventory(mocker):
+    """Make sure that images are added to the inventory of the
+    instrument named in their filenames"""
+    add_files = mocker.patch('jwql.jwql_monitors.generate_preview_images.image_inventory.add_files')
+    previews = ['/previews/jw01068/jw01068001001_02102_00001_nrcb1_rate_integ0.jpg',
+                '/previews/jw02589/jw02589006001_04101_00001-seg002_nrs2_rate_integ0.jpg']
+    thumbnails = ['/thumbs/jw01068/jw01068001001_02102_00001_nrcb1_rate_integ0.thumb']
+    update_inventory(previews, thumbnails)
+
+    calls = {(call.args[0], call.args[1]): call.args[2] for call in add_files.call_args_list}
+    assert calls[('preview', 'nircam')] == previews[:1]
+    assert calls[('preview', 'nirspec')] == previews[1:]
+    assert calls[('thumbnail', 'nircam')] == thumbnails
+    assert calls[('thumbnail', 'nirspec')] == []
+    assert calls[('preview', 'miri')] == []
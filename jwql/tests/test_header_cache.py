@@ -0,0 +1,109 @@
+#! /usr/bin/env python
+
+"""Tests for the ``header_cache`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_header_cache.py
+"""
+
+import json
+import sqlite3
+
+from astropy.io import fits
+import numpy as np
+
+from jwql.utils import header_cache
+
+
+def make_file(filename, nints):
+    """Write a small fits file with a primary and a science extension"""
+    primary = fits.PrimaryHDU()
+    primary.header['NINTS'] = nints
+    primary.header['HISTORY'] = 'first'
+    primary.header['HISTORY'] = 'second'
+    sci = fits.ImageHDU(np.zeros((nints, 4, 5), dtype=np.float32), name='SCI')
+    fits.HDUList([primary, sci]).writeto(filename, overwrite=True)
+
+
+def test_get_headers(tmp_path):
+    """Test that the headers of every extension are returned"""
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_rate.fits')
+    cache_file = str(tmp_path / 'header_cache.db')
+    make_file(filename, 3)
+
+    headers = header_cache.get_headers(filename, cache_file=cache_file)
+    assert [header['EXTNAME'] for header in headers] == ['PRIMARY', 'SCI']
+    assert [header['XTENSION'] for header in headers] == ['PRIMARY', 'IMAGE']
+
+    header = header_cache.get_header(filename, cache_file=cache_file)
+    assert header['NINTS'] == 3
+    assert 'first' in header['HISTORY'] and 'second' in header['HISTORY']
+    assert header_cache.get_header(filename, 'SCI', cache_file=cache_file)['NAXIS3'] == 3
+    assert header_cache.get_header(filename, 1, cache_file=cache_file)['NAXIS3'] == 3
+
+
+def test_cache_is_used(tmp_path, mocker):
+    """Test that files are only read once, from any process, unless
+    they change"""
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_rate.fits')
+    cache_file = str(tmp_path / 'header_cache.db')
+    make_file(filename, 3)
+
+    read_headers = mocker.spy(header_cache, 'read_headers')
+    header_cache.warm_cache([filename], cache_file=cache_file)
+    assert read_headers.call_count == 1
+
+    # A new process has nothing in memory, and uses the database
+    header_cache.load_headers.cache_clear()
+    assert header_cache.get_header(filename, cache_file=cache_file)['NINTS'] == 3
+    assert read_headers.call_count == 1
+
+    # Changed files are read again
+    make_file(filename, 7)
+    assert header_cache.get_header(filename, cache_file=cache_file)['NINTS'] == 7
+    assert read_headers.call_count == 2
+
+
+def test_stored_as_json(tmp_path):
+    """Test that headers are stored as JSON, and that entries that are
+    not JSON are replaced"""
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_rate.fits')
+    cache_file = str(tmp_path / 'header_cache.db')
+    make_file(filename, 3)
+    header_cache.get_headers(filename, cache_file=cache_file)
+
+    connection = sqlite3.connect(cache_file)
+    stored = json.loads(connection.execute('SELECT headers FROM headers').fetchone()[0])
+    assert stored[0]['values'][stored[0]['keywords'].index('NINTS')] == 3
+
+    with connection:
+        connection.execute('UPDATE headers SET headers = ?', (b'\x80\x04not json',))
+    connection.close()
+
+    header_cache.load_headers.cache_clear()
+    assert header_cache.get_header(filename, cache_file=cache_file)['NINTS'] == 3
+
+
+def test_unusable_cache(tmp_path, mocker):
+    """Test that headers are read from the file when the cache cannot
+    be opened or written"""
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_rate.fits')
+    make_file(filename, 3)
+
+    cache_file = str(tmp_path / 'missing_directory' / 'header_cache.db')
+    assert header_cache.get_header(filename, cache_file=cache_file)['NINTS'] == 3
+
+    cache_file = str(tmp_path / 'header_cache.db')
+    header_cache.connect(cache_file).close()
+    connect = mocker.patch.object(header_cache, 'connect')
+    connect.return_value.execute.side_effect = sqlite3.OperationalError('database is locked')
+    connect.return_value.__enter__.return_value = connect.return_value
+    header_cache.load_headers.cache_clear()
+    assert header_cache.get_header(filename, cache_file=cache_file)['NINTS'] == 3
+    connect.return_value.close.assert_called_once()
@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+
+"""Tests for the ``image_inventory`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_image_inventory.py
+"""
+
+import multiprocessing
+import os
+
+from jwql.utils import image_inventory
+
+
+THUMBNAILS = ['/thumbs/jw01068/jw01068001001_02102_00001_nrcb1_rate_integ0.thumb',
+              '/thumbs/jw01068/jw01068001001_02102_00001_nrcb2_rate_integ0.thumb',
+              '/thumbs/jw01068/jw01068002001_02102_00001_nrcb1_dark_integ0.thumb',
+              '/thumbs/jw02589/jw02589006001_04101_00001-seg002_nrs2_rate_integ0.thumb']
+
+
+def _add_one(args):
+    """Add a single file to the inventory, for use with a process pool"""
+    inventory_file, filename = args
+    image_inventory.add_files('thumbnail', 'nircam', [filename], inventory_file=inventory_file)
+
+
+def test_add_and_get_files(tmp_path):
+    """Test that files can be added to the inventory and looked up by
+    program and filename prefix"""
+    inventory_file = str(tmp_path / 'inventory.db')
+    image_inventory.add_files('thumbnail', 'NIRCam', THUMBNAILS[:3], inventory_file=inventory_file)
+    image_inventory.add_files('thumbnail', 'nirspec', THUMBNAILS[3:], inventory_file=inventory_file)
+
+    # Adding files a second time does not duplicate them
+    image_inventory.add_files('thumbnail', 'nircam', THUMBNAILS[:1], inventory_file=inventory_file)
+
+    assert image_inventory.get_files('thumbnail', 'nircam', inventory_file=inventory_file) == THUMBNAILS[:3]
+    assert image_inventory.get_files('thumbnail', 'nircam', program='1068', inventory_file=inventory_file) == THUMBNAILS[:3]
+    assert image_inventory.get_files('thumbnail', 'nircam', program='2589', inventory_file=inventory_file) == []
+    assert image_inventory.get_files('thumbnail', 'nirspec', program='02589', inventory_file=inventory_file) == THUMBNAILS[3:]
+
+    prefix_matches = image_inventory.get_files('thumbnail', 'nircam', prefix='jw01068001001',
+                                               inventory_file=inventory_file)
+    assert prefix_matches == THUMBNAILS[:2]
+
+
+def test_concurrent_add_files(tmp_path):
+    """Test that several processes can add files to the inventory at
+    the same time"""
+    inventory_file = str(tmp_path / 'inventory.db')
+    filenames = [f'/thumbs/jw01068/jw01068001001_02102_{i:05d}_nrcb1_rate_integ0.thumb' for i in range(40)]
+
+    with multiprocessing.Pool(processes=4) as pool:
+        pool.map(_add_one, [(inventory_file, filename) for filename in filenames])
+
+    assert image_inventory.get_files('thumbnail', 'nircam', inventory_file=inventory_file) == filenames
+
+
+def test_get_files_missing_inventory(tmp_path):
+    """Test that a missing inventory is read as empty, without creating
+    it"""
+    inventory_file = str(tmp_path / 'inventory.db')
+    assert image_inventory.get_files('thumbnail', 'nircam', inventory_file=inventory_file) == []
+    assert not os.path.exists(inventory_file)
+
+
+def test_import_listfile(tmp_path):
+    """Test that an existing text file inventory can be imported"""
+    inventory_file = str(tmp_path / 'inventory.db')
+    listfile = tmp_path / 'thumbnail_inventory_nircam.txt'
+    listfile.write_text('\n'.join(THUMBNAILS[:3]) + '\n\n')
+
+    image_inventory.import_listfile('thumbnail', 'nircam', str(listfile), inventory_file=inventory_file)
+    assert image_inventory.get_files('thumbnail', 'nircam', inventory_file=inventory_file) == THUMBNAILS[:3]
+
+
+def test_parse_inventory_name():
+    """Test that the indexed fields are extracted from image filenames"""
+    fields = image_inventory.parse_inventory_name(THUMBNAILS[3])
+    assert fields == (os.path.basename(THUMBNAILS[3]), '02589', 'jw02589006001_04101_00001-seg002_nrs2', 'rate')
+
+    fields = image_inventory.parse_inventory_name('/previews/other_file.jpg')
+    assert fields == ('other_file.jpg', None, 'other', 'file')
+
+
+def test_remove_files(tmp_path):
+    """Test that files containing a given string are removed from the
+    inventory"""
+    inventory_file = str(tmp_path / 'inventory.db')
+    image_inventory.add_files('thumbnail', 'nircam', THUMBNAILS[:3], inventory_file=inventory_file)
+
+    n_removed = image_inventory.remove_files('thumbnail', 'nircam', 'nrcb2', inventory_file=inventory_file)
+    assert n_removed == 1
+    remaining = image_inventory.get_files('thumbnail', 'nircam', inventory_file=inventory_file)
+    assert remaining == [THUMBNAILS[0], THUMBNAILS[2]]
+
+    # Entries for other instruments are untouched
+    assert image_inventory.remove_files('thumbnail', 'nirspec', 'jw01068', inventory_file=inventory_file) == 0
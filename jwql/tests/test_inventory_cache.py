@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+"""Tests for the ``inventory_cache`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to ``stdout``):
+
+    ::
+
+        pytest -s test_inventory_cache.py
+"""
+import os
+import stat
+import threading
+
+from astropy.table import Table
+
+from jwql.edb.inventory_cache import InventoryCache
+
+
+class FakeQuery:
+    """Stand-in for the MAST inventory query, counting the queries made.
+    Queries wait until ``release`` is set."""
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.release.wait()
+        self.calls += 1
+        data = Table({'tlmMnemonic': ['SA_ZFGOUTFOV', 'IMIR_HK_ICE_SEC_VOLT4'],
+                      'tlmIdentifier': ['1', str(self.calls + 1)],
+                      'description': ['FGS field of view', 'ICE secondary voltage 4'],
+                      'unit': ['', 'V']})
+        return data, {'status': 'COMPLETE'}
+
+
+def test_cached_on_disk(tmp_path):
+    """The inventory is queried once, and then read from disk"""
+    query = FakeQuery()
+    cache_file = os.path.join(str(tmp_path), 'inventory.ecsv')
+    data, meta = InventoryCache(cache_file, query).get()
+    assert query.calls == 1
+    assert len(data) == 2
+    assert meta == {'status': 'COMPLETE'}
+
+    cache = InventoryCache(cache_file, query)
+    assert cache.lookup('IMIR_HK_ICE_SEC_VOLT4') == ('2', 'ICE secondary voltage 4', 'V')
+    assert cache.lookup('SA_ZFGOUTFOV') == ('1', 'FGS field of view', '')
+    assert cache.lookup('NOT_A_MNEMONIC') is None
+    assert cache.get()[1] == {'status': 'COMPLETE'}
+    assert query.calls == 1
+
+
+def test_copies(tmp_path):
+    """Callers may modify the inventory without changing the cache"""
+    cache = InventoryCache(os.path.join(str(tmp_path), 'inventory.ecsv'), FakeQuery())
+    data, _ = cache.get()
+    data.remove_row(0)
+    assert len(cache.get()[0]) == 2
+
+
+def test_readable_file(tmp_path):
+    """The cache file can be read by the group and others"""
+    cache_file = os.path.join(str(tmp_path), 'inventory.ecsv')
+    InventoryCache(cache_file, FakeQuery()).get()
+    assert stat.S_IMODE(os.stat(cache_file).st_mode) & 0o044 == 0o044
+
+
+def test_unreadable_file(tmp_path):
+    """An unreadable cache file is treated as missing"""
+    query = FakeQuery()
+    cache_file = os.path.join(str(tmp_path), 'inventory.ecsv')
+
+    # A pickle, as written by earlier versions of the cache
+    with open(cache_file, 'wb') as cache:
+        cache.write(b'cnotamodule\nInventory\n.')
+    assert InventoryCache(cache_file, query).lookup('SA_ZFGOUTFOV') == ('1', 'FGS field of view', '')
+    assert query.calls == 1
+
+    # An inventory without the time of the query
+    query()[0].write(cache_file, format='ascii.ecsv', overwrite=True)
+    assert InventoryCache(cache_file, query).lookup('SA_ZFGOUTFOV') == ('1', 'FGS field of view', '')
+    assert query.calls == 3
+
+
+def test_stale_while_revalidate(tmp_path):
+    """An expired inventory is returned while a new one is retrieved"""
+    query = FakeQuery()
+    cache_file = os.path.join(str(tmp_path), 'inventory.ecsv')
+    InventoryCache(cache_file, query).get()
+
+    # The expired inventory is returned without waiting for the query
+    query.release.clear()
+    cache = InventoryCache(cache_file, query, ttl=-1)
+    assert cache.lookup('IMIR_HK_ICE_SEC_VOLT4')[0] == '2'
+    assert cache.start_refresh() is None
+    query.release.set()
+
+    # Wait for the background refresh to finish
+    with cache._refresh_lock:
+        pass
+    assert query.calls == 2
+    assert cache.lookup('IMIR_HK_ICE_SEC_VOLT4')[0] == '3'
+
+
+def test_retry_interval(tmp_path, mocker):
+    """No background refresh is started within the retry interval of a
+    failed refresh"""
+    cache_file = os.path.join(str(tmp_path), 'inventory.ecsv')
+    InventoryCache(cache_file, FakeQuery()).get()
+
+    query = mocker.Mock(side_effect=RuntimeError('MAST is unavailable'))
+    cache = InventoryCache(cache_file, query, ttl=-1, retry_interval=1e6)
+    cache.lookup('SA_ZFGOUTFOV')
+    with cache._refresh_lock:
+        pass
+    assert query.call_count == 1
+
+    assert cache.lookup('SA_ZFGOUTFOV') == ('1', 'FGS field of view', '')
+    assert cache.start_refresh() is None
+    assert query.call_count == 1
+
+    cache.retry_interval = -1
+    cache.start_refresh().join()
+    assert query.call_count == 2
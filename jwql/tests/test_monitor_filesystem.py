@@ -0,0 +1,165 @@
+#! /usr/bin/env python
+
+"""Tests for the ``monitor_filesystem`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_monitor_filesystem.py
+"""
+
+import os
+
+from jwql.jwql_monitors.monitor_filesystem import crawl_directory, crawl_filesystem, crawl_tree, load_manifest, \
+    save_manifest
+from jwql.utils.utils import filename_parser
+
+FILES = {'jw01068': {'jw01068001001_01101_00001_nrcb1_cal.fits': 100,
+                     'jw01068001001_01101_00001_nrcb1_rate.fits': 200,
+                     'jw01068001001_01101_00001_nrcb1_rate.jpg': 10,
+                     'notes.txt': 5},
+         os.path.join('jw01068', 'extra'): {'jw01068001001_01101_00002_nrcb1_cal.fits': 300},
+         'jw02589': {'jw02589006001_04101_00001-seg001_nrs1_rate.fits': 400,
+                     'jw02589006001_04101_00001-seg001_nrs2_rate.fits': 500},
+         'jw02733': {}}
+
+
+def make_tree(top):
+    """Create the directories and files in ``FILES`` within ``top``"""
+    for dirname, files in FILES.items():
+        os.makedirs(os.path.join(top, dirname), exist_ok=True)
+        for filename, size in files.items():
+            with open(os.path.join(top, dirname, filename), 'wb') as fobj:
+                fobj.write(b'\0' * size)
+
+
+def walk_tabulation(top):
+    """Reference implementation of the tabulation, walking the tree
+    with ``os.walk`` and checking each file individually.
+    """
+    totals = {'file_count': 0, 'file_size': 0, 'fits_count': 0, 'fits_size': 0}
+    instruments = {}
+    for dirpath, _, files in os.walk(top):
+        totals['file_count'] += len(files)
+        for filename in files:
+            file_path = os.path.join(dirpath, filename)
+            if os.path.isfile(file_path):
+                totals['file_size'] += os.path.getsize(file_path)
+                if filename.endswith('.fits'):
+                    filename_dict = filename_parser(filename)
+                    totals['fits_count'] += 1
+                    totals['fits_size'] += os.path.getsize(file_path)
+                    counts = instruments.setdefault(filename_dict['instrument'], {}).setdefault(
+                        filename_dict['suffix'], [0, 0])
+                    counts[0] += 1
+                    counts[1] += os.path.getsize(file_path)
+    return totals, instruments
+
+
+def sum_records(records):
+    """Add up the per-directory results of a crawl"""
+    totals = {'file_count': 0, 'file_size': 0, 'fits_count': 0, 'fits_size': 0}
+    instruments = {}
+    for record in records.values():
+        for key in totals:
+            totals[key] += record[key]
+        for instrument, filetypes in record['instrument'].items():
+            for filetype, (count, size) in filetypes.items():
+                counts = instruments.setdefault(instrument, {}).setdefault(filetype, [0, 0])
+                counts[0] += count
+                counts[1] += size
+    return totals, instruments
+
+
+def test_crawl_directory(tmp_path):
+    """Only the files directly within the directory are tabulated"""
+    make_tree(str(tmp_path))
+    record = crawl_directory(os.path.join(str(tmp_path), 'jw01068'))
+    assert record['file_count'] == 4
+    assert record['file_size'] == 315
+    assert record['fits_count'] == 2
+    assert record['fits_size'] == 300
+    assert record['instrument'] == {'nircam': {'cal': [1, 100], 'rate': [1, 200]}}
+    assert record['subdirs'] == ['extra']
+
+
+def test_crawl_tree_parity(tmp_path):
+    """The crawl gives the same results as the file by file tabulation"""
+    make_tree(str(tmp_path))
+    records = crawl_tree(str(tmp_path))
+    assert set(records) == set([str(tmp_path)] + [os.path.join(str(tmp_path), dirname) for dirname in FILES])
+    assert sum_records(records) == walk_tabulation(str(tmp_path))
+
+
+def test_crawl_filesystem_parity(tmp_path):
+    """The parallel crawl of nested areas gives the same results as the
+    file by file tabulation, counting each directory once"""
+    make_tree(str(tmp_path))
+    areas = [str(tmp_path), os.path.join(str(tmp_path), 'jw01068')]
+    records = crawl_filesystem(areas, processes=2)
+    assert sum_records(records) == walk_tabulation(str(tmp_path))
+
+
+def test_manifest_skips_unchanged(tmp_path, mocker):
+    """Directories that have not been modified are taken from the
+    manifest, and modified directories are crawled again"""
+    make_tree(str(tmp_path))
+    manifest = crawl_tree(str(tmp_path))
+
+    crawl = mocker.patch('jwql.jwql_monitors.monitor_filesystem.crawl_directory', side_effect=crawl_directory)
+    assert crawl_tree(str(tmp_path), manifest) == manifest
+    assert crawl.call_count == 0
+
+    # Adding a file modifies its directory only
+    modified = os.path.join(str(tmp_path), 'jw02589')
+    with open(os.path.join(modified, 'jw02589006001_04101_00001-seg002_nrs1_rate.fits'), 'wb') as fobj:
+        fobj.write(b'\0' * 600)
+    os.utime(modified, ns=(0, manifest[modified]['mtime'] + 10**9))
+
+    records = crawl_tree(str(tmp_path), manifest)
+    assert [call.args[0] for call in crawl.call_args_list] == [modified]
+    assert records[modified]['fits_count'] == 3
+    assert sum_records(records) == walk_tabulation(str(tmp_path))
+
+
+def test_rescan_areas(tmp_path):
+    """Directories within the areas to rescan are crawled again even if
+    they have not been modified"""
+    make_tree(str(tmp_path))
+    manifest = crawl_tree(str(tmp_path))
+
+    # A file changed in place does not modify its directory
+    changed = os.path.join(str(tmp_path), 'jw02589', 'jw02589006001_04101_00001-seg001_nrs1_rate.fits')
+    mtime = manifest[os.path.dirname(changed)]['mtime']
+    with open(changed, 'ab') as fobj:
+        fobj.write(b'\0' * 100)
+    os.utime(os.path.dirname(changed), ns=(0, mtime))
+
+    records = crawl_filesystem([str(tmp_path)], manifest=manifest, processes=1)
+    assert records[os.path.dirname(changed)]['fits_size'] == 900
+
+    records = crawl_filesystem([str(tmp_path)], manifest=manifest, processes=1,
+                               rescan=[os.path.join(str(tmp_path), 'jw02589')])
+    assert records[os.path.dirname(changed)]['fits_size'] == 1000
+    assert sum_records(records) == walk_tabulation(str(tmp_path))
+
+
+def test_manifest_round_trip(tmp_path):
+    """A saved manifest is read back unchanged, and a missing or
+    unreadable manifest is empty"""
+    tree = os.path.join(str(tmp_path), 'tree')
+    make_tree(tree)
+    records = crawl_tree(tree)
+
+    filename = os.path.join(str(tmp_path), 'monitor_filesystem', 'filesystem_manifest.json')
+    assert load_manifest(filename) == {}
+    save_manifest(records, filename)
+    assert load_manifest(filename) == records
+
+    with open(filename, 'w') as fobj:
+        fobj.write('{')
+    assert load_manifest(filename) == {}
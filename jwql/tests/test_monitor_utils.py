@@ -18,6 +18,7 @@ Use
 """
 import datetime
 
+import numpy as np
 import pytest
 
 from jwql.database.database_interface import session, Monitor
@@ -25,6 +26,26 @@ from jwql.tests.resources import has_test_db
 from jwql.utils import monitor_utils
 
 
+def test_exclude_existing_pixels():
+    """Test that previously found pixels are removed from a list of
+    new bad pixels"""
+    existing = monitor_utils.bad_pixel_index([1, 5, 9999, 5], [2, 7, 9999, 7])
+    assert len(existing) == 3
+
+    badpix = (np.array([1, 2, 5, 7, 9999]), np.array([2, 1, 7, 5, 9999]))
+    new_x, new_y = monitor_utils.exclude_existing_pixels(badpix, existing)
+    assert new_x == [2, 7]
+    assert new_y == [1, 5]
+
+    # Nothing to exclude
+    new_x, new_y = monitor_utils.exclude_existing_pixels(([3], [4]), monitor_utils.bad_pixel_index([], []))
+    assert new_x == [3]
+    assert new_y == [4]
+
+    # Nothing to check
+    assert monitor_utils.exclude_existing_pixels(([], []), existing) == ([], [])
+
+
 @pytest.mark.skipif(not has_test_db(), reason='Modifies test database.')
 def test_update_monitor_table(tmp_path):
     module = 'test'
@@ -21,6 +21,7 @@ from collections import OrderedDict
 import os
 import pytest
 
+from astropy.io import fits
 import numpy as np
 
 from jwql.instrument_monitors import pipeline_tools
@@ -136,6 +137,33 @@ def test_image_stack():
     assert exptimes == [[10.5], [10.5], [10.5]]
 
 
+@pytest.mark.parametrize('scratch', [False, True])
+def test_image_stack_mixed_dimensions(tmp_path, scratch):
+    """Test stacking of a mix of rate and rateints files, skipping the
+    initial integrations of the 3D files"""
+
+    shapes = [(4, 10, 10), (10, 10), (3, 10, 10)]
+    files = []
+    for i, shape in enumerate(shapes):
+        primary = fits.PrimaryHDU()
+        primary.header['EFFINTTM'] = 10.5
+        primary.header['NINTS'] = shape[0] if len(shape) == 3 else 1
+        data = np.full(shape, i + 1, dtype=np.float32)
+        if len(shape) == 3:
+            data[0, :, :] = -1.
+        filename = os.path.join(tmp_path, 'test_image_{}.fits'.format(i))
+        fits.HDUList([primary, fits.ImageHDU(data)]).writeto(filename)
+        files.append(filename)
+
+    scratch_dir = str(tmp_path) if scratch else None
+    image_stack, exptimes = pipeline_tools.image_stack(files, skipped_initial_ints=1, scratch_dir=scratch_dir)
+
+    assert image_stack.shape == (6, 10, 10)
+    assert image_stack.dtype == np.float32
+    assert np.all(image_stack[:, 0, 0] == [1., 1., 1., 2., 3., 3.])
+    assert exptimes == [[10.5] * 3, [10.5], [10.5] * 2]
+
+
 def test_steps_to_run():
     """Test that the dictionaries for steps required and steps completed
     are correctly combined to create a dictionary of pipeline steps to
@@ -29,11 +29,138 @@ import shutil
 from astropy.io import fits
 from jwst.datamodels import dqflags
 
-from jwql.utils.preview_image import PreviewImage, crop_to_subarray
+from jwql.utils.preview_image import (PreviewImage, clipped_limits, colorize, create_nir_nonsci_map, crop_to_subarray,
+                                      expand_for_i2d, make_thumbnail, select_integrations, subarray_nonsci_map,
+                                      THUMBNAIL_SIZE)
 from jwql.utils.constants import ON_GITHUB_ACTIONS, ON_READTHEDOCS
 from jwql.utils.utils import get_config, ensure_dir_exists
 
 
+def test_clipped_limits():
+    """Test that the limits selected by partitioning match those from
+    sorting the valid pixels, and that the subsample estimate is
+    within its error bound
+    """
+    rng = np.random.default_rng(1)
+    data = rng.lognormal(size=(600, 500))
+    data[10:20, :] = np.nan
+    pixmap = np.ones(data.shape, dtype=bool)
+    pixmap[:, :4] = False
+
+    sorted_pix = np.sort(data[pixmap & np.isfinite(data)])
+    clip_percents = [0., 0.01, 0.05]
+    limits = clipped_limits(data, clip_percents, pixmap=pixmap)
+    for clip_percent, (minval, maxval) in zip(clip_percents, limits):
+        numclip = int(clip_percent * len(sorted_pix))
+        assert minval == sorted_pix[numclip]
+        assert maxval == sorted_pix[-numclip - 1]
+
+    max_error = 0.01
+    minval, maxval = clipped_limits(data, [0.05], pixmap=pixmap, max_error=max_error)[0]
+    low_fraction = np.searchsorted(sorted_pix, minval) / len(sorted_pix)
+    high_fraction = np.searchsorted(sorted_pix, maxval) / len(sorted_pix)
+    assert abs(low_fraction - 0.05) <= max_error
+    assert abs(high_fraction - 0.95) <= max_error
+
+    # With no valid pixels, the image is scaled from 0 to 1
+    assert clipped_limits(np.full((5, 5), np.nan), [0.01]) == [(0., 1.)]
+
+
+@pytest.mark.parametrize('scale', ['log', 'linear'])
+def test_colorize(scale):
+    """Test that colorizing through the colormap lookup table matches
+    the colors matplotlib assigns with the same normalization
+    """
+    import matplotlib.colors as colors
+    import matplotlib.pyplot as plt
+
+    image = np.linspace(-5., 120., 400).reshape(20, 20)
+    image[3, 3] = np.nan
+    min_value, max_value = 0., 100.
+
+    rgb = colorize(image, min_value, max_value, scale=scale, cmap='viridis')
+
+    if scale == 'log':
+        norm = colors.LogNorm(vmin=1, vmax=max_value - min_value + 1)
+        expected = plt.get_cmap('viridis')(norm(image - min_value + 1), bytes=True)[:, :, :3]
+        bad = ~(image - min_value + 1 > 0)
+    else:
+        norm = colors.Normalize(vmin=min_value, vmax=max_value)
+        expected = plt.get_cmap('viridis')(norm(image), bytes=True)[:, :, :3]
+        bad = ~np.isfinite(image)
+
+    assert rgb.dtype == np.uint8
+    assert rgb.shape == (20, 20, 3)
+    assert np.all(rgb[bad] == 255)
+    assert np.all(np.abs(rgb[~bad].astype(int) - expected[~bad].astype(int)) <= 1)
+
+
+def test_difference_frames(tmp_path):
+    """Test that difference images read one integration at a time
+    match those calculated from the full data
+    """
+    filename = str(tmp_path / 'jw01068001001_02102_00001_nrcb1_uncal.fits')
+    rng = np.random.default_rng(0)
+    ramp = rng.integers(0, 65535, size=(25, 3, 32, 40)).astype(np.uint16)
+    primary = fits.PrimaryHDU()
+    primary.header['INSTRUME'] = 'NIRCAM'
+    primary.header['SUBSTRT1'] = 1
+    primary.header['SUBSTRT2'] = 1
+    primary.header['SUBSIZE1'] = 40
+    primary.header['SUBSIZE2'] = 32
+    fits.HDUList([primary, fits.ImageHDU(ramp, name='SCI')]).writeto(filename)
+
+    image = PreviewImage(filename, 'SCI')
+    assert image.shape == (25, 3, 32, 40)
+    assert image.dq.shape == (32, 40)
+
+    integrations = select_integrations(image.shape[0])
+    assert list(integrations) == [0, 10, 20]
+    frames = list(image.difference_frames(integrations))
+    assert image._data is None
+
+    expected = image.difference_image(image.data)
+    for integration, frame in zip(integrations, frames):
+        assert frame.dtype == np.float32
+        assert np.array_equal(frame, expected[integration])
+
+
+@pytest.mark.parametrize('xdim, ydim', [(64, 64), (80, 70)])
+def test_subarray_nonsci_map(xdim, ydim):
+    """Test that the cached non-science maps match those created for
+    each file, and are shared and read-only
+    """
+    header = fits.Header()
+    header['SUBSTRT1'] = 1
+    header['SUBSTRT2'] = 1985
+    header['SUBSIZE1'] = 64
+    header['SUBSIZE2'] = 64
+
+    dq = subarray_nonsci_map(header, xdim, ydim)
+    expected = expand_for_i2d(crop_to_subarray(create_nir_nonsci_map(), header, 64, 64), xdim, ydim)
+    assert np.array_equal(dq, expected)
+
+    assert subarray_nonsci_map(header.copy(), xdim, ydim) is dq
+    assert not dq.flags.writeable
+
+
+@pytest.mark.parametrize('shape', [(2048, 2048), (256, 2048), (64, 32)])
+def test_make_thumbnail(shape):
+    """Test that thumbnails are scaled to ``THUMBNAIL_SIZE`` in their
+    longest dimension
+    """
+    rgb = np.zeros(shape + (3,), dtype=np.uint8)
+    rgb[0, :] = 255
+    thumbnail = make_thumbnail(rgb)
+
+    assert max(thumbnail.size) == THUMBNAIL_SIZE
+    assert thumbnail.size[0] / thumbnail.size[1] == pytest.approx(shape[1] / shape[0], rel=0.05)
+
+    # The first row of the data is at the bottom of the image
+    pixels = np.asarray(thumbnail)
+    assert pixels[-1].mean() > pixels[0].mean()
+
+
 def test_crop_to_subarray():
     """Test that the code correctly crops larger arrays down to
     the requested subarray
@@ -0,0 +1,85 @@
+#! /usr/bin/env python
+
+"""Tests for the ``shared_tasks`` module that do not require a running
+redis server or celery worker.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_shared_tasks.py
+"""
+
+import os
+
+from jwql.shared_tasks import shared_tasks
+
+
+class FakeLock():
+    """Stand-in for a redis lock that records when it is released"""
+    def __init__(self, name, released):
+        self.name = name
+        self.released = released
+
+    def release(self):
+        self.released.append(self.name)
+
+
+class FakeResult():
+    """Stand-in for a celery AsyncResult that becomes ready after a given
+    number of polls"""
+    def __init__(self, name, polls_until_ready, fail=False):
+        self.id = name
+        self.polls_until_ready = polls_until_ready
+        self.fail = fail
+
+    def ready(self):
+        self.polls_until_ready -= 1
+        return self.polls_until_ready <= 0
+
+    def get(self):
+        if self.fail:
+            raise RuntimeError('Pipeline failed')
+        return self.id
+
+
+def test_run_parallel_pipeline_completion_order(mocker):
+    """Make sure that results are retrieved, and locks released, in the
+    order in which the tasks finish rather than the order in which they
+    were submitted"""
+    input_files = ['/data/file_{}_uncal.fits'.format(name) for name in ['slow', 'fast', 'failed', 'medium']]
+    polls = {'file_slow': 4, 'file_fast': 1, 'file_failed': 2, 'file_medium': 3}
+    released = []
+    retrieved = []
+    callbacks = []
+
+    def fake_prep_file(input_file, in_ext):
+        short_name = os.path.basename(input_file).replace('_' + in_ext, '').replace('.fits', '')
+        return short_name, FakeLock(short_name, released), input_file
+
+    def fake_start_pipeline(uncal_name, short_name, ext_or_exts, instrument, jump_pipe=False, step_args={}):
+        return FakeResult(short_name, polls[short_name], fail=(short_name == 'file_failed'))
+
+    def fake_retrieve_files(short_name, ext_or_exts, dest_dir):
+        # The lock for this file must still be held while its outputs are copied
+        assert short_name not in released
+        retrieved.append(short_name)
+        return os.path.join(dest_dir, '{}_{}.fits'.format(short_name, ext_or_exts))
+
+    mocker.patch.object(shared_tasks, 'prep_file', fake_prep_file)
+    mocker.patch.object(shared_tasks, 'start_pipeline', fake_start_pipeline)
+    mocker.patch.object(shared_tasks, 'retrieve_files', fake_retrieve_files)
+    mocker.patch.object(shared_tasks.time, 'sleep')
+
+    outputs = shared_tasks.run_parallel_pipeline(input_files, 'uncal', 'rate', 'nircam',
+                                                 callback=lambda infile, outfile: callbacks.append(infile))
+
+    assert retrieved == ['file_fast', 'file_medium', 'file_slow']
+    assert released == ['file_fast', 'file_failed', 'file_medium', 'file_slow']
+    assert callbacks == ['/data/file_fast_uncal.fits', '/data/file_medium_uncal.fits', '/data/file_slow_uncal.fits']
+    assert outputs == {'/data/file_fast_uncal.fits': '/data/file_fast_rate.fits',
+                       '/data/file_medium_uncal.fits': '/data/file_medium_rate.fits',
+                       '/data/file_slow_uncal.fits': '/data/file_slow_rate.fits'}
@@ -0,0 +1,241 @@
+#! /usr/bin/env python
+"""Tests for the ``telemetry_cache`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to ``stdout``):
+
+    ::
+
+        pytest -s test_telemetry_cache.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import stat
+import threading
+import time
+
+from astropy.time import Time
+import numpy as np
+import pytest
+import requests
+
+from jwql.edb.telemetry_cache import RateLimiter, TelemetryCache, ThreadLocalService, day_number, merge_intervals, \
+    split_by_day, unix_to_datetime
+from jwql.tests.resources import MockEngdbService
+
+# 2022-01-01 00:00:00 UTC
+START = 1640995200.
+
+
+def test_cached_values(tmp_path):
+    """Values are only queried for time ranges that are not cached, and
+    are the same as those from the service"""
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, settle_time=0)
+
+    start = Time(START + 3600, format='unix')
+    end = Time(START + 86400 + 3600, format='unix')
+    times, values = cache.get_values('SA_ZFGOUTFOV', start, end)
+    assert len(service.queries) == 1
+    expected = (service.times >= START + 3600) & (service.times <= START + 86400 + 3600)
+    assert np.allclose(times, service.times[expected])
+    assert np.array_equal(values, service.values[expected])
+
+    # A range within the cached range needs no query
+    times, values = cache.get_values('SA_ZFGOUTFOV', datetime(2022, 1, 1, 12), datetime(2022, 1, 2))
+    assert len(service.queries) == 1
+    assert np.array_equal(values, service.values[(service.times >= START + 43200) & (service.times <= START + 86400)])
+
+    # Only the uncached end of an overlapping range is queried
+    cache.get_values('SA_ZFGOUTFOV', start, Time(START + 2 * 86400, format='unix'))
+    assert len(service.queries) == 2
+    assert np.allclose(service.queries[-1], (START + 86400 + 3600, START + 2 * 86400))
+
+
+def test_bracket_values(tmp_path):
+    """The values preceding and following a range are found in the
+    cache"""
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, settle_time=0)
+    cache.get_values('SA_ZFGOUTFOV', Time(START, format='unix'), Time(START + 2 * 86400, format='unix'))
+
+    start, end = START + 86400 - 300, START + 86400 + 1500
+    times, values = cache.get_values('SA_ZFGOUTFOV', Time(start, format='unix'), Time(end, format='unix'),
+                                     include_bracket_values=True)
+    assert len(service.queries) == 1
+    assert np.allclose(times, [START + 86400 - 600, START + 86400, START + 86400 + 600, START + 86400 + 1200,
+                               START + 86400 + 1800])
+
+
+def test_recent_values_requeried(tmp_path):
+    """Ranges within the settle time of the query are only queried again
+    once their in-memory coverage has expired, or by a new cache"""
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, settle_time=1e12)
+    start, end = Time(START, format='unix'), Time(START + 3600, format='unix')
+    cache.get_values('SA_ZFGOUTFOV', start, end)
+    times, values = cache.get_values('SA_ZFGOUTFOV', start, end)
+    assert len(service.queries) == 1
+    assert np.array_equal(values, service.values[:7])
+
+    cache = TelemetryCache(str(tmp_path), service, settle_time=1e12)
+    cache.get_values('SA_ZFGOUTFOV', start, end)
+    assert len(service.queries) == 2
+
+    cache = TelemetryCache(str(tmp_path), service, settle_time=1e12, recent_ttl=-1)
+    cache.get_values('SA_ZFGOUTFOV', start, end)
+    cache.get_values('SA_ZFGOUTFOV', start, end)
+    assert len(service.queries) == 4
+
+
+def test_prune(tmp_path):
+    """Files that have not been written within the retention time are
+    removed when values are next stored"""
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, settle_time=0, retention=3600)
+    cache.get_values('SA_ZFGOUTFOV', Time(START, format='unix'), Time(START + 2 * 86400, format='unix'))
+    old_file = cache.day_file('SA_ZFGOUTFOV', day_number(START))
+    new_file = cache.day_file('SA_ZFGOUTFOV', day_number(START) + 1)
+    os.utime(old_file, (time.time() - 7200, time.time() - 7200))
+
+    # The cache was pruned when the values were first stored
+    cache.get_values('IMIR_HK_ICE_SEC_VOLT4', Time(START, format='unix'), Time(START + 3600, format='unix'))
+    assert os.path.exists(old_file)
+
+    assert cache.prune() == 1
+    assert not os.path.exists(old_file)
+    assert os.path.exists(new_file)
+
+    # Pruned days are queried again
+    n_queries = len(service.queries)
+    cache.get_values('SA_ZFGOUTFOV', Time(START, format='unix'), Time(START + 3600, format='unix'))
+    assert len(service.queries) == n_queries + 1
+
+
+def test_readable_files(tmp_path):
+    """Cache files and directories can be read by the group and others"""
+    cache = TelemetryCache(str(tmp_path / 'cache'), MockEngdbService(START), settle_time=0)
+    cache.get_values('SA_ZFGOUTFOV', Time(START, format='unix'), Time(START + 3600, format='unix'))
+    for path in [cache.cache_dir, os.path.join(cache.cache_dir, 'SA_ZFGOUTFOV'),
+                 cache.day_file('SA_ZFGOUTFOV', day_number(START))]:
+        assert stat.S_IMODE(os.stat(path).st_mode) & 0o044 == 0o044
+
+
+def test_unwritable_cache(tmp_path, mocker):
+    """Values that cannot be added to the cache are still returned, and
+    are queried again"""
+    mocker.patch('jwql.edb.telemetry_cache.tempfile.mkstemp', side_effect=PermissionError('Permission denied'))
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, settle_time=1e12)
+    start, end = START + 900, START + 3600
+    for n_queries in [1, 2]:
+        times, values = cache.get_values('SA_ZFGOUTFOV', Time(start, format='unix'), Time(end, format='unix'),
+                                         include_bracket_values=True)
+        assert len(service.queries) == n_queries
+        expected = (service.times >= start - 600) & (service.times <= end + 600)
+        assert np.allclose(times, service.times[expected])
+        assert np.array_equal(values, service.values[expected])
+
+
+class StatefulEngdbService(MockEngdbService):
+    """Mock service that, like ``ENGDB_Service``, keeps the state of the
+    current request on itself. Each value is the name of the mnemonic
+    that was queried."""
+    def get_values(self, mnemonic_identifier, *args, **kwargs):
+        self.mnemonic_identifier = mnemonic_identifier
+        time.sleep(0.05)
+        data = super().get_values(self.mnemonic_identifier, *args, **kwargs)
+        return [row._replace(value=self.mnemonic_identifier) for row in data]
+
+
+def test_threads(tmp_path):
+    """Each thread uses its own instance of the service, so that
+    concurrent requests do not get each other's values"""
+    instances = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            instances.append(StatefulEngdbService(START))
+            return instances[-1]
+
+    cache = TelemetryCache(str(tmp_path), ThreadLocalService(factory), settle_time=0, request_interval=0)
+    mnemonics = [f'MNEMONIC_{i}' for i in range(16)]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda mnemonic: cache.get_values(mnemonic, Time(START, format='unix'),
+                                                                      Time(START + 3600, format='unix')),
+                                    mnemonics))
+
+    assert 1 < len(instances) <= 8
+    for mnemonic, (times, values) in zip(mnemonics, results):
+        assert len(times) == 7
+        assert set(values) == {mnemonic}
+
+
+def test_meta_ttl(tmp_path):
+    """Metadata are queried again only once they have expired"""
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, metadata_ttl=1e6)
+    cache.get_meta('SA_ZFGOUTFOV')
+    cache.get_meta('SA_ZFGOUTFOV')
+    assert service.meta_queries == 1
+
+    cache = TelemetryCache(str(tmp_path), service, metadata_ttl=-1)
+    cache.get_meta('SA_ZFGOUTFOV')
+    cache.get_meta('SA_ZFGOUTFOV')
+    assert service.meta_queries == 3
+
+
+def test_retry(tmp_path, mocker):
+    """Requests are retried after transient errors only"""
+    mocker.patch('jwql.edb.telemetry_cache.time.sleep')
+    service = MockEngdbService(START)
+    cache = TelemetryCache(str(tmp_path), service, max_retries=2)
+
+    service.get_meta = mocker.Mock(side_effect=[requests.exceptions.ConnectionError(), {'TlmMnemonics': []}])
+    assert cache.request(service.get_meta, 'SA_ZFGOUTFOV') == {'TlmMnemonics': []}
+    assert service.get_meta.call_count == 2
+
+    response = requests.Response()
+    response.status_code = 404
+    service.get_meta = mocker.Mock(side_effect=requests.exceptions.HTTPError(response=response))
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.request(service.get_meta, 'SA_ZFGOUTFOV')
+    assert service.get_meta.call_count == 1
+
+    service.get_meta = mocker.Mock(side_effect=requests.exceptions.Timeout())
+    with pytest.raises(requests.exceptions.Timeout):
+        cache.request(service.get_meta, 'SA_ZFGOUTFOV')
+    assert service.get_meta.call_count == 3
+
+
+def test_rate_limiter(mocker):
+    """Calls are spaced by the interval of the limiter"""
+    mocker.patch('jwql.edb.telemetry_cache.time.monotonic', return_value=100.)
+    sleep = mocker.patch('jwql.edb.telemetry_cache.time.sleep')
+    limiter = RateLimiter(0.5)
+    for _ in range(3):
+        limiter.wait()
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+
+def test_split_by_day():
+    """Intervals are merged and split at midnight"""
+    assert split_by_day([(START + 3600, START + 7200), (START + 7000, START + 86400 + 60)]) == [
+        (START + 3600, START + 86400), (START + 86400, START + 86400 + 60)]
+    assert split_by_day([(START, START + 86400)]) == [(START, START + 86400)]
+
+
+def test_merge_intervals():
+    """Overlapping and touching intervals are merged"""
+    assert merge_intervals([(5, 6), (0, 2), (2, 3), (1, 1.5)]) == [(0, 3), (5, 6)]
+
+
+def test_unix_to_datetime():
+    """Times are converted to datetimes in UTC"""
+    dates = unix_to_datetime(np.array([START, START + 0.001]))
+    assert dates.tolist() == [datetime(2022, 1, 1), datetime(2022, 1, 1, 0, 0, 0, 1000)]
@@ -27,7 +27,8 @@ from bokeh.plotting import figure
 import numpy as np
 
 from jwql.utils.constants import ON_GITHUB_ACTIONS
-from jwql.utils.utils import copy_files, get_config, filename_parser, filesystem_path, save_png, _validate_config
+from jwql.utils.utils import copy_files, get_config, filename_parser, filename_parser_batch, filesystem_path, \
+    save_png, _validate_config
 
 
 FILENAME_PARSER_TEST_DATA = [
@@ -465,6 +466,34 @@ def test_filename_parser_non_jwst():
     assert filename_dict['recognized_filename'] is False
 
 
+def test_filename_parser_batch():
+    """Test that parsing a collection of files returns columns that
+    match the results of parsing each file individually
+    """
+    filenames = [filename for filename, _ in FILENAME_PARSER_TEST_DATA] + ['not_a_jwst_file.fits']
+    columns = filename_parser_batch(filenames)
+
+    assert list(columns['filename']) == filenames
+    for column in columns.values():
+        assert len(column) == len(filenames)
+
+    for i, filename in enumerate(filenames):
+        filename_dict = filename_parser(filename)
+        for key, column in columns.items():
+            if key != 'filename':
+                assert column[i] == filename_dict.get(key)
+
+
+def test_filename_parser_cached_copy():
+    """Make sure that modifying the returned dictionary does not alter
+    the results of subsequent calls
+    """
+    filename = 'jw00327001001_02101_00002_nrca1_rate.fits'
+    filename_dict = filename_parser(filename)
+    filename_dict['detector'] = 'modified'
+    assert filename_parser(filename)['detector'] == 'nrca1'
+
+
 @pytest.mark.skipif(ON_GITHUB_ACTIONS, reason='Requires access to central storage.')
 def test_filesystem_path():
     """Test that a file's location in the filesystem is returned"""
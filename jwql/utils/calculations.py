@@ -122,19 +122,32 @@ def gaussian1d_fit(x_values, y_values, params):
     return amplitude, peak, width
 
 
-def mean_image(cube, sigma_threshold=3):
+def mean_image(cube, sigma_threshold=3, memory_limit=2 * 1024**3):
     """Combine a stack of 2D images into a mean slope image, using
     sigma-clipping on a pixel-by-pixel basis
 
+    In order to limit the memory used by the temporary arrays created
+    during sigma-clipping, the cube is processed in blocks of rows. The
+    number of rows in each block is chosen such that the working set
+    stays below ``memory_limit``. Since the clipping is done independently
+    for each pixel, the results are identical to clipping the entire
+    cube at once.
+
     Parameters
     ----------
     cube : numpy.ndarray
-        3D array containing a stack of 2D images
+        3D array containing a stack of 2D images. This may also be a
+        ``numpy.memmap``, in which case only one block of rows is read
+        into memory at a time.
 
     sigma_threshold : int
         Number of sigma to use when sigma-clipping values in each
         pixel
 
+    memory_limit : int
+        Approximate maximum number of bytes to use for the temporary
+        arrays created while clipping a block of rows
+
     Returns
     -------
     mean_image : numpy.ndarray
@@ -143,10 +156,29 @@ def mean_image(cube, sigma_threshold=3):
     stdev_image : numpy.ndarray
         2D sigma-clipped standard deviation image
     """
-
-    clipped_cube = sigma_clip(cube, sigma=sigma_threshold, axis=0, masked=False)
-    mean_image = np.nanmean(clipped_cube, axis=0)
-    std_image = np.nanstd(clipped_cube, axis=0)
+    nimages, nrows, ncols = cube.shape
+
+    # sigma_clip creates a transposed copy of the data, a mask, and a
+    # float64 copy of the clipped data, and nanmean/nanstd add several
+    # more float64 temporaries. Budget 48 bytes per element to cover these.
+    bytes_per_row = max(nimages * ncols * 48, 1)
+    rows_per_block = int(max(min(memory_limit // bytes_per_row, nrows), 1))
+
+    mean_image = None
+    std_image = None
+    for row_start in range(0, nrows, rows_per_block):
+        row_end = min(row_start + rows_per_block, nrows)
+        block = np.asarray(cube[:, row_start:row_end, :])
+        clipped_block = sigma_clip(block, sigma=sigma_threshold, axis=0, masked=False)
+        mean_block = np.nanmean(clipped_block, axis=0)
+        std_block = np.nanstd(clipped_block, axis=0)
+        del block, clipped_block
+
+        if mean_image is None:
+            mean_image = np.empty((nrows, ncols), dtype=mean_block.dtype)
+            std_image = np.empty((nrows, ncols), dtype=std_block.dtype)
+        mean_image[row_start:row_end, :] = mean_block
+        std_image[row_start:row_end, :] = std_block
 
     return mean_image, std_image
 
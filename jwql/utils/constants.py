@@ -794,8 +794,9 @@ ON_GITHUB_ACTIONS = '/home/runner' in os.path.expanduser('~') or '/Users/runner'
 # Determine if the code is being run as part of a Readthedocs build
 ON_READTHEDOCS = os.environ.get('READTHEDOCS', False)
 
-# Base name for the file listing the preview images for a given instrument.
-# The complete name will have "_{instrument.lower}.txt" added to the end of this.
+# Base name for the preview image inventory database. The complete name will
+# have ".db" added to the end of this. The older text file inventories, one per
+# instrument, have "_{instrument.lower}.txt" added instead.
 PREVIEW_IMAGE_LISTFILE = "preview_image_inventory"
 
 # All possible proposal categories
@@ -1007,8 +1008,9 @@ SUFFIXES_WITH_AVERAGED_INTS = ["rate", "cal", "crf", "i2d", "bsub"]
 # boolean accessed according to a viewed flag
 THUMBNAIL_FILTER_LOOK = ["New", "Viewed"]
 
-# Base name for the file listing the thumbnail images for a given instrument.
-# The complete name will have "_{instrument.lower}.txt" added to the end of this.
+# Base name for the thumbnail image inventory database. The complete name will
+# have ".db" added to the end of this. The older text file inventories, one per
+# instrument, have "_{instrument.lower}.txt" added instead.
 THUMBNAIL_LISTFILE = "thumbnail_inventory"
 
 # Possible suffix types for time-series exposures
@@ -0,0 +1,321 @@
+#! /usr/bin/env python
+
+"""Cache of the headers of the fits files in the ``jwql`` filesystem.
+
+The keywords and values of every extension header of a file are kept
+in an SQLite database file in the ``outputs`` directory, keyed by the
+name, modification time, and size of the file. A file is only opened
+the first time its headers are needed, and again when it changes.
+Headers that have been looked up are also kept in memory, so that
+repeated lookups within a process do not query the database. The
+headers are stored as JSON. If the database cannot be read or written,
+the headers are read from the file instead.
+
+Use
+---
+
+    This module can be imported as such:
+
+    ::
+
+        from jwql.utils import header_cache
+        header = header_cache.get_header(filename)
+        nints = header['NINTS']
+        sci_header = header_cache.get_header(filename, 'SCI')
+
+    The cache can be filled ahead of time for some or all programs
+    from the command line:
+
+    ::
+
+        python header_cache.py --programs 1068 1220
+"""
+
+import argparse
+from functools import lru_cache
+import glob
+import json
+import logging
+import os
+import sqlite3
+
+from astropy.io import fits
+
+from jwql.utils import permissions
+from jwql.utils.utils import get_config
+
+# Number of seconds to wait for another process to release the database
+# before raising an error, and reading the file instead
+CACHE_TIMEOUT = 5.
+
+# Number of files whose headers are kept in memory in each process
+MEMORY_CACHE_SIZE = 256
+
+# Header keywords that are not cached
+EXCLUDED_KEYWORDS = ['', 'COMMENT']
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS headers (
+    filename TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL
+);
+"""
+
+
+def connect(cache_file=None):
+    """Open the cache database, creating it if necessary.
+
+    Parameters
+    ----------
+    cache_file : str
+        Cache database to use. If ``None``, the cache in the
+        ``outputs`` directory is used.
+
+    Returns
+    -------
+    connection : sqlite3.Connection
+        Connection to the database. When used as a context manager,
+        the statements within are committed as a single transaction.
+    """
+    if cache_file is None:
+        cache_file = get_cache_file()
+
+    new_file = not os.path.isfile(cache_file)
+    connection = sqlite3.connect(cache_file, timeout=CACHE_TIMEOUT)
+    try:
+        connection.executescript(CACHE_SCHEMA)
+    except sqlite3.Error:
+        connection.close()
+        raise
+    if new_file:
+        logging.info(f"Created header cache {cache_file}")
+        permissions.set_permissions(cache_file)
+
+    return connection
+
+
+@lru_cache(maxsize=1)
+def get_cache_file():
+    """Return the location of the cache database. The location is only
+    looked up in the config file once per process.
+
+    Returns
+    -------
+    cache_file : str
+        Name, including path, of the cache database
+    """
+    return os.path.join(get_config()['outputs'], 'header_cache.db')
+
+
+def get_header(filename, ext=0, cache_file=None):
+    """Return the keywords and values of one extension header of the
+    given file.
+
+    Parameters
+    ----------
+    filename : str
+        Name, including path, of the fits file
+
+    ext : int or str
+        Index or ``EXTNAME`` of the extension
+
+    cache_file : str
+        Cache database to use. If ``None``, the cache in the
+        ``outputs`` directory is used.
+
+    Returns
+    -------
+    header : dict
+        Header keywords and their values. For keywords that appear
+        more than once, such as ``HISTORY``, the value lists every
+        occurrence.
+    """
+    headers = get_headers(filename, cache_file=cache_file)
+    if isinstance(ext, str):
+        matches = [header for header in headers if header['EXTNAME'] == ext.upper()]
+        if len(matches) == 0:
+            raise KeyError(f'Extension {ext} not found in {filename}')
+        header = matches[0]
+    else:
+        header = headers[ext]
+    return dict(zip(header['keywords'], header['values']))
+
+
+def get_headers(filename, cache_file=None):
+    """Return the headers of all extensions of the given file, reading
+    them from the file only if they are not cached or the file has
+    changed since they were cached.
+
+    Parameters
+    ----------
+    filename : str
+        Name, including path, of the fits file
+
+    cache_file : str
+        Cache database to use. If ``None``, the cache in the
+        ``outputs`` directory is used.
+
+    Returns
+    -------
+    headers : list
+        One dictionary for each extension, with the ``EXTNAME`` and
+        ``XTENSION`` of the extension (both ``PRIMARY`` for the
+        primary header), and lists of its header ``keywords`` and
+        ``values``.
+    """
+    if cache_file is None:
+        cache_file = get_cache_file()
+
+    stat = os.stat(filename)
+    headers = load_headers(os.path.abspath(filename), stat.st_mtime, stat.st_size, cache_file)
+
+    # The cached headers are shared, so give each caller its own lists
+    return [{key: (list(value) if isinstance(value, list) else value) for key, value in header.items()}
+            for header in headers]
+
+
+@lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def load_headers(filename, mtime, size, cache_file):
+    """Return the headers of the given version of a file from the cache
+    database, or read them from the file and add them to the database
+    if they are not there. Use ``get_headers`` rather than calling this
+    directly.
+
+    Parameters
+    ----------
+    filename : str
+        Absolute name of the fits file
+
+    mtime : float
+        Modification time of the file
+
+    size : int
+        Size of the file in bytes
+
+    cache_file : str
+        Cache database to use
+
+    Returns
+    -------
+    headers : list
+        Headers of the file, as returned by ``get_headers``
+    """
+    try:
+        connection = connect(cache_file)
+    except sqlite3.Error as error:
+        logging.warning(f'Unable to open the header cache {cache_file}: {error}')
+        return read_headers(filename)
+
+    try:
+        try:
+            row = connection.execute('SELECT mtime, size, headers FROM headers WHERE filename = ?',
+                                     (filename,)).fetchone()
+        except sqlite3.Error as error:
+            logging.warning(f'Unable to read the header cache {cache_file}: {error}')
+            row = None
+
+        if row is not None and row[0] == mtime and row[1] == size:
+            try:
+                return json.loads(row[2])
+            except (TypeError, ValueError):
+                # Entries that are not JSON, e.g. from an earlier version
+                # of the cache, are replaced
+                pass
+
+        headers = read_headers(filename)
+        try:
+            with connection:
+                connection.execute('INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?)',
+                                   (filename, mtime, size, json.dumps(headers)))
+        except sqlite3.Error as error:
+            logging.warning(f'Unable to add the headers of {filename} to the header cache: {error}')
+    finally:
+        connection.close()
+
+    return headers
+
+
+def read_headers(filename):
+    """Read the headers of all extensions of the given file.
+
+    Parameters
+    ----------
+    filename : str
+        Name, including path, of the fits file
+
+    Returns
+    -------
+    headers : list
+        Headers of the file, as returned by ``get_headers``
+    """
+    headers = []
+    with fits.open(filename) as hdulist:
+        for ext, hdu in enumerate(hdulist):
+            header = hdu.header
+            if ext == 0:
+                extname, xtension = 'PRIMARY', 'PRIMARY'
+            else:
+                extname, xtension = header.get('EXTNAME', ''), header.get('XTENSION', '')
+
+            keywords = [key for key in header.keys() if key not in EXCLUDED_KEYWORDS]
+            values = []
+            for key in keywords:
+                value = header[key]
+
+                # Commentary cards, undefined values, and complex values are
+                # stored as the text that is displayed for them, so that
+                # every value can be stored as JSON
+                if value is not None and not isinstance(value, (str, bool, int, float)):
+                    value = str(value)
+                values.append(value)
+
+            headers.append({'EXTNAME': extname, 'XTENSION': xtension, 'keywords': keywords, 'values': values})
+
+    return headers
+
+
+def warm_cache(filenames, cache_file=None):
+    """Add the headers of the given files to the cache, if they are not
+    already there.
+
+    Parameters
+    ----------
+    filenames : list
+        Names, including path, of the fits files
+
+    cache_file : str
+        Cache database to use. If ``None``, the cache in the
+        ``outputs`` directory is used.
+    """
+    for filename in filenames:
+        try:
+            get_headers(filename, cache_file=cache_file)
+        except (OSError, ValueError) as error:
+            logging.warning(f'Unable to cache the headers of {filename}: {error}')
+
+    # The headers do not need to stay in memory
+    load_headers.cache_clear()
+
+    logging.info(f"Header cache updated for {len(filenames)} files.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add the headers of files in the filesystem to the header cache')
+    parser.add_argument('--programs', nargs='+', type=int, default=None,
+                        help='Program numbers to cache (e.g. 1068 1220). The default is all programs.')
+    args = parser.parse_args()
+
+    filesystem = get_config()['filesystem']
+    if args.programs is None:
+        program_dirs = ['jw*']
+    else:
+        program_dirs = [f'jw{program:05d}' for program in args.programs]
+
+    filenames = []
+    for program_dir in program_dirs:
+        for access in ['public', 'proprietary']:
+            filenames.extend(glob.glob(os.path.join(filesystem, access, program_dir, 'jw*', '*.fits')))
+
+    warm_cache(sorted(filenames))
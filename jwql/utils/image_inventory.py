@@ -0,0 +1,322 @@
+#! /usr/bin/env python
+
+"""Inventory of the preview images and thumbnails in the filesystem.
+
+The inventory for each type of image is kept in an SQLite database
+file in the preview image or thumbnail filesystem, indexed by
+instrument, program, rootname, and suffix. Entries can be added from
+several processes at once, looked up by program or filename prefix
+without reading the whole inventory, and removed without rewriting
+the file. The database uses SQLite's default rollback journal rather
+than write-ahead logging, since the latter is not safe on network
+filesystems.
+
+Use
+---
+
+    This module can be imported as such:
+
+    ::
+
+        from jwql.utils import image_inventory
+        image_inventory.add_files('thumbnail', 'nircam', thumbnail_files)
+        thumbnails = image_inventory.get_files('thumbnail', 'nircam', program='01068')
+
+    The existing text file inventories can be imported into the
+    databases from the command line:
+
+    ::
+
+        python image_inventory.py
+"""
+
+import logging
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from jwql.utils import permissions
+from jwql.utils.constants import JWST_INSTRUMENT_NAMES, PREVIEW_IMAGE_LISTFILE, THUMBNAIL_LISTFILE
+from jwql.utils.utils import get_config
+
+# Number of seconds to wait for another process to release the database
+# before raising an error
+INVENTORY_TIMEOUT = 60.
+
+INVENTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    filename TEXT PRIMARY KEY,
+    basename TEXT NOT NULL,
+    instrument TEXT NOT NULL,
+    program TEXT,
+    rootname TEXT,
+    suffix TEXT
+);
+CREATE INDEX IF NOT EXISTS inventory_basename ON inventory (instrument, basename);
+CREATE INDEX IF NOT EXISTS inventory_program ON inventory (instrument, program);
+CREATE INDEX IF NOT EXISTS inventory_rootname ON inventory (rootname);
+CREATE INDEX IF NOT EXISTS inventory_suffix ON inventory (instrument, suffix);
+"""
+
+
+def add_files(filetype, instrument, file_list, inventory_file=None):
+    """Add files to the inventory. Files already in the inventory are
+    ignored. All files are added in a single transaction.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    instrument : str
+        Instrument name, e.g. ``nircam``
+
+    file_list : list
+        Names, including path, of the files to add
+
+    inventory_file : str
+        Inventory database to use. If ``None``, the inventory for
+        ``filetype`` in the filesystem is used.
+    """
+    if len(file_list) == 0:
+        return
+
+    rows = []
+    for filename in file_list:
+        basename, program, rootname, suffix = parse_inventory_name(filename)
+        rows.append((filename, basename, instrument.lower(), program, rootname, suffix))
+
+    connection = connect(filetype, inventory_file)
+    try:
+        with connection:
+            connection.executemany('INSERT OR IGNORE INTO inventory VALUES (?, ?, ?, ?, ?, ?)', rows)
+    finally:
+        connection.close()
+
+    logging.info(f"{filetype} image inventory updated with {len(file_list)} {instrument} entries.")
+
+
+def connect(filetype, inventory_file=None, read_only=False):
+    """Open the inventory database, creating it if necessary.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    inventory_file : str
+        Inventory database to use. If ``None``, the inventory for
+        ``filetype`` in the filesystem is used.
+
+    read_only : bool
+        If ``True``, open an existing database for reading only,
+        without creating or modifying it
+
+    Returns
+    -------
+    connection : sqlite3.Connection
+        Connection to the database. When used as a context manager,
+        the statements within are committed as a single transaction.
+    """
+    if inventory_file is None:
+        inventory_file = get_inventory_file(filetype)
+
+    if read_only:
+        uri = f'file:{pathname2url(os.path.abspath(inventory_file))}?mode=ro'
+        return sqlite3.connect(uri, uri=True, timeout=INVENTORY_TIMEOUT)
+
+    new_file = not os.path.isfile(inventory_file)
+    connection = sqlite3.connect(inventory_file, timeout=INVENTORY_TIMEOUT)
+    connection.executescript(INVENTORY_SCHEMA)
+    if new_file:
+        logging.info(f"Created {filetype} image inventory {inventory_file}")
+        permissions.set_permissions(inventory_file)
+
+    return connection
+
+
+def get_files(filetype, instrument, program=None, prefix=None, inventory_file=None):
+    """Return the files in the inventory for an instrument, optionally
+    restricted to a single program or to files whose names begin with
+    a given prefix.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    instrument : str
+        Instrument name, e.g. ``nircam``
+
+    program : str
+        Five-digit program number, e.g. ``01068``
+
+    prefix : str
+        Beginning of the file basenames, e.g. ``jw01068001001``
+
+    inventory_file : str
+        Inventory database to use. If ``None``, the inventory for
+        ``filetype`` in the filesystem is used.
+
+    Returns
+    -------
+    file_list : list
+        Names, including path, of the matching files, sorted by
+        basename. Empty if the inventory does not exist.
+    """
+    if inventory_file is None:
+        inventory_file = get_inventory_file(filetype)
+    if not os.path.isfile(inventory_file):
+        return []
+
+    query = 'SELECT filename FROM inventory WHERE instrument = ?'
+    params = [instrument.lower()]
+    if program is not None:
+        query += ' AND program = ?'
+        params.append('{:05d}'.format(int(program)))
+    if prefix is not None:
+        # A range on the indexed basename, rather than LIKE, so that the
+        # index is used regardless of case sensitivity settings
+        query += ' AND basename >= ? AND basename < ?'
+        params.extend([prefix, prefix + '\U0010ffff'])
+    query += ' ORDER BY basename'
+
+    connection = connect(filetype, inventory_file, read_only=True)
+    try:
+        file_list = [row[0] for row in connection.execute(query, params)]
+    finally:
+        connection.close()
+
+    return file_list
+
+
+def get_inventory_file(filetype):
+    """Return the location of the inventory database for the given
+    type of image.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    Returns
+    -------
+    inventory_file : str
+        Name, including path, of the inventory database
+    """
+    config = get_config()
+    if filetype == 'preview':
+        return os.path.join(config['preview_image_filesystem'], f'{PREVIEW_IMAGE_LISTFILE}.db')
+    elif filetype == 'thumbnail':
+        return os.path.join(config['thumbnail_filesystem'], f'{THUMBNAIL_LISTFILE}.db')
+    else:
+        raise ValueError(f'Unrecognized image inventory type: {filetype}')
+
+
+def import_listfile(filetype, instrument, listfile, inventory_file=None):
+    """Add the contents of a text file inventory, with one filename
+    per line, to the inventory database.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    instrument : str
+        Instrument name, e.g. ``nircam``
+
+    listfile : str
+        Name, including path, of the text file inventory
+
+    inventory_file : str
+        Inventory database to use. If ``None``, the inventory for
+        ``filetype`` in the filesystem is used.
+    """
+    with open(listfile) as fobj:
+        file_list = [line.strip() for line in fobj if line.strip()]
+    add_files(filetype, instrument, file_list, inventory_file=inventory_file)
+
+
+def import_listfiles():
+    """Import the text file inventories of preview images and
+    thumbnails for all instruments into the inventory databases.
+    This only needs to be done once, when moving from the text file
+    inventories to the databases.
+    """
+    config = get_config()
+    for filetype, basedir, basename in [('preview', config['preview_image_filesystem'], PREVIEW_IMAGE_LISTFILE),
+                                        ('thumbnail', config['thumbnail_filesystem'], THUMBNAIL_LISTFILE)]:
+        for instrument in JWST_INSTRUMENT_NAMES:
+            listfile = os.path.join(basedir, f'{basename}_{instrument}.txt')
+            if os.path.isfile(listfile):
+                logging.info(f'Importing {listfile}')
+                import_listfile(filetype, instrument, listfile)
+            else:
+                logging.warning(f'{filetype} image listfile not found at {listfile}. Skipping.')
+
+
+def parse_inventory_name(filename):
+    """Extract the indexed fields from the name of a preview image or
+    thumbnail, e.g. ``jw01068001001_02102_00001_nrcb1_rate_integ0.jpg``.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the preview image or thumbnail
+
+    Returns
+    -------
+    fields : tuple
+        The ``basename``, ``program``, ``rootname`` and ``suffix`` of
+        the file. ``program`` is ``None`` for files that do not follow
+        the JWST naming convention.
+    """
+    basename = os.path.basename(filename)
+    file_root = basename.split('_integ')[0].split('.')[0]
+    rootname, _, suffix = file_root.rpartition('_')
+
+    program = None
+    if basename.startswith('jw') and basename[2:7].isdigit():
+        program = basename[2:7]
+
+    return basename, program, rootname, suffix
+
+
+def remove_files(filetype, instrument, str_to_exclude, inventory_file=None):
+    """Remove all files whose names contain the given string from
+    the inventory of an instrument.
+
+    Parameters
+    ----------
+    filetype : str
+        Type of image, ``preview`` or ``thumbnail``
+
+    instrument : str
+        Instrument name, e.g. ``nircam``
+
+    str_to_exclude : str
+        Any files whose names contain this string are removed
+
+    inventory_file : str
+        Inventory database to use. If ``None``, the inventory for
+        ``filetype`` in the filesystem is used.
+
+    Returns
+    -------
+    n_removed : int
+        Number of files removed from the inventory
+    """
+    connection = connect(filetype, inventory_file)
+    try:
+        with connection:
+            cursor = connection.execute('DELETE FROM inventory WHERE instrument = ? AND instr(filename, ?) > 0',
+                                        (instrument.lower(), str_to_exclude))
+            n_removed = cursor.rowcount
+    finally:
+        connection.close()
+
+    return n_removed
+
+
+if __name__ == '__main__':
+    import_listfiles()
@@ -21,7 +21,7 @@ import os
 
 import numpy as np
 from astropy.io import fits
-from astropy.visualization import ZScaleInterval, MinMaxInterval, PercentileInterval
+from astropy.visualization import ZScaleInterval
 from astropy.wcs import WCS
 from bokeh.embed import components
 from bokeh.layouts import gridplot, layout
@@ -32,6 +32,8 @@ from bokeh.models import (
 from bokeh.plotting import figure, output_file, show, save
 from jwst.datamodels import dqflags
 
+from jwql.utils.preview_image import clipped_limits
+
 
 class InteractivePreviewImg:
     """Class to create the interactive Bokeh figure.
@@ -533,12 +535,8 @@ class InteractivePreviewImg:
 
         current_low = images[active].glyph.color_mapper.low
         current_high = images[active].glyph.color_mapper.high
-        preset_limits = {'ZScale': (current_low, current_high),
-                         'Min/Max': MinMaxInterval().get_limits(self.data),
-                         '99.5%': PercentileInterval(99.5).get_limits(self.data),
-                         '99%': PercentileInterval(99).get_limits(self.data),
-                         '95%': PercentileInterval(95).get_limits(self.data),
-                         '90%': PercentileInterval(90).get_limits(self.data)}
+        preset_limits = {'ZScale': (current_low, current_high)}
+        preset_limits.update(self.get_preset_limits())
         options = [*preset_limits.keys(), 'Custom']
         preset_label = Div(text="Percentile presets:")
         preset_select = Select(value='ZScale', options=options, width=120)
@@ -671,6 +669,20 @@ class InteractivePreviewImg:
         except (ValueError, TypeError):
             self.wcs_coord = None
 
+    def get_preset_limits(self):
+        """Calculate the limits for the percentile presets. The limits for all presets
+        are selected from the finite pixels in a single partition, rather than by
+        sorting the data for each preset.
+
+        Returns
+        -------
+        preset_limits : dict
+            Preset names and tuples of the lower and upper limits
+        """
+        presets = {'Min/Max': 0., '99.5%': 0.0025, '99%': 0.005, '95%': 0.025, '90%': 0.05}
+        limits = clipped_limits(self.data, list(presets.values()))
+        return {name: (float(low), float(high)) for name, (low, high) in zip(presets, limits)}
+
     def get_scale(self):
         """Calculate the limits for the display, following the ZScale function
         originally created or IRAF.
@@ -33,6 +33,10 @@ from jwql.utils import mast_utils
 # a MAST query.
 Mast._portal_api_connection.PAGESIZE = MAST_QUERY_LIMIT
 
+# Stride used to combine (x, y) pixel coordinates into a single linear
+# index. This must be larger than any x coordinate.
+PIXEL_INDEX_STRIDE = 2**16
+
 if not ON_GITHUB_ACTIONS and not ON_READTHEDOCS:
     # These lines are needed in order to use the Django models in a standalone
     # script (as opposed to code run as a result of a webpage request). If these
@@ -43,6 +47,29 @@ if not ON_GITHUB_ACTIONS and not ON_READTHEDOCS:
     from jwql.website.apps.jwql.models import RootFileInfo
 
 
+def bad_pixel_index(x_coords, y_coords):
+    """Convert lists of (x, y) pixel coordinates into a sorted array of
+    unique linear pixel indexes (``y * PIXEL_INDEX_STRIDE + x``), for use
+    with ``exclude_existing_pixels``.
+
+    Parameters
+    ----------
+    x_coords : list
+        x coordinates of the pixels
+
+    y_coords : list
+        y coordinates of the pixels
+
+    Returns
+    -------
+    pixel_index : numpy.ndarray
+        1D array of unique linear pixel indexes
+    """
+    x_coords = np.asarray(x_coords, dtype=np.int64)
+    y_coords = np.asarray(y_coords, dtype=np.int64)
+    return np.unique(y_coords * PIXEL_INDEX_STRIDE + x_coords)
+
+
 def exclude_asic_tuning(mast_results):
     """Given a list of file information from a MAST query, filter out
     files taken during ASIC tuning, which will have bad data in terms
@@ -65,6 +92,39 @@ def exclude_asic_tuning(mast_results):
     return filtered_results
 
 
+def exclude_existing_pixels(badpix, existing_index):
+    """Given a set of coordinates of bad pixels, remove those that are
+    present in an existing collection of pixels.
+
+    Parameters
+    ----------
+    badpix : tuple
+        Tuple of lists containing x and y pixel coordinates. (Output
+        of ``numpy.where`` call)
+
+    existing_index : numpy.ndarray
+        Linear indexes of the existing pixels, as returned by
+        ``bad_pixel_index``
+
+    Returns
+    -------
+    new_pixels_x : list
+        List of x coordinates of new bad pixels
+
+    new_pixels_y : list
+        List of y coordinates of new bad pixels
+    """
+    x_coords = np.asarray(badpix[0])
+    y_coords = np.asarray(badpix[1])
+    if len(x_coords) == 0:
+        return ([], [])
+
+    pixel_index = y_coords.astype(np.int64) * PIXEL_INDEX_STRIDE + x_coords.astype(np.int64)
+    new_pixels = ~np.isin(pixel_index, existing_index)
+
+    return (list(x_coords[new_pixels]), list(y_coords[new_pixels]))
+
+
 def initialize_instrument_monitor(module):
     """Configures a log file for the instrument monitor run and
     captures the start time of the monitor
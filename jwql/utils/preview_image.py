@@ -10,9 +10,12 @@ present. For each integration in the exposure, the first group is
 subtracted from the final group in order to create a difference image.
 The lower and upper limits to be displayed are defined as the
 ``clip_percent`` and ``(1. - clip_percent)`` percentile signals.
-``matplotlib`` is then used to display a linear- or log-stretched
-version of the image, with accompanying colorbar. The image is then
-saved.
+The image is linear- or log-stretched and mapped through the colormap
+lookup table to 8-bit RGB. Thumbnails are written directly with
+``Pillow``. Preview images are displayed with ``matplotlib``, along
+with an accompanying colorbar, using a figure that is created once
+per process for each image shape and reused for subsequent images.
+The image is then saved.
 
 Authors:
 --------
@@ -34,6 +37,8 @@ Use:
         im.make_image()
 """
 
+from collections import OrderedDict
+from functools import lru_cache
 import logging
 import os
 import socket
@@ -41,6 +46,7 @@ import warnings
 
 from astropy.io import fits
 import numpy as np
+from PIL import Image
 
 from jwql.utils import permissions
 from jwql.utils.constants import ON_GITHUB_ACTIONS, ON_READTHEDOCS
@@ -51,6 +57,9 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt  # noqa
 import matplotlib.colors as colors  # noqa
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa
+from matplotlib.cm import ScalarMappable  # noqa
+from matplotlib.figure import Figure  # noqa
 from matplotlib.ticker import AutoMinorLocator  # noqa
 
 if not ON_READTHEDOCS:
@@ -59,6 +68,28 @@ if not ON_READTHEDOCS:
 if not ON_GITHUB_ACTIONS and not ON_READTHEDOCS:
     CONFIGS = get_config()
 
+# Preview image figures are cached by image shape and display settings, and
+# reused for every image with the same shape. Only the most recently used
+# figures are kept.
+FIGURE_TEMPLATE_CACHE_SIZE = 8
+FIGURE_TEMPLATES = OrderedDict()
+
+# Size in pixels of the longest dimension of thumbnail images
+THUMBNAIL_SIZE = 232
+
+# When the signal limits of large images are estimated from a random
+# subsample of pixels, the maximum error in the fraction of pixels clipped
+# at each limit, and the probability that the error is within that bound
+LIMITS_SAMPLE_ERROR = 0.002
+LIMITS_SAMPLE_CONFIDENCE = 0.999
+
+# Maps of non-science pixels are cached for each map file, subarray, and
+# data shape. Only the most recently used maps are kept.
+NONSCI_MAP_CACHE_SIZE = 32
+
+# Header keywords giving the location of a subarray on the full detector
+SUBARRAY_KEYWORDS = ('SUBSTRT1', 'SUBSTRT2', 'SUBSIZE1', 'SUBSIZE2')
+
 
 class PreviewImage():
     """An object for generating and saving preview images, used by
@@ -73,11 +104,17 @@ class PreviewImage():
         The colormap used by ``matplotlib`` in the preview image.
         Default value is ``viridis``.
     data : obj
-        The data used to generate the preview image.
+        The data used to generate the preview image. The data are only
+        read into memory when this attribute is first accessed.
     dq : obj
         The DQ data used to generate the preview image.
     file : str
         The filename to generate the preview image from.
+    limits_error : float or None
+        If not ``None``, the signal limits are estimated from a random
+        subsample of the pixels, with at most this error in the
+        fraction of pixels clipped. Default is ``None``, which uses
+        all pixels.
     output_format : str
         The format to which the preview image is saved.  Options are
         ``jpg`` and ``thumb``
@@ -85,20 +122,26 @@ class PreviewImage():
         The output directory to which the preview image is saved.
     scaling : str
         The scaling used in the preview image.  Default is ``log``.
+    shape : tuple
+        The shape of the data in the file
     thumbnail_output_directory : str or None
         The output directory to which the thumbnail is saved.
 
     Methods
     -------
+    difference_frames(integrations)
+        Read the difference image for each of the given integrations
     difference_image(data)
         Create a difference image from the data
-    find_limits(data, pixmap, clipperc)
+    find_limits(data)
         Find the min and max signal levels after clipping by
-        ``clipperc``
+        ``clip_percent``
     get_data(filename, ext)
         Read in data from the given ``filename`` and ``ext``
+    get_data_info(filename, ext)
+        Find the shape of the data and the map of science pixels
     make_figure(image, integration_number, min_value, max_value, scale, maxsize, thumbnail)
-        Create the ``matplotlib`` figure
+        Create the ``matplotlib`` figure, or the thumbnail image
     make_image(max_img_size)
         Main function
     save_image(fname, thumbnail)
@@ -118,6 +161,7 @@ class PreviewImage():
         self.clip_percent = 0.01
         self.cmap = 'viridis'
         self.file = filename
+        self.limits_error = None
         self.output_format = 'jpg'
         self.preview_output_directory = None
         self.scaling = 'log'
@@ -125,8 +169,24 @@ class PreviewImage():
         self.preview_images = []
         self.thumbnail_images = []
 
-        # Read in file
-        self.data, self.dq = self.get_data(self.file, extension)
+        # Read in the shape of the data and the map of science pixels. The
+        # data themselves are only read when they are needed.
+        self.extension = extension
+        self._data = None
+        self.shape, self.dq = self.get_data_info(self.file, extension)
+
+    @property
+    def data(self):
+        """The data from the file, as returned by ``get_data``. These
+        are read in full the first time they are accessed."""
+        if self._data is None:
+            self._data = self.get_data(self.file, self.extension)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self.shape = value.shape
 
     def determine_map_file(self, header):
         """Determine which file contains the map of non-science pixels given a
@@ -166,6 +226,47 @@ class PreviewImage():
         else:
             self.nonsci_map_file = None
 
+    def difference_frames(self, integrations):
+        """
+        Read the difference image for each of the given integrations,
+        one at a time. Only the first and last groups of each of those
+        integrations are read from the file, so that memory use is
+        limited to a single frame regardless of the size of the file.
+        If the data have already been read into memory, the frames are
+        taken from there instead.
+
+        Parameters
+        ----------
+        integrations : iterable
+            Indexes of the integrations to read
+
+        Yields
+        ------
+        frame : numpy.ndarray
+            2D ``float32`` difference image (for 4D data) or image (for
+            2D or 3D data) of the integration
+        """
+        if self._data is not None:
+            diff_img = self.difference_image(self._data) if self._data.ndim == 4 else self._data
+            if diff_img.ndim == 2:
+                diff_img = np.expand_dims(diff_img, axis=0)
+            for integration in integrations:
+                yield diff_img[integration, :, :].astype(np.float32)
+            return
+
+        with fits.open(self.file) as hdulist:
+            # Sections only read, and scale, the requested part of the data
+            section = hdulist[self.extension].section
+            for integration in integrations:
+                if len(self.shape) == 4:
+                    frame = section[integration, self.shape[1] - 1, :, :].astype(np.float32)
+                    frame -= section[integration, 0, :, :]
+                elif len(self.shape) == 3:
+                    frame = section[integration, :, :].astype(np.float32)
+                else:
+                    frame = section[:, :].astype(np.float32)
+                yield frame
+
     def difference_image(self, data):
         """
         Create a difference image from the data. Use last group minus
@@ -188,7 +289,7 @@ class PreviewImage():
     def find_limits(self, data):
         """
         Find the minimum and maximum signal levels after clipping the
-        top and bottom ``clipperc`` of the pixels.
+        top and bottom ``clip_percent`` of the science pixels.
 
         Parameters
         ----------
@@ -200,39 +301,12 @@ class PreviewImage():
         results : tuple
             Tuple of floats, minimum and maximum signal levels
         """
-        # Ignore any pixels that are NaN
-        finite = np.isfinite(data)
-
-        # If all non-science pixels are NaN then we're sunk. Scale
-        # from 0 to 1.
-        if not np.any(finite):
-            logging.info('No pixels with finite signal. Scaling from 0 to 1')
-            return (0., 1.)
-
-        # Combine maps of science pixels and finite pixels
-        pixmap = self.dq & finite
-
-        # If all non-science pixels are NaN then we're sunk. Scale
-        # from 0 to 1.
-        if not np.any(pixmap):
-            logging.info('No pixels with finite signal. Scaling from 0 to 1')
-            return (0., 1.)
-
-        sorted_pix = np.sort(data[pixmap], axis=None)
-
-        # Determine how many pixels to clip off of the high and low ends
-        nelem = np.sum(pixmap)
-        numclip = np.int32(self.clip_percent * nelem)
-
-        # Determine min and max scaling levels
-        minval = sorted_pix[numclip]
-        maxval = sorted_pix[-numclip - 1]
-        return (minval, maxval)
+        return clipped_limits(data, [self.clip_percent], pixmap=self.dq, max_error=self.limits_error)[0]
 
     def get_data(self, filename, ext):
         """
-        Read in the data from the given file and extension.  Also find
-        how many rows/cols of reference pixels are present.
+        Read in all of the data from the given file and extension. For
+        4D data, only the first and last groups are read.
 
         Parameters
         ----------
@@ -245,6 +319,31 @@ class PreviewImage():
         -------
         data : obj
             Science data from file. A 2-, 3-, or 4D numpy ndarray
+        """
+        with fits.open(filename) as hdulist:
+            if hdulist[ext].header['NAXIS'] == 4:
+                data = hdulist[ext].data[:, [0, -1], :, :].astype(float)
+            else:
+                data = hdulist[ext].data.astype(float)
+        return data
+
+    def get_data_info(self, filename, ext):
+        """
+        Find the shape of the data in the given file and extension,
+        without reading the data themselves.  Also find how many
+        rows/cols of reference pixels are present.
+
+        Parameters
+        ----------
+        filename : str
+            Name of fits file containing data
+        ext : str
+            Extension name to be read in
+
+        Returns
+        -------
+        shape : tuple
+            Shape of the science data in the file
         dq : obj
             2D ``ndarray`` boolean map of reference pixels. Science
             pixels flagged as ``True`` and non-science pixels are
@@ -259,12 +358,8 @@ class PreviewImage():
                     except KeyError:
                         pass
                 if ext in extnames:
-                    dimensions = len(hdulist[ext].data.shape)
-                    if dimensions == 4:
-                        data = hdulist[ext].data[:, [0, -1], :, :].astype(float)
-                    else:
-                        data = hdulist[ext].data.astype(float)
-                    yd, xd = data.shape[-2:]
+                    shape = hdulist[ext].shape
+                    yd, xd = shape[-2:]
                     try:
                         self.units = f"{hdulist[ext].header['BUNIT']}  "
                     except KeyError:
@@ -282,9 +377,7 @@ class PreviewImage():
                     # data itself.
                     if 'miri' in filename:
                         if 'mirimage' in filename:
-                            dq = self.nonsci_from_file()
-                            dq = crop_to_subarray(dq, hdulist[0].header, xd, yd)
-                            dq = expand_for_i2d(dq, xd, yd)
+                            dq = subarray_nonsci_map(hdulist[0].header, xd, yd, self.nonsci_map_file)
                         else:
                             # For MIRI MRS/LRS data, we don't worry about non-science pixels, so create a map where all
                             # pixels are good.
@@ -299,29 +392,21 @@ class PreviewImage():
                                 # ISR2 data are always full frame, so no need to crop to subarray
                                 # and since we are guaranteed to have an uncal file, no need to expand for i2d
                             elif 'i2d' in filename:
-                                dq = create_nir_nonsci_map()
-                                dq = crop_to_subarray(dq, hdulist[0].header, xd, yd)
-                                dq = expand_for_i2d(dq, xd, yd)
+                                dq = subarray_nonsci_map(hdulist[0].header, xd, yd)
                         else:
                             # NIRSpec observations that do not use IRS2 use the "standard" NIR detector non-science map.
                             # i.e. 4 outer rows and columns are refernece pixels
-                            dq = create_nir_nonsci_map()
-                            dq = crop_to_subarray(dq, hdulist[0].header, xd, yd)
-                            dq = expand_for_i2d(dq, xd, yd)
+                            dq = subarray_nonsci_map(hdulist[0].header, xd, yd)
                     else:
                         # All NIRCam, NIRISS, and FGS observations also use the "standard" NIR detector non-science map.
-                        dq = create_nir_nonsci_map()
-                        dq = crop_to_subarray(dq, hdulist[0].header, xd, yd)
-                        dq = expand_for_i2d(dq, xd, yd)
+                        dq = subarray_nonsci_map(hdulist[0].header, xd, yd)
                 elif 'rate' in filename:
                     # For rate/rateints images all we need to worry about is MIRI imaging files. For those we use
                     # the external non-science map, because the pipeline does not add the NON_SCIENCE flags
                     # to the MIRI DQ extensions until the data are flat fielded, which is after the rate
                     # files have been created.
                     if 'mirimage' in filename:
-                        dq = self.nonsci_from_file()
-                        dq = crop_to_subarray(dq, hdulist[0].header, xd, yd)
-                        dq = expand_for_i2d(dq, xd, yd)
+                        dq = subarray_nonsci_map(hdulist[0].header, xd, yd, self.nonsci_map_file)
                     else:
                         # For everything other than MIRI imaging, we get the non-science map from the
                         # DQ array in the file.
@@ -345,10 +430,10 @@ class PreviewImage():
         else:
             raise FileNotFoundError('WARNING: {} does not exist!'.format(filename))
 
-        if dq.shape != data.shape[-2:]:
+        if dq.shape != shape[-2:]:
             raise ValueError(f'DQ array does not have the same shape as the data in {filename}')
 
-        return data, dq
+        return shape, dq
 
     def get_nonsci_map(self, hdulist, extensions, xdim, ydim):
         """Create a map of non-science pixels for a given HDUList. If there is no DQ
@@ -394,7 +479,9 @@ class PreviewImage():
     def make_figure(self, image, integration_number, min_value, max_value,
                     scale, maxsize=8, thumbnail=False):
         """
-        Create the matplotlib figure of the image
+        Create the matplotlib figure of the image. For thumbnails, no
+        figure is created; the colormapped image is resized and kept
+        in ``self.thumbnail``.
 
         Parameters
         ----------
@@ -419,150 +506,73 @@ class PreviewImage():
         thumbnail : bool
             True to create a thumbnail image, False to create the full
             preview image
-
-        Returns
-        -------
-        result : obj
-            Matplotlib Figure object
         """
 
         # Check the input scaling
         if scale not in ['linear', 'log']:
             raise ValueError('WARNING: scaling option {} not supported.'.format(scale))
 
-        # Set the figure size
-        yd, xd = image.shape
-        ratio = yd / xd
-        if xd >= yd:
-            xsize = maxsize
-            ysize = maxsize * ratio
-        else:
-            ysize = maxsize
-            xsize = maxsize / ratio
+        rgb = colorize(image, min_value, max_value, scale, self.cmap)
 
-        if scale == 'log':
+        # If making a thumbnail, skip matplotlib entirely
+        if thumbnail:
+            self.fig = None
+            self.thumbnail = make_thumbnail(rgb)
+            return
+
+        template = get_figure_template(image.shape, maxsize, scale, self.cmap)
+        self.fig = template['fig']
+
+        # Average down to roughly the displayed resolution, so that matplotlib
+        # does not have to resample the full image
+        factor = min(rgb.shape[0] // template['display_shape'][0], rgb.shape[1] // template['display_shape'][1])
+        if factor > 1:
+            rgb = np.asarray(Image.fromarray(rgb).reduce(factor))
+        template['image'].set_data(rgb)
 
+        if scale == 'log':
             # Shift data so everything is positive
-            shiftdata = image - min_value + 1
             shiftmin = 1
             shiftmax = max_value - min_value + 1
-
-            # If making a thumbnail, make a figure with no axes
-            if thumbnail:
-                self.fig, ax = plt.subplots(figsize=(3, 3))
-                cax = ax.imshow(shiftdata,
-                                norm=colors.LogNorm(vmin=shiftmin,
-                                                    vmax=shiftmax),
-                                cmap=self.cmap)
-                # Invert y axis
-                plt.gca().invert_yaxis()
-
-                plt.axis('off')
-                cax.axes.get_xaxis().set_visible(False)
-                cax.axes.get_yaxis().set_visible(False)
-
-            # If preview image, add axes and colorbars
+            template['mappable'].set_clim(shiftmin, shiftmax)
+
+            # Add colorbar, with original data values
+            tickvals = np.logspace(np.log10(shiftmin), np.log10(shiftmax), 5)
+            tlabelflt = tickvals + min_value - 1
+
+            # Adjust the number of digits after the decimal point
+            # in the colorbar labels based on the signal range
+            delta = tlabelflt[-1] - tlabelflt[0]
+            if delta >= 100:
+                dig = 0
+            elif ((delta < 100) & (delta >= 10)):
+                dig = 1
+            elif ((delta < 10) & (delta >= 1)):
+                dig = 2
+            elif delta < 1:
+                dig = 3
             else:
-                self.fig, ax = plt.subplots(figsize=(xsize, ysize))
-                cax = ax.imshow(shiftdata,
-                                norm=colors.LogNorm(vmin=shiftmin,
-                                                    vmax=shiftmax),
-                                cmap=self.cmap)
-                # Invert y axis
-                plt.gca().invert_yaxis()
-
-                # Add colorbar, with original data values
-                tickvals = np.logspace(np.log10(shiftmin), np.log10(shiftmax), 5)
-                tlabelflt = tickvals + min_value - 1
-
-                # Adjust the number of digits after the decimal point
-                # in the colorbar labels based on the signal range
-                delta = tlabelflt[-1] - tlabelflt[0]
-                if delta >= 100:
-                    dig = 0
-                elif ((delta < 100) & (delta >= 10)):
-                    dig = 1
-                elif ((delta < 10) & (delta >= 1)):
-                    dig = 2
-                elif delta < 1:
-                    dig = 3
-                else:
-                    dig = 2
-                format_string = "%.{}f".format(dig)
-                tlabelstr = [format_string % number for number in tlabelflt]
-
-                # This seems to correctly remove the ticks and labels we want to remove. It gives a warning that
-                # it doesn't work on log scales, which we don't care about. So let's ignore that warning.
-                warnings.filterwarnings("ignore", message="AutoMinorLocator does not work with logarithmic scale")
-
-                xyratio = xsize / ysize
-                if xyratio < 1.6:
-                    # For apertures that are taller than they are wide, square, or that are wider than
-                    # they are tall but still reasonably close to square, put the colorbar on the right
-                    # side of the image.
-
-                    # Some magic numbers arrived at through testing aspect ratios for all apertures
-                    if xyratio > 0.4:
-                        cb_width = 0.05
-                    else:
-                        cb_width = 0.05 * 0.4 / xyratio
-
-                    upper_x_anchor = 0.02
-                    if xyratio < 0.1:
-                        upper_x_anchor = 0.12
-
-                    cbax = self.fig.add_axes([ax.get_position().x1 + upper_x_anchor,
-                                              ax.get_position().y0,
-                                              cb_width,
-                                              ax.get_position().height
-                                              ])
-                    cbar = self.fig.colorbar(cax, cax=cbax, ticks=tickvals, orientation='vertical')
-                    cbar.ax.yaxis.set_minor_locator(AutoMinorLocator(n=0))
-                    cbar.ax.set_yticklabels(tlabelstr)
-                    cbar.ax.set_ylabel(self.units, labelpad=7, rotation=270)
-                else:
-                    # For apertures that are significantly wider than they are tall, put the colorbar
-                    # under the image.
-
-                    # Again, some magic numbers controlling the positioning and height of the
-                    # colorbar, based on testing.
-                    lower_y_anchor = 0. - (xyratio / 14.5)
-                    cb_height = 0.07 * (np.log2(xyratio) - 1)
-
-                    cbax = self.fig.add_axes([ax.get_position().x0,
-                                              ax.get_position().y0 + lower_y_anchor,
-                                              ax.get_position().width,
-                                              cb_height])
-                    cbar = self.fig.colorbar(cax, cax=cbax, ticks=tickvals, orientation='horizontal')
-                    cbar.ax.xaxis.set_minor_locator(AutoMinorLocator(n=0))
-                    cbar.ax.set_xticklabels(tlabelstr)
-                    cbar.ax.set_xlabel(self.units, labelpad=7, rotation=0)
-
-                ax.set_xlabel('Pixels', fontsize=maxsize * 5. / 4)
-                ax.set_ylabel('Pixels', fontsize=maxsize * 5. / 4)
-                ax.tick_params(labelsize=maxsize)
-                plt.rcParams.update({'axes.titlesize': 'small'})
-                plt.rcParams.update({'font.size': maxsize * 5. / 4})
-                plt.rcParams.update({'axes.labelsize': maxsize * 5. / 4})
-                plt.rcParams.update({'ytick.labelsize': maxsize * 5. / 4})
-                plt.rcParams.update({'xtick.labelsize': maxsize * 5. / 4})
+                dig = 2
+            format_string = "%.{}f".format(dig)
+            tlabelstr = [format_string % number for number in tlabelflt]
+
+            # Updating the color limits resets the colorbar locators, so the
+            # ticks are set again for each image
+            cbar = template['cbar']
+            cbar.set_ticks(tickvals, labels=tlabelstr)
+            if cbar.orientation == 'vertical':
+                cbar.ax.yaxis.set_minor_locator(AutoMinorLocator(n=0))
+                cbar.ax.set_ylabel(self.units, labelpad=7, rotation=270)
+            else:
+                cbar.ax.xaxis.set_minor_locator(AutoMinorLocator(n=0))
+                cbar.ax.set_xlabel(self.units, labelpad=7, rotation=0)
 
         elif scale == 'linear':
-            self.fig, ax = plt.subplots(figsize=(xsize, ysize))
-            cax = ax.imshow(image, clim=(min_value, max_value), cmap=self.cmap)
-
-            # Invert y axis
-            plt.gca().invert_yaxis()
-
-            if not thumbnail:
-                cbar = fig.colorbar(cax)
-                ax.set_xlabel('Pixels')
-                ax.set_ylabel('Pixels')
+            template['mappable'].set_clim(min_value, max_value)
 
-        # If preview image, set a title
-        if not thumbnail:
-            filename = os.path.split(self.file)[-1]
-            ax.set_title(filename + ' Int: {}'.format(int(integration_number)))
+        # Set the title
+        filename = os.path.split(self.file)[-1]
+        template['ax'].set_title(filename + ' Int: {}'.format(int(integration_number)))
 
     def make_image(self, max_img_size=8.0, create_thumbnail=False):
         """The main function of the ``PreviewImage`` class.
@@ -576,33 +586,12 @@ class PreviewImage():
             If True, a thumbnail image is created and saved.
         """
 
-        shape = self.data.shape
-
-        if len(shape) == 4:
-            # Create difference image(s)
-            diff_img = self.difference_image(self.data)
-        elif len(shape) < 4:
-            diff_img = self.data
-
-        # If there are multiple integrations in the file,
-        # work on one integration at a time from here onwards
-        ndim = len(diff_img.shape)
-        if ndim == 2:
-            diff_img = np.expand_dims(diff_img, axis=0)
-        nint, ny, nx = diff_img.shape
-
-        # If there are 10 integrations or less, make image for every integration
-        # If there are more than 10 integrations, then make image for every 10th integration
-        # If there are more than 100 integrations, then make image for every 100th integration
-        if nint <= 10:
-            integration_range = range(nint)
-        elif 11 <= nint <= 100:
-            integration_range = range(0, nint, 10)
-        else:
-            integration_range = range(0, nint, 100)
+        # If there are multiple integrations in the file, work on one
+        # integration at a time, reading only those that are displayed
+        nint = self.shape[0] if len(self.shape) > 2 else 1
+        integration_range = select_integrations(nint)
 
-        for i in integration_range:
-            frame = diff_img[i, :, :]
+        for i, frame in zip(integration_range, self.difference_frames(integration_range)):
 
             # Find signal limits for the display
             minval, maxval = self.find_limits(frame)
@@ -623,11 +612,9 @@ class PreviewImage():
             self.make_figure(frame, i, minval, maxval, self.scaling.lower(),
                              maxsize=max_img_size, thumbnail=False)
             self.save_image(outfile, thumbnail=False)
-            plt.close(self.fig)
             self.preview_images.append(outfile)
 
-            # Create thumbnail image matplotlib object, only for the
-            # first integration
+            # Create thumbnail image, only for the first integration
             if i == 0 and create_thumbnail:
                 if self.thumbnail_output_directory is None:
                     outdir = indir
@@ -637,24 +624,19 @@ class PreviewImage():
                 self.make_figure(frame, i, minval, maxval, self.scaling.lower(),
                                  maxsize=max_img_size, thumbnail=True)
                 self.save_image(outfile, thumbnail=True)
-                plt.close(self.fig)
                 self.thumbnail_images.append(self.thumbnail_filename)
 
     def nonsci_from_file(self):
-        """Read in a map of non-science/reference pixels from a fits file
-
-        Parameters
-        ----------
-        filename : str
-            Name of fits file to be read in.
+        """Read in a map of non-science/reference pixels from the fits
+        file given by ``self.nonsci_map_file``. The map is only read
+        once per process.
 
         Returns
         -------
         map : numpy.ndarray
-            2D boolean array of pixel values
+            Read-only 2D boolean array of pixel values
         """
-        map = fits.getdata(self.nonsci_map_file)
-        return map.astype(bool)
+        return nonsci_map(self.nonsci_map_file)
 
     def save_image(self, fname, thumbnail=False):
         """
@@ -663,9 +645,6 @@ class PreviewImage():
 
         Parameters
         ----------
-        image : obj
-            A ``matplotlib`` figure object
-
         fname : str
             Output filename
 
@@ -673,19 +652,191 @@ class PreviewImage():
             True if saving a thumbnail image, false for the full
             preview image.
         """
-        plt.savefig(fname, bbox_inches='tight', pad_inches=0)
-        permissions.set_permissions(fname)
-
-        # If the image is a thumbnail, rename to '.thumb'
+        # If the image is a thumbnail, save as JPEG with a '.thumb' extension
         if thumbnail:
             self.thumbnail_filename = fname.replace('.jpg', '.thumb')
-            os.rename(fname, self.thumbnail_filename)
+            self.thumbnail.save(self.thumbnail_filename, format='JPEG')
+            permissions.set_permissions(self.thumbnail_filename)
             logging.info('\tSaved image to {}'.format(self.thumbnail_filename))
         else:
+            # Computing the tight bounding box does not require rendering the
+            # image, so pass it to savefig rather than using bbox_inches='tight',
+            # which draws the whole figure twice
+            bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer())
+            self.fig.savefig(fname, bbox_inches=bbox, pad_inches=0)
+            permissions.set_permissions(fname)
             logging.info('\tSaved image to {}'.format(fname))
             self.thumbnail_filename = None
 
 
+def clipped_limits(data, clip_percents, pixmap=None, max_error=None, confidence=LIMITS_SAMPLE_CONFIDENCE,
+                   seed=0):
+    """Find the minimum and maximum signal levels after clipping the
+    top and bottom ``clip_percent`` of the finite pixels, for each of
+    ``clip_percents``. Rather than sorting the pixels, the order
+    statistics for all of the limits are selected with a single call
+    to ``numpy.partition``.
+
+    If ``max_error`` is given, the limits are instead estimated from a
+    random subsample of the pixels, drawn with replacement. The number
+    of samples is chosen using the Dvoretzky-Kiefer-Wolfowitz
+    inequality, so that with probability ``confidence`` the fraction
+    of pixels below each limit differs from the requested fraction by
+    no more than ``max_error``. Images with fewer pixels than that
+    always use all pixels.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Array of floats
+
+    clip_percents : list
+        Fractions of the pixels to clip from each end, e.g. ``[0.01]``
+
+    pixmap : numpy.ndarray
+        Boolean map with the same shape as ``data``. If given, only
+        pixels that are ``True`` are used.
+
+    max_error : float
+        Maximum error in the fraction of pixels clipped when using a
+        subsample of the pixels. If ``None``, all pixels are used.
+
+    confidence : float
+        Probability that the error of the subsample estimate is within
+        ``max_error``
+
+    seed : int
+        Seed for the random subsample, so that the limits are
+        reproducible
+
+    Returns
+    -------
+    limits : list
+        Tuples of floats, minimum and maximum signal levels, for each
+        of ``clip_percents``
+    """
+    valid = np.isfinite(data)
+    if pixmap is not None:
+        valid = valid & pixmap
+    nvalid = np.count_nonzero(valid)
+
+    # If all science pixels are NaN then we're sunk. Scale from 0 to 1.
+    if nvalid == 0:
+        logging.info('No pixels with finite signal. Scaling from 0 to 1')
+        return [(0., 1.)] * len(clip_percents)
+
+    nsample = nvalid
+    if max_error is not None:
+        nsample = int(np.ceil(np.log(2. / (1. - confidence)) / (2. * max_error ** 2)))
+
+    if nsample < nvalid:
+        # Draw random pixels from the whole image and keep the valid ones,
+        # which avoids copying all of the valid pixels
+        rng = np.random.default_rng(seed)
+        flat_data = data.ravel()
+        flat_valid = valid.ravel()
+        samples = []
+        nfound = 0
+        while nfound < nsample:
+            ndraw = int(1.1 * (nsample - nfound) * valid.size / nvalid) + 1
+            index = rng.integers(0, valid.size, ndraw)
+            index = index[flat_valid[index]]
+            samples.append(flat_data[index])
+            nfound += len(index)
+        values = np.concatenate(samples)[:nsample]
+    else:
+        values = data[valid]
+
+    # Determine how many pixels to clip off of the high and low ends, and
+    # select those order statistics in place
+    nelem = len(values)
+    kth = []
+    for clip_percent in clip_percents:
+        numclip = int(clip_percent * nelem)
+        kth.append((numclip, nelem - numclip - 1))
+    values.partition(np.unique(kth))
+
+    return [(values[low], values[high]) for low, high in kth]
+
+
+def colorize(image, min_value, max_value, scale='log', cmap='viridis'):
+    """Map an image to 8-bit RGB through the lookup table of a
+    colormap, using the same normalization as ``imshow`` with a
+    ``LogNorm`` or linear stretch between ``min_value`` and
+    ``max_value``. Pixels that cannot be displayed (e.g. NaN, or
+    non-positive after the shift for log scaling) are white.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        2D array of floats
+
+    min_value : float
+        Minimum value for display
+
+    max_value : float
+        Maximum value for display
+
+    scale : str
+        Image scaling (``log``, ``linear``)
+
+    cmap : str
+        Name of the ``matplotlib`` colormap
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        3D ``uint8`` array with shape ``(ny, nx, 3)``
+    """
+    lut = colormap_lut(cmap)
+
+    # Work in single precision, in place, to limit time and memory use on
+    # full frame images
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if scale == 'log':
+            # Shift data so everything is positive
+            normed = np.asarray(image, dtype=np.float32) - np.float32(min_value - 1)
+            bad = ~(normed > 0)
+            span = np.log10(max_value - min_value + 1)
+            np.log10(normed, out=normed)
+        else:
+            normed = np.asarray(image, dtype=np.float32) - np.float32(min_value)
+            bad = ~np.isfinite(normed)
+            span = max_value - min_value
+
+        # Scale to the lookup table, with out of range values taking the
+        # end colors, as the colormap does by default
+        if span > 0:
+            normed *= np.float32(len(lut) / span)
+        else:
+            normed[:] = 0.
+        np.clip(normed, 0, len(lut) - 1, out=normed)
+
+    normed[bad] = 0
+    rgb = np.take(lut, normed.astype(np.uint8), axis=0)
+    rgb[bad] = 255
+    return rgb
+
+
+@lru_cache()
+def colormap_lut(cmap):
+    """Return the lookup table of a ``matplotlib`` colormap as 8-bit
+    RGB values.
+
+    Parameters
+    ----------
+    cmap : str
+        Name of the ``matplotlib`` colormap
+
+    Returns
+    -------
+    lut : numpy.ndarray
+        2D ``uint8`` array with shape ``(256, 3)``
+    """
+    colormap = plt.get_cmap(cmap).resampled(256)
+    return colormap(np.arange(256), bytes=True)[:, :3]
+
+
 def create_nir_nonsci_map():
     """Create a map of non-science pixels for a near-IR detector
 
@@ -726,19 +877,36 @@ def crop_to_subarray(arr, header, xdim, ydim):
     arr : numpy.ndarray
         arr, cropped down to the size specified in the header
     """
-    # Pixel coordinates in the headers are 1-indexed. Subtract 1 to get them into
-    # python's 0-indexed system
+    return _crop(arr, _subarray_location(header), xdim, ydim)
+
+
+def _subarray_location(header):
+    """Return the values of the ``SUBARRAY_KEYWORDS`` in a header, or
+    ``None`` if any are missing. See ``crop_to_subarray``.
+    """
     try:
-        xstart = header['SUBSTRT1'] - 1
-        xlen = header['SUBSIZE1']
-        ystart = header['SUBSTRT2'] - 1
-        ylen = header['SUBSIZE2']
+        return tuple(header[keyword] for keyword in SUBARRAY_KEYWORDS)
     except KeyError:
         # If subarray info is missing from the header, then we don't know which
         # part of the dq array to extract. Rather than raising an exception, let's
         # extract a portion of the dq array that is centered on the full frame
         # array, so that we can still create a preview image later.
         logging.info(f"No subarray location information in {header['FILENAME']}. Extracting a portion of the DQ array centered on the full frame.")
+        return None
+
+
+def _crop(arr, subarray, xdim, ydim):
+    """Crop a full frame array down to a subarray, or, if ``subarray``
+    is ``None``, to a ``ydim`` x ``xdim`` portion centered on the full
+    frame. See ``crop_to_subarray``.
+    """
+    if subarray is not None:
+        # Pixel coordinates in the headers are 1-indexed. Subtract 1 to get them into
+        # python's 0-indexed system
+        xstart, ystart, xlen, ylen = subarray
+        xstart -= 1
+        ystart -= 1
+    else:
         arr_ydim, arr_xdim = arr.shape
         ystart = (arr_ydim // 2) - (ydim // 2)
         xstart = (arr_xdim // 2) - (xdim // 2)
@@ -795,6 +963,162 @@ def expand_for_i2d(array, xdim, ydim):
         return array
 
 
+def get_figure_template(shape, maxsize, scale, cmap):
+    """Return the preview image figure for images of the given shape
+    and display settings, creating it if it is not in the cache. The
+    figure contains the axes, image, colorbar and labels; only the
+    image data, color limits, colorbar tick labels and title need to
+    be updated for each image.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the 2D image, ``(ny, nx)``
+
+    maxsize : int
+        Size of the longest dimension of the output figure (inches)
+
+    scale : str
+        Image scaling (``log``, ``linear``)
+
+    cmap : str
+        Name of the ``matplotlib`` colormap
+
+    Returns
+    -------
+    template : dict
+        The ``fig``, ``ax``, ``image`` artist, colorbar ``mappable``
+        and ``cbar`` of the figure, and the ``display_shape`` of the
+        image in screen pixels
+    """
+    key = (tuple(shape), maxsize, scale, cmap)
+    if key in FIGURE_TEMPLATES:
+        FIGURE_TEMPLATES.move_to_end(key)
+        return FIGURE_TEMPLATES[key]
+
+    # Set the figure size
+    yd, xd = shape
+    ratio = yd / xd
+    if xd >= yd:
+        xsize = maxsize
+        ysize = maxsize * ratio
+    else:
+        ysize = maxsize
+        xsize = maxsize / ratio
+
+    if scale == 'log':
+        # This seems to correctly remove the ticks and labels we want to remove. It gives a warning that
+        # it doesn't work on log scales, which we don't care about. So let's ignore that warning.
+        warnings.filterwarnings("ignore", message="AutoMinorLocator does not work (with|on) logarithmic scale")
+
+        plt.rcParams.update({'axes.titlesize': 'small'})
+        plt.rcParams.update({'font.size': maxsize * 5. / 4})
+        plt.rcParams.update({'axes.labelsize': maxsize * 5. / 4})
+        plt.rcParams.update({'ytick.labelsize': maxsize * 5. / 4})
+        plt.rcParams.update({'xtick.labelsize': maxsize * 5. / 4})
+
+    # Create the figure outside of pyplot, so that it is not tracked as an
+    # open figure while it is cached
+    fig = Figure(figsize=(xsize, ysize))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+
+    # The image is colormapped before display, so the colorbar is drawn
+    # from a separate mappable carrying the colormap and normalization.
+    # The extent keeps the axes in units of the original pixels when the
+    # displayed image has been averaged down.
+    image = ax.imshow(np.zeros((yd, xd, 3), dtype=np.uint8), origin='lower',
+                      extent=(-0.5, xd - 0.5, -0.5, yd - 0.5))
+    if scale == 'log':
+        mappable = ScalarMappable(norm=colors.LogNorm(vmin=1, vmax=10), cmap=cmap)
+    else:
+        mappable = ScalarMappable(norm=colors.Normalize(vmin=0, vmax=1), cmap=cmap)
+
+    if scale == 'log':
+        xyratio = xsize / ysize
+        if xyratio < 1.6:
+            # For apertures that are taller than they are wide, square, or that are wider than
+            # they are tall but still reasonably close to square, put the colorbar on the right
+            # side of the image.
+
+            # Some magic numbers arrived at through testing aspect ratios for all apertures
+            if xyratio > 0.4:
+                cb_width = 0.05
+            else:
+                cb_width = 0.05 * 0.4 / xyratio
+
+            upper_x_anchor = 0.02
+            if xyratio < 0.1:
+                upper_x_anchor = 0.12
+
+            cbax = fig.add_axes([ax.get_position().x1 + upper_x_anchor,
+                                 ax.get_position().y0,
+                                 cb_width,
+                                 ax.get_position().height
+                                 ])
+            cbar = fig.colorbar(mappable, cax=cbax, orientation='vertical')
+        else:
+            # For apertures that are significantly wider than they are tall, put the colorbar
+            # under the image.
+
+            # Again, some magic numbers controlling the positioning and height of the
+            # colorbar, based on testing.
+            lower_y_anchor = 0. - (xyratio / 14.5)
+            cb_height = 0.07 * (np.log2(xyratio) - 1)
+
+            cbax = fig.add_axes([ax.get_position().x0,
+                                 ax.get_position().y0 + lower_y_anchor,
+                                 ax.get_position().width,
+                                 cb_height])
+            cbar = fig.colorbar(mappable, cax=cbax, orientation='horizontal')
+
+        ax.set_xlabel('Pixels', fontsize=maxsize * 5. / 4)
+        ax.set_ylabel('Pixels', fontsize=maxsize * 5. / 4)
+        ax.tick_params(labelsize=maxsize)
+    else:
+        cbar = fig.colorbar(mappable, ax=ax)
+        ax.set_xlabel('Pixels')
+        ax.set_ylabel('Pixels')
+
+    # Size of the displayed image in screen pixels
+    ax.apply_aspect()
+    display_shape = (max(int(ax.bbox.height), 1), max(int(ax.bbox.width), 1))
+
+    template = {'fig': fig, 'ax': ax, 'image': image, 'mappable': mappable, 'cbar': cbar,
+                'display_shape': display_shape}
+    FIGURE_TEMPLATES[key] = template
+    if len(FIGURE_TEMPLATES) > FIGURE_TEMPLATE_CACHE_SIZE:
+        FIGURE_TEMPLATES.popitem(last=False)
+
+    return template
+
+
+def make_thumbnail(rgb):
+    """Create a thumbnail from a colormapped image, resized so that
+    its longest dimension is ``THUMBNAIL_SIZE`` pixels.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        3D ``uint8`` array with shape ``(ny, nx, 3)``, with the first
+        row at the bottom of the image
+
+    Returns
+    -------
+    thumbnail : PIL.Image.Image
+        The thumbnail image
+    """
+    yd, xd = rgb.shape[:2]
+    factor = THUMBNAIL_SIZE / max(yd, xd)
+    size = (max(int(round(xd * factor)), 1), max(int(round(yd * factor)), 1))
+
+    # Average when shrinking, to avoid aliasing; keep pixels sharp when enlarging
+    resample = Image.Resampling.BOX if factor < 1 else Image.Resampling.NEAREST
+
+    # Flip so that the first row is at the bottom, as in the preview images
+    return Image.fromarray(rgb[::-1]).resize(size, resample=resample)
+
+
 def nan_to_zero(image):
     """Set any pixels with a value of NaN to zero
 
@@ -811,3 +1135,100 @@ def nan_to_zero(image):
     nan = np.isnan(image)
     image[nan] = 0
     return image
+
+
+@lru_cache(maxsize=NONSCI_MAP_CACHE_SIZE)
+def nonsci_map(map_file=None, subarray=None, shape=None):
+    """Return the map of non-science pixels from a map file, or the
+    standard near-IR map, optionally cropped to a subarray and resized
+    to the shape of the data. Maps are cached, so that each is only
+    created once per process for all files with the same aperture.
+    The returned arrays are shared between callers, and so are
+    read-only.
+
+    Parameters
+    ----------
+    map_file : str
+        Name of a fits file containing the map. If ``None``, the map
+        from ``create_nir_nonsci_map`` is used.
+
+    subarray : tuple
+        Values of the ``SUBSTRT1``, ``SUBSTRT2``, ``SUBSIZE1`` and
+        ``SUBSIZE2`` header keywords. If ``None``, a portion of the map
+        centered on the full frame is used.
+
+    shape : tuple
+        Shape of the data, ``(ydim, xdim)``. If ``None``, the full
+        frame map is returned without cropping.
+
+    Returns
+    -------
+    arr : numpy.ndarray
+        Read-only 2D boolean array. Science pixels are ``True`` and
+        non-science pixels are ``False``.
+    """
+    if map_file is None:
+        arr = create_nir_nonsci_map()
+    else:
+        arr = fits.getdata(map_file).astype(bool)
+
+    if shape is not None:
+        ydim, xdim = shape
+        arr = expand_for_i2d(_crop(arr, subarray, xdim, ydim), xdim, ydim)
+
+    arr.flags.writeable = False
+    return arr
+
+
+def select_integrations(nint):
+    """Select the integrations of an exposure for which preview images
+    are made. If there are 10 integrations or less, every integration
+    is used. If there are more than 10 integrations, then every 10th
+    integration is used, and if there are more than 100 integrations,
+    every 100th integration.
+
+    Parameters
+    ----------
+    nint : int
+        Number of integrations in the exposure
+
+    Returns
+    -------
+    integrations : range
+        Indexes of the selected integrations
+    """
+    if nint <= 10:
+        return range(nint)
+    elif 11 <= nint <= 100:
+        return range(0, nint, 10)
+    else:
+        return range(0, nint, 100)
+
+
+def subarray_nonsci_map(header, xdim, ydim, map_file=None):
+    """Return the cached map of non-science pixels for the subarray
+    given in a file header, with the same shape as the data. See
+    ``nonsci_map``.
+
+    Parameters
+    ----------
+    header : astropy.io.fits.header
+        Header containing the subarray information, usually the
+        primary header of the file
+
+    xdim : int
+        Number of columns in the data
+
+    ydim : int
+        Number of rows in the data
+
+    map_file : str
+        Name of a fits file containing the map. If ``None``, the map
+        from ``create_nir_nonsci_map`` is used.
+
+    Returns
+    -------
+    arr : numpy.ndarray
+        Read-only 2D boolean array of shape (``ydim``, ``xdim``)
+    """
+    return nonsci_map(map_file, _subarray_location(header), (ydim, xdim))
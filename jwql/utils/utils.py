@@ -27,6 +27,7 @@ References
     - JWST TR JWST-STScI-004800, SM-12
  """
 
+from functools import lru_cache
 import getpass
 import glob
 import itertools
@@ -362,34 +363,20 @@ def ensure_dir_exists(fullpath):
         permissions.set_permissions(fullpath)
 
 
-def filename_parser(filename):
-    """Return a dictionary that contains the properties of a given
-    JWST file (e.g. program ID, visit number, detector, etc.).
-
-    Parameters
-    ----------
-    filename : str
-        Path or name of JWST file to parse
+def _compile_filename_patterns():
+    """Build and compile the regular expressions used by
+    ``filename_parser`` to recognize the various JWST filename types.
+    This is done only once, at import time.
 
     Returns
     -------
-    filename_dict : dict
-        Collection of file properties
-
-    Raises
-    ------
-    ValueError
-        When the provided file does not follow naming conventions
+    filename_patterns : list
+        List of ``(filename_type_name, full_name_regex, root_name_regex)``
+        tuples, in the order in which they should be tried. The first
+        regex is used for full filenames, and includes the file suffix.
+        The second is used for file root names, and must match the
+        entire string.
     """
-
-    filename = os.path.basename(filename)
-    split_filename = filename.split('.')
-    file_root_name = (len(split_filename) < 2)
-    if file_root_name:
-        root_name = filename
-    else:
-        root_name = split_filename[0]
-
     # Stage 1 and 2 filenames
     # e.g. "jw80500012009_01101_00012_nrcalong_uncal.fits"
     stage_1_and_2 = \
@@ -521,45 +508,92 @@ def filename_parser(filename):
 
     # Build list of filename types
     filename_types = [
-        stage_1_and_2,
-        stage_2c,
-        stage_2_msa,
-        stage_3_target_id,
-        stage_3_source_id,
-        stage_3_target_id_epoch,
-        stage_3_source_id_epoch,
-        time_series,
-        time_series_2c,
-        guider,
-        guider_segment
+        ('stage_1_and_2', stage_1_and_2),
+        ('stage_2c', stage_2c),
+        ('stage_2_msa', stage_2_msa),
+        ('stage_3_target_id', stage_3_target_id),
+        ('stage_3_source_id', stage_3_source_id),
+        ('stage_3_target_id_epoch', stage_3_target_id_epoch),
+        ('stage_3_source_id_epoch', stage_3_source_id_epoch),
+        ('time_series', time_series),
+        ('time_series_2c', time_series_2c),
+        ('guider', guider),
+        ('guider_segment', guider_segment)
     ]
 
-    filename_type_names = [
-        'stage_1_and_2',
-        'stage_2c',
-        'stage_2_msa',
-        'stage_3_target_id',
-        'stage_3_source_id',
-        'stage_3_target_id_epoch',
-        'stage_3_source_id_epoch',
-        'time_series',
-        'time_series_2c',
-        'guider',
-        'guider_segment'
-    ]
+    suffix_pattern = r"_(?P<suffix>{}).*".format('|'.join(FILE_SUFFIX_TYPES))
+    filename_patterns = [(filename_type_name,
+                          re.compile(filename_type + suffix_pattern),
+                          re.compile(filename_type + r"$"))
+                         for filename_type_name, filename_type in filename_types]
 
-    # Try to parse the filename
-    for filename_type, filename_type_name in zip(filename_types, filename_type_names):
+    return filename_patterns
 
-        # If full filename, try using suffix, except for *msa.fits files
-        if not file_root_name and FILETYPE_WO_STANDARD_SUFFIX not in filename:
-            filename_type += r"_(?P<suffix>{}).*".format('|'.join(FILE_SUFFIX_TYPES))
-        # If not, make sure the provided regex matches the entire filename root
-        else:
-            filename_type += r"$"
 
-        elements = re.compile(filename_type)
-        jwst_file = elements.match(filename)
+FILENAME_PATTERNS = _compile_filename_patterns()
+
+
+def filename_parser(filename):
+    """Return a dictionary that contains the properties of a given
+    JWST file (e.g. program ID, visit number, detector, etc.).
+
+    Results are cached on the basename of the file, so repeated calls
+    for the same file do not re-run the regular expression matching.
+
+    Parameters
+    ----------
+    filename : str
+        Path or name of JWST file to parse
+
+    Returns
+    -------
+    filename_dict : dict
+        Collection of file properties
+
+    Raises
+    ------
+    ValueError
+        When the provided file does not follow naming conventions
+    """
+    # Return a copy so that callers are free to modify the dictionary
+    # without changing the cached result
+    return dict(_parse_basename(os.path.basename(filename)))
+
+
+@lru_cache(maxsize=65536)
+def _parse_basename(filename):
+    """Parse the basename of a JWST file. This contains the logic of
+    ``filename_parser``, which wraps it and is the function that should
+    be called.
+
+    Parameters
+    ----------
+    filename : str
+        Basename of JWST file to parse
+
+    Returns
+    -------
+    filename_dict : dict
+        Collection of file properties
+    """
+    split_filename = filename.split('.')
+    file_root_name = (len(split_filename) < 2)
+    if file_root_name:
+        root_name = filename
+    else:
+        root_name = split_filename[0]
+
+    # If full filename, try using suffix, except for *msa.fits files.
+    # If not, make sure the provided regex matches the entire filename root
+    use_suffix = not file_root_name and FILETYPE_WO_STANDARD_SUFFIX not in filename
+
+    # Try to parse the filename
+    jwst_file = None
+    for filename_type_name, full_name_regex, root_name_regex in FILENAME_PATTERNS:
+        if use_suffix:
+            jwst_file = full_name_regex.match(filename)
+        else:
+            jwst_file = root_name_regex.match(filename)
 
         # Stop when you find a format that matches
         if jwst_file is not None:
@@ -607,6 +641,40 @@ def filename_parser(filename):
     return filename_dict
 
 
+def filename_parser_batch(filenames):
+    """Parse a collection of JWST filenames, and return the results in
+    columnar form. This is useful when parsing large numbers of files,
+    e.g. when walking the filesystem.
+
+    Parameters
+    ----------
+    filenames : iterable
+        Paths or names of JWST files to parse
+
+    Returns
+    -------
+    columns : dict
+        Keys are the properties returned by ``filename_parser`` (plus
+        ``filename``, the input filenames). Values are numpy arrays with
+        one element per input file. Properties that are not present for
+        a given file (e.g. ``segment`` for non-time series files) are
+        ``None``.
+    """
+    filenames = list(filenames)
+    parsed = [_parse_basename(os.path.basename(filename)) for filename in filenames]
+
+    # Collect all keys, in order of first appearance
+    keys = {}
+    for filename_dict in parsed:
+        keys.update(dict.fromkeys(filename_dict))
+
+    columns = {'filename': np.array(filenames, dtype=object)}
+    for key in keys:
+        columns[key] = np.array([filename_dict.get(key) for filename_dict in parsed], dtype=object)
+
+    return columns
+
+
 def filesystem_path(filename, check_existence=True, search=None):
     """Return the path to a given file in the filesystem.
 
@@ -48,6 +48,7 @@ import numpy as np
 import django
 
 from django.apps import apps
+from django.db import IntegrityError, transaction
 from jwql.utils.protect_module import lock_module
 from jwql.utils.constants import DEFAULT_MODEL_CHARFIELD
 
@@ -67,6 +68,7 @@ from jwql.utils.utils import filename_parser, filesystem_path, get_config  # noq
 from jwql.website.apps.jwql.data_containers import create_archived_proposals_context  # noqa
 from jwql.website.apps.jwql.data_containers import get_instrument_proposals, get_filenames_by_instrument  # noqa
 from jwql.website.apps.jwql.data_containers import get_proposal_info, mast_query_filenames_by_instrument, mast_query_by_rootname  # noqa
+from jwql.website.apps.jwql.data_containers import mast_query_by_proposal  # noqa
 
 FILESYSTEM = get_config()['filesystem']
 
@@ -131,6 +133,16 @@ def get_updates(update_database):
                 # Gather information about the proposals for the given instrument
                 proposal_info = get_proposal_info(filenames)
 
+                # Retrieve the MAST metadata for all files in the proposal at once,
+                # rather than querying MAST separately for each new rootname. This
+                # is only needed if there are new files or entries are being updated.
+                existing_rootnames = set(RootFileInfo.objects.filter(root_name__in=rootnames)
+                                         .values_list('root_name', flat=True))
+                if update_database or len(set(rootnames) - existing_rootnames) > 0:
+                    rootname_metadata = mast_query_by_proposal(inst, proposal)
+                else:
+                    rootname_metadata = {}
+
                 # Each observation number in each proposal can have a list of exp_types (e.g. NRC_TACQ, NRC_IMAGE)
                 for obsnum in set(proposal_info['observation_nums']):
                     # Find the public entries for the observation and get the associated exp_types
@@ -161,7 +173,8 @@ def get_updates(update_database):
 
                     # Update the appropriate database table
                     update_database_table(update_database, inst, proposal, obsnum, proposal_info['thumbnail_paths'][0], obsfiles,
-                                          exp_types, starting_date, latest_date, proposal_category)
+                                          exp_types, starting_date, latest_date, proposal_category,
+                                          rootname_metadata=rootname_metadata)
 
         create_archived_proposals_context(inst)
 
@@ -252,7 +265,35 @@ def files_in_filesystem(files, permission_type):
     return filenames
 
 
-def update_database_table(update, instrument, prop, obs, thumbnail, obsfiles, types, startdate, enddate, proposal_category):
+def rootfileinfo_defaults(defaults_dict):
+    """Translate the MAST metadata for a rootname into values for the fields
+    of a ``RootFileInfo`` instance
+
+    Parameters
+    ----------
+    defaults_dict : dict
+        MAST metadata for a single rootname, as returned by ``mast_query_by_rootname``
+
+    Returns
+    -------
+    defaults : dict
+        Values for the ``RootFileInfo`` fields, keyed by field name
+    """
+    defaults = dict(filter=defaults_dict.get('filter', DEFAULT_MODEL_CHARFIELD),
+                    detector=defaults_dict.get('detector', DEFAULT_MODEL_CHARFIELD),
+                    exp_type=defaults_dict.get('exp_type', DEFAULT_MODEL_CHARFIELD),
+                    read_patt=defaults_dict.get('readpatt', DEFAULT_MODEL_CHARFIELD),
+                    grating=defaults_dict.get('grating', DEFAULT_MODEL_CHARFIELD),
+                    read_patt_num=defaults_dict.get('patt_num', 1),
+                    aperture=defaults_dict.get('apername', DEFAULT_MODEL_CHARFIELD),
+                    subarray=defaults_dict.get('subarray', DEFAULT_MODEL_CHARFIELD),
+                    pupil=defaults_dict.get('pupil', DEFAULT_MODEL_CHARFIELD),
+                    expstart=defaults_dict.get('expstart', 0.0))
+    return defaults
+
+
+def update_database_table(update, instrument, prop, obs, thumbnail, obsfiles, types, startdate, enddate, proposal_category,
+                          rootname_metadata=None):
     """Update the database tables that contain info about proposals and observations, via Django models.
 
     Parameters
@@ -287,7 +328,14 @@ def update_database_table(update, instrument, prop, obs, thumbnail, obsfiles, ty
 
     proposal_category : str
         category name
+
+    rootname_metadata : dict
+        MAST metadata for the files in the proposal, keyed by rootname (i.e. the output
+        of ``mast_query_by_proposal``). Rootnames not present in this dictionary are
+        queried from MAST individually.
     """
+    if rootname_metadata is None:
+        rootname_metadata = {}
 
     # Check to see if the required Archive entry exists, and create it if it doesn't
     archive_instance, archive_created = Archive.objects.get_or_create(instrument=instrument)
@@ -336,37 +384,69 @@ def update_database_table(update, instrument, prop, obs, thumbnail, obsfiles, ty
             obs_instance.exptypes = new_exp_list
     obs_instance.save(update_fields=['number_of_files', 'obsstart', 'obsend', 'exptypes'])
 
-    # Get all unsaved root names in the Observation to store in the database
-    nr_files_created = 0
+    # Find the root names in the Observation that already have database entries
+    existing_set = RootFileInfo.objects.filter(root_name__in=obsfiles, instrument=instrument,
+                                               obsnum=obs_instance, proposal=prop)
+    existing = {rfi.root_name: rfi for rfi in existing_set}
+    new_files = [file for file in obsfiles if file not in existing]
+
+    # Root names that exist but are associated with a different instrument/observation/proposal
+    # cannot be created again
+    conflicting = set(RootFileInfo.objects.filter(root_name__in=new_files).values_list('root_name', flat=True))
+
+    # Fill in the MAST metadata only for new entries, or for all entries when updating
+    to_create = []
+    to_update = []
     for file in obsfiles:
+        if file in conflicting:
+            logging.warning(f'\tError with root_name: {file} inst: {instrument} obsnum: {obs_instance} proposal: {prop}')
+            logging.warning('\tAn entry with this root_name already exists for a different observation')
+            continue
+
+        if file in existing:
+            if not update:
+                continue
+            root_file_info_instance = existing[file]
+            to_update.append(root_file_info_instance)
+        else:
+            root_file_info_instance = RootFileInfo(root_name=file, instrument=instrument, obsnum=obs_instance, proposal=prop)
+            to_create.append(root_file_info_instance)
+
         try:
-            root_file_info_instance, rfi_created = RootFileInfo.objects.get_or_create(root_name=file,
-                                                                                      instrument=instrument,
-                                                                                      obsnum=obs_instance,
-                                                                                      proposal=prop)
-            if update or rfi_created:
-                # Updating defaults only on update or creation to prevent call to mast_query_by_rootname on every file name.
+            defaults_dict = rootname_metadata.get(file)
+            if defaults_dict is None:
                 defaults_dict = mast_query_by_rootname(instrument, file)
-
-                defaults = dict(filter=defaults_dict.get('filter', DEFAULT_MODEL_CHARFIELD),
-                                detector=defaults_dict.get('detector', DEFAULT_MODEL_CHARFIELD),
-                                exp_type=defaults_dict.get('exp_type', DEFAULT_MODEL_CHARFIELD),
-                                read_patt=defaults_dict.get('readpatt', DEFAULT_MODEL_CHARFIELD),
-                                grating=defaults_dict.get('grating', DEFAULT_MODEL_CHARFIELD),
-                                read_patt_num=defaults_dict.get('patt_num', 1),
-                                aperture=defaults_dict.get('apername', DEFAULT_MODEL_CHARFIELD),
-                                subarray=defaults_dict.get('subarray', DEFAULT_MODEL_CHARFIELD),
-                                pupil=defaults_dict.get('pupil', DEFAULT_MODEL_CHARFIELD),
-                                expstart=defaults_dict.get('expstart', 0.0))
-
-                for key, value in defaults.items():
-                    setattr(root_file_info_instance, key, value)
-                root_file_info_instance.save()
-            if rfi_created:
-                nr_files_created += 1
+            for key, value in rootfileinfo_defaults(defaults_dict).items():
+                setattr(root_file_info_instance, key, value)
         except Exception as e:
             logging.warning(f'\tError {e} was raised')
             logging.warning(f'\tError with root_name: {file} inst: {instrument} obsnum: {obs_instance} proposal: {prop}')
+
+    update_fields = list(rootfileinfo_defaults({}).keys())
+    try:
+        with transaction.atomic():
+            RootFileInfo.objects.bulk_create(to_create)
+            if len(to_update) > 0:
+                RootFileInfo.objects.bulk_update(to_update, update_fields)
+        nr_files_created = len(to_create)
+    except IntegrityError as e:
+        # Save the entries one at a time, so that a single bad entry does
+        # not prevent the others from being saved
+        logging.warning(f'\tError {e} was raised while saving rootfileinfo entries in bulk. Saving individually.')
+        nr_files_created = 0
+        saves = [(instance, dict(force_insert=True)) for instance in to_create]
+        saves.extend((instance, dict(update_fields=update_fields)) for instance in to_update)
+        for root_file_info_instance, save_kwargs in saves:
+            try:
+                with transaction.atomic():
+                    root_file_info_instance.save(**save_kwargs)
+                if save_kwargs.get('force_insert'):
+                    nr_files_created += 1
+            except Exception as e:
+                logging.warning(f'\tError {e} was raised')
+                logging.warning((f'\tError with root_name: {root_file_info_instance.root_name} inst: {instrument} '
+                                 f'obsnum: {obs_instance} proposal: {prop}'))
+
     if nr_files_created > 0:
         logging.info(f'Created {nr_files_created} rootfileinfo entries for: {instrument} - proposal:{prop} - obs:{obs}')
 
@@ -484,17 +564,7 @@ def fill_empty_rootfileinfo(rootfileinfo_set):
     saved_rootfileinfos = 0
     for rootfileinfo_mod in rootfileinfo_set:
         defaults_dict = mast_query_by_rootname(rootfileinfo_mod.instrument, rootfileinfo_mod.root_name)
-
-        defaults = dict(filter=defaults_dict.get('filter', DEFAULT_MODEL_CHARFIELD),
-                        detector=defaults_dict.get('detector', DEFAULT_MODEL_CHARFIELD),
-                        exp_type=defaults_dict.get('exp_type', DEFAULT_MODEL_CHARFIELD),
-                        read_patt=defaults_dict.get('readpatt', DEFAULT_MODEL_CHARFIELD),
-                        grating=defaults_dict.get('grating', DEFAULT_MODEL_CHARFIELD),
-                        read_patt_num=defaults_dict.get('patt_num', 1),
-                        aperture=defaults_dict.get('apername', DEFAULT_MODEL_CHARFIELD),
-                        subarray=defaults_dict.get('subarray', DEFAULT_MODEL_CHARFIELD),
-                        pupil=defaults_dict.get('pupil', DEFAULT_MODEL_CHARFIELD),
-                        expstart=defaults_dict.get('expstart', 0.0))
+        defaults = rootfileinfo_defaults(defaults_dict)
 
         for key, value in defaults.items():
             # Final check to verify no None exists
@@ -33,15 +33,16 @@ import logging
 import os
 import re
 import tempfile
-from collections import OrderedDict
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
 from datetime import datetime
+from functools import lru_cache
 from operator import getitem, itemgetter
 
 import numpy as np
 import pandas as pd
 import pyvo as vo
 import requests
-from astropy.io import fits
 from astropy.time import Time
 from astroquery.mast import Mast
 from bs4 import BeautifulSoup
@@ -69,9 +70,9 @@ from jwql.utils.constants import (
     SUFFIXES_TO_ADD_ASSOCIATION,
     SUFFIXES_WITH_AVERAGED_INTS,
     THUMBNAIL_FILTER_LOOK,
-    THUMBNAIL_LISTFILE,
     QueryConfigKeys,
 )
+from jwql.utils import header_cache, image_inventory
 from jwql.utils.credentials import get_mast_token
 from jwql.utils.permissions import set_permissions
 from jwql.utils.utils import (
@@ -122,6 +123,12 @@ __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file
 PACKAGE_DIR = os.path.dirname(__location__.split('website')[0])
 REPO_DIR = os.path.split(PACKAGE_DIR)[0]
 
+# Preview image names, e.g. jw01068001001_02102_00001_nrcb1_rate_integ0.jpg
+PREVIEW_IMAGE_NAME = re.compile(r'^(?P<stem>.+)_integ(?P<integration>\d+)\.jpg$')
+
+# Number of preview image directories whose indexes are kept in memory
+PREVIEW_IMAGE_INDEX_CACHE_SIZE = 64
+
 if not ON_GITHUB_ACTIONS:
     Mast._portal_api_connection.MAST_REQUEST_URL = get_config()['mast_request_url']
 
@@ -498,8 +505,8 @@ def get_additional_exposure_info(root_file_infos, image_info):
         except FileNotFoundError as e:
             raise e
 
-        header = fits.getheader(file_path)
-        header_sci = fits.getheader(file_path, 1)
+        header = header_cache.get_header(file_path)
+        header_sci = header_cache.get_header(file_path, 1)
 
         # Dont assume headers exist, some are omitted in parallel observations
         basic_info['category'] = header.get('CATEGORY', 'N/A')
@@ -1166,6 +1173,57 @@ def mast_query_by_rootname(instrument, rootname):
     return retval
 
 
+def mast_query_by_proposal(instrument, proposal_id, observation_id=None):
+    """Query MAST for all columns of all files in a given proposal (and
+    optionally observation). This is the bulk equivalent of calling
+    ``mast_query_by_rootname`` for every rootname in the proposal, and
+    requires only a single query.
+
+    Parameters
+    ----------
+    instrument : str
+        The instrument of interest (e.g. `FGS`).
+    proposal_id : str
+        Proposal ID number to use to filter the results
+    observation_id : str
+        Observation ID number to use to filter the results. If None, all files for
+        the ``proposal_id`` are retrieved
+
+    Returns
+    -------
+    result : dict
+        Dictionary of rootname data, as returned by ``mast_query_by_rootname``,
+        keyed by rootname. If the query fails, an empty dictionary is returned.
+    """
+    instrument = JWST_INSTRUMENT_NAMES_MIXEDCASE[instrument.lower()]
+    service = INSTRUMENT_SERVICE_MATCH[instrument]
+
+    query_filters = [{'paramName': 'program', 'values': [proposal_id]}]
+    if observation_id is not None:
+        query_filters.append({'paramName': 'observtn', 'values': [observation_id]})
+    params = {'columns': '*',
+              'filters': query_filters}
+    try:
+        response = Mast.service_request_async(service, params)
+        result = response[0].json()
+    except Exception as e:
+        logging.error("Mast.service_request_async- {} - {}".format(proposal_id, e))
+        result = {'data': []}
+
+    if len(result['data']) >= MAST_QUERY_LIMIT:
+        logging.warning((f'MAST query limit of {MAST_QUERY_LIMIT} entries reached for {instrument} PID {proposal_id}. '
+                         'Metadata for some files may be missing.'))
+
+    # There is one entry for each file (i.e. each suffix), but the metadata
+    # are the same for all files with a given rootname. Keep the first.
+    retval = {}
+    for entry in result['data']:
+        rootname = '_'.join(entry['filename'].split('_')[:-1])
+        if rootname not in retval:
+            retval[rootname] = entry
+    return retval
+
+
 def mast_query_filenames_by_instrument(instrument, proposal_id, observation_id=None, other_columns=None):
     """Query MAST for filenames for the given instrument. Return the json
     response from MAST.
@@ -1333,39 +1391,16 @@ def get_header_info(filename, filetype):
     # Initialize dictionary to store header information
     header_info = {}
 
-    # Open the file
+    # Get the headers of the file
     try:
         fits_filepath = filesystem_path(filename, search=f'*_{filetype}.fits')
     except FileNotFoundError as e:
         raise e
-    hdulist = fits.open(fits_filepath)
+    headers = header_cache.get_headers(fits_filepath)
 
     # Extract header information from file
-    for ext in range(0, len(hdulist)):
-
-        # Initialize dictionary to store header information for particular extension
-        header_info[ext] = {}
-
-        # Get header
-        header = hdulist[ext].header
-
-        # Determine the extension name and type
-        if ext == 0:
-            header_info[ext]['EXTNAME'] = 'PRIMARY'
-            header_info[ext]['XTENSION'] = 'PRIMARY'
-        else:
-            header_info[ext]['EXTNAME'] = header['EXTNAME']
-            header_info[ext]['XTENSION'] = header['XTENSION']
-
-        # Get list of keywords and values
-        exclude_list = ['', 'COMMENT']
-        header_info[ext]['keywords'] = [item for item in list(header.keys()) if item not in exclude_list]
-        header_info[ext]['values'] = []
-        for key in header_info[ext]['keywords']:
-            header_info[ext]['values'].append(hdulist[ext].header[key])
-
-    # Close the file
-    hdulist.close()
+    for ext, header in enumerate(headers):
+        header_info[ext] = header
 
     # Build tables
     for ext in header_info:
@@ -1425,6 +1460,9 @@ def get_image_info(file_root):
     prev_img_filesys = configs['preview_image_filesystem']
     jpg_dir = os.path.join(prev_img_filesys, proposal_dir)
 
+    # Integrations of the preview images of all files beginning with file_root
+    root_preview_ints = _preview_image_ints(jpg_dir, file_root)
+
     for filename in image_info['all_files']:
 
         parsed_fn = filename_parser(filename)
@@ -1450,15 +1488,19 @@ def get_image_info(file_root):
         jpg_filename = os.path.basename(os.path.splitext(filename)[0] + '_integ0.jpg')
         jpg_filepath = os.path.join(jpg_dir, jpg_filename)
 
-        # Record how many integrations have been saved as preview images per filetype
-        jpgs = glob.glob(os.path.join(prev_img_filesys, proposal_dir, '{}*_{}_integ*.jpg'.format(file_root, suffix)))
-        image_info['available_ints'][suffix] = sorted(set([int(jpg.split('_')[-1].replace('.jpg', '').replace('integ', '')) for jpg in jpgs]))
+        # Record how many integrations have been saved as preview images per
+        # filetype. Preview image stems must match {file_root}*_{suffix}
+        available_ints = set()
+        for stem, integrations in root_preview_ints.items():
+            if stem.endswith(f'_{suffix}') and len(stem) > len(file_root) + len(suffix):
+                available_ints.update(integrations)
+        image_info['available_ints'][suffix] = sorted(available_ints)
         image_info['num_ints'][suffix] = len(image_info['available_ints'][suffix])
         image_info['all_jpegs'].append(jpg_filepath)
 
         # Record how many integrations exist per filetype.
         if suffix not in SUFFIXES_WITH_AVERAGED_INTS:
-            header = fits.getheader(filename)
+            header = header_cache.get_header(filename)
             nint = header['NINTS']
             if 'time_series' in parsed_fn['filename_type']:
                 # time series segments need special handling
@@ -1468,7 +1510,7 @@ def get_image_info(file_root):
             elif image_info['num_ints'][suffix] > nint:
                 # so do data cubes:
                 # get max ints from data shape in first extension
-                sci_header = fits.getheader(filename, ext=1)
+                sci_header = header_cache.get_header(filename, 1)
                 n_frame = sci_header.get('NAXIS3', nint)
 
                 # for groups with multiple cubes (e.g. miri with ifu
@@ -1506,9 +1548,13 @@ def get_explorer_extension_names(fits_file, filetype):
         List of Extensions found in header and allowed to be Explored (extension type "IMAGE")
     """
 
-    header_info = get_header_info(fits_file, filetype)
+    try:
+        fits_filepath = filesystem_path(fits_file, search=f'*_{filetype}.fits')
+    except FileNotFoundError as e:
+        raise e
+    headers = header_cache.get_headers(fits_filepath)
 
-    extensions = [header_info[extension]['EXTNAME'] for extension in header_info if header_info[extension]['XTENSION'] == 'IMAGE']
+    extensions = [header['EXTNAME'] for header in headers if header['XTENSION'] == 'IMAGE']
     return extensions
 
 
@@ -1888,22 +1934,19 @@ def get_thumbnails_by_instrument(inst):
         A list of thumbnails available in the filesystem for the
         given instrument.
     """
-    # Get list of all thumbnails
-    thumb_inventory = f'{THUMBNAIL_LISTFILE}_{inst.lower()}.txt'
-    all_thumbnails = retrieve_filelist(os.path.join(THUMBNAIL_FILESYSTEM, thumb_inventory))
-
     thumbnails = []
     all_proposals = get_instrument_proposals(inst)
     for proposal in all_proposals:
         results = mast_query_filenames_by_instrument(inst, proposal)
 
         # Parse the results to get the rootnames
-        filenames = [result['filename'].split('.')[0] for result in results]
+        filenames = set(result['filename'].split('.')[0] for result in results)
 
         if len(filenames) > 0:
-            # Get subset of preview images that match the filenames
-            prop_thumbnails = [os.path.basename(item) for item in all_thumbnails if
-                               os.path.basename(item).split('_integ')[0] in filenames]
+            # Get subset of the proposal's thumbnails that match the filenames
+            prop_thumbnails = [os.path.basename(item) for item in
+                               image_inventory.get_files('thumbnail', inst, program=proposal)
+                               if os.path.basename(item).split('_integ')[0] in filenames]
 
             thumbnails.extend(prop_thumbnails)
 
@@ -1958,6 +2001,157 @@ def get_thumbnail_by_rootname(rootname):
         '{}*'.format(rootname))))
 
     thumbnails = [os.path.basename(thumbnail) for thumbnail in thumbnails]
+
+    return _select_thumbnail(thumbnails)
+
+
+def _index_preview_images(directory):
+    """Return an index of the preview images in ``directory``. The
+    directory is scanned once, and scanned again only when its
+    modification time changes.
+
+    Parameters
+    ----------
+    directory : str
+        Preview image directory of a proposal
+
+    Returns
+    -------
+    stems : list
+        Sorted list of the preview image names with the
+        ``_integ<N>.jpg`` ending removed
+    integrations : dict
+        The integration numbers of the preview images of each stem.
+        Both are empty if the directory does not exist.
+    """
+    try:
+        mtime = os.stat(directory).st_mtime
+    except (FileNotFoundError, NotADirectoryError):
+        return [], {}
+    return _scan_preview_images(directory, mtime)
+
+
+def _list_thumbnail_dir(rootname):
+    """Return the sorted basenames of all thumbnails in the proposal
+    directory that would hold the thumbnail for ``rootname``.
+
+    Parameters
+    ----------
+    rootname : str
+        The rootname of interest (e.g.
+        ``jw86600008001_02101_00007_guider2``).
+
+    Returns
+    -------
+    thumbnails : list
+        Sorted list of thumbnail basenames in the proposal directory.
+        Empty if the directory does not exist.
+    """
+    proposal = rootname.split('_')[0].split('jw')[-1][0:5]
+    try:
+        return sorted(os.listdir(os.path.join(THUMBNAIL_FILESYSTEM, 'jw{}'.format(proposal))))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _match_thumbnails(rootname, thumbnails):
+    """Return the entries of a sorted list of thumbnail basenames that
+    begin with ``rootname``, equivalent to globbing ``rootname*``.
+
+    Parameters
+    ----------
+    rootname : str
+        The rootname of interest
+    thumbnails : list
+        Sorted list of thumbnail basenames, as returned by
+        ``_list_thumbnail_dir``
+
+    Returns
+    -------
+    matches : list
+        Sorted thumbnail basenames beginning with ``rootname``
+    """
+    matches = []
+    for thumbnail in thumbnails[bisect_left(thumbnails, rootname):]:
+        if not thumbnail.startswith(rootname):
+            break
+        matches.append(thumbnail)
+    return matches
+
+
+def _preview_image_ints(directory, file_root):
+    """Return the integration numbers of the preview images in
+    ``directory`` whose names begin with ``file_root``.
+
+    Parameters
+    ----------
+    directory : str
+        Preview image directory of a proposal
+    file_root : str
+        The rootname of interest (e.g.
+        ``jw86600008001_02101_00007_guider2``).
+
+    Returns
+    -------
+    integrations : dict
+        Sorted integration numbers for each preview image stem
+        beginning with ``file_root``
+    """
+    stems, integrations = _index_preview_images(directory)
+    matches = {}
+    for stem in stems[bisect_left(stems, file_root):]:
+        if not stem.startswith(file_root):
+            break
+        matches[stem] = integrations[stem]
+    return matches
+
+
+@lru_cache(maxsize=PREVIEW_IMAGE_INDEX_CACHE_SIZE)
+def _scan_preview_images(directory, mtime):
+    """Scan a preview image directory for ``_index_preview_images``.
+    The modification time of the directory is part of the cache key, so
+    that changed directories are scanned again.
+
+    Parameters
+    ----------
+    directory : str
+        Preview image directory of a proposal
+    mtime : float
+        Modification time of the directory
+
+    Returns
+    -------
+    stems : list
+        Sorted list of preview image stems
+    integrations : dict
+        Sorted integration numbers of the preview images of each stem
+    """
+    integrations = defaultdict(set)
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = PREVIEW_IMAGE_NAME.match(entry.name)
+            if match is not None:
+                integrations[match.group('stem')].add(int(match.group('integration')))
+    integrations = {stem: sorted(ints) for stem, ints in integrations.items()}
+    return sorted(integrations), integrations
+
+
+def _select_thumbnail(thumbnails):
+    """Choose the preferred thumbnail from a sorted list of thumbnail
+    basenames belonging to a single rootname. Thumbnails of 'rate'
+    files are preferred over 'dark' files; 'none' is returned when
+    neither is present.
+
+    Parameters
+    ----------
+    thumbnails : list
+        Sorted list of thumbnail basenames for one rootname
+
+    Returns
+    -------
+    thumbnail_basename : str
+        The selected thumbnail basename, or 'none'
+    """
     thumbnail_basename = 'none'
 
     if len(thumbnails) > 0:
@@ -2030,20 +2224,6 @@ def random_404_page():
     return random_template
 
 
-def retrieve_filelist(filename):
-    """Return a list of all thumbnail files in the filesystem from
-    a list file.
-
-    Parameters
-    ----------
-    filename : str
-        Name of a text file containing a list of files
-    """
-    with open(filename) as fobj:
-        file_list = fobj.read().splitlines()
-    return file_list
-
-
 def text_scrape(prop_id):
     """Scrapes the Proposal Information Page.
 
@@ -2190,6 +2370,24 @@ def thumbnails_ajax(inst, proposal, obs_num=None):
     exp_types = set()
     exp_groups = set()
 
+    # Group the available files by rootname, keeping the expstart and exp_type
+    # of the first file for each. All files with a given rootname have the same
+    # exposure start time.
+    files_by_rootname = defaultdict(list)
+    first_index = {}
+    for i, item in enumerate(filenames):
+        root = '_'.join(item.split('/')[-1].split('_')[:-1])
+        files_by_rootname[root].append(item)
+        first_index.setdefault(root, i)
+
+    # These attributes are stored by rootname in the Model db. Fetch them for
+    # all rootnames at once rather than querying once per rootname.
+    root_file_infos = {info.root_name: info for info in
+                       RootFileInfo.objects.filter(root_name__in=rootnames)}
+
+    # Directory listings of the thumbnail filesystem, one per proposal directory
+    thumbnail_listings = {}
+
     # Gather data for each rootname, and construct a list of all observations
     # in the proposal
     for rootname in rootnames:
@@ -2210,33 +2408,32 @@ def thumbnails_ajax(inst, proposal, obs_num=None):
             # Skip over files not recognized by the filename_parser
             continue
 
-        # Get list of available filenames and exposure start times. All files with a given
-        # rootname will have the same exposure start time, so just keep the first.
-        available_files = []
-        exp_start = None
-        exp_type = None
-        for i, item in enumerate(filenames):
-            if rootname in item:
-                available_files.append(item)
-                if exp_start is None:
-                    exp_start = columns['expstart'][i]
-                    exp_type = columns['exp_type'][i]
+        # Get list of available filenames and exposure start times
+        available_files = files_by_rootname[rootname]
+        exp_start = columns['expstart'][first_index[rootname]]
+        exp_type = columns['exp_type'][first_index[rootname]]
         exp_types.add(exp_type)
 
-        # These attributes are stored by rootname in the Model db.  Save them with the data_dict
+        # Save the RootFileInfo attributes with the data_dict
         # THUMBNAIL_FILTER_LOOK is boolean accessed according to a viewed flag
-        try:
-            root_file_info = RootFileInfo.objects.get(root_name=rootname)
+        root_file_info = root_file_infos.get(rootname)
+        if root_file_info is not None:
             viewed = THUMBNAIL_FILTER_LOOK[root_file_info.viewed]
             filter_type = root_file_info.filter
             pupil_type = root_file_info.pupil
             grating_type = root_file_info.grating
-        except RootFileInfo.DoesNotExist:
+        else:
             viewed = THUMBNAIL_FILTER_LOOK[0]
             filter_type = ""
             pupil_type = ""
             grating_type = ""
 
+        # Find the thumbnail from the cached listing of the proposal directory
+        thumbnail_dir = rootname.split('_')[0].split('jw')[-1][0:5]
+        if thumbnail_dir not in thumbnail_listings:
+            thumbnail_listings[thumbnail_dir] = _list_thumbnail_dir(rootname)
+        thumbnail = _select_thumbnail(_match_thumbnails(rootname, thumbnail_listings[thumbnail_dir]))
+
         # Add to list of all exposure groups
         exp_groups.add(filename_dict['group_root'])
 
@@ -2246,7 +2443,7 @@ def thumbnails_ajax(inst, proposal, obs_num=None):
         data_dict['file_data'][rootname]['available_files'] = available_files
         data_dict['file_data'][rootname]['viewed'] = viewed
         data_dict['file_data'][rootname]['exp_type'] = exp_type
-        data_dict['file_data'][rootname]['thumbnail'] = get_thumbnail_by_rootname(rootname)
+        data_dict['file_data'][rootname]['thumbnail'] = thumbnail
         data_dict['file_data'][rootname]['filter'] = filter_type
         data_dict['file_data'][rootname]['pupil'] = pupil_type
         data_dict['file_data'][rootname]['grating'] = grating_type